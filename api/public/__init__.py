@@ -10,6 +10,7 @@ from api.public import competition as competitions
 from api.public import category as categories
 from api.public import performance as performances
 from api.public import club as clubs
+from api.public import export as exports
 
 api = APIRouter()
 
@@ -56,3 +57,9 @@ api.include_router(
     tags=["Performances"],
     dependencies=[Depends(authent)],
 )
+api.include_router(
+    exports.router,
+    prefix="/export",
+    tags=["Export"],
+    dependencies=[Depends(authent)],
+)
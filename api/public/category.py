@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Response
+from fastapi.concurrency import run_in_threadpool
 from sqlmodel import Session
 
 from commons.schemas import *
 from backend.database import get_session
+from api.utils.pagination import decode_cursor, set_next_cursor
 from backend.crud.category import (
     create_category,
     read_category,
@@ -18,30 +20,38 @@ router = APIRouter()
 async def create_a_category(
     category: CategoryCreate, db: Session = Depends(get_session)
 ):
-    return create_category(category=category, db=db)
+    return await run_in_threadpool(create_category, category=category, db=db)
 
 
 @router.get("", response_model=list[CategoryRead])
 async def get_categories(
+    response: Response,
     offset: int = 0,
     limit: int = Query(default=100, lte=100),
+    cursor: str | None = None,
     db: Session = Depends(get_session),
 ):
-    return read_categories(offset=offset, limit=limit, db=db)
+    categories = await run_in_threadpool(
+        read_categories, offset=offset, limit=limit, after=decode_cursor(cursor), db=db
+    )
+    set_next_cursor(response, categories, limit)
+    return categories
 
 
 @router.get("/{category_id}", response_model=CategoryReadWithCompetition)
 async def get_a_category(category_id: int, db: Session = Depends(get_session)):
-    return read_category(category_id=category_id, db=db)
+    return await run_in_threadpool(read_category, category_id=category_id, db=db)
 
 
 @router.patch("/{category_id}", response_model=CategoryRead)
 async def update_a_category(
     category_id: int, category: CategoryUpdate, db: Session = Depends(get_session)
 ):
-    return update_category(category_id=category_id, category=category, db=db)
+    return await run_in_threadpool(
+        update_category, category_id=category_id, category=category, db=db
+    )
 
 
 @router.delete("/{category_id}")
 async def delete_a_category(category_id: int, db: Session = Depends(get_session)):
-    return delete_category(category_id=category_id, db=db)
+    return await run_in_threadpool(delete_category, category_id=category_id, db=db)
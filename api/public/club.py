@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Response
+from fastapi.concurrency import run_in_threadpool
 from sqlmodel import Session
 
 from commons.schemas import *
 from backend.database import get_session
+from api.utils.pagination import decode_cursor, set_next_cursor
 from backend.crud.club import (
     create_club,
     read_club,
@@ -11,36 +13,41 @@ from backend.crud.club import (
     delete_club,
 )
 
-
 router = APIRouter()
 
 
 @router.post("", response_model=ClubRead)
 async def create_a_club(club: ClubCreate, db: Session = Depends(get_session)):
-    return create_club(club=club, db=db)
+    return await run_in_threadpool(create_club, club=club, db=db)
 
 
 @router.get("", response_model=list[ClubRead])
 async def get_clubs(
+    response: Response,
     offset: int = 0,
     limit: int = Query(default=100, lte=100),
+    cursor: str | None = None,
     db: Session = Depends(get_session),
 ):
-    return read_clubs(offset=offset, limit=limit, db=db)
+    clubs = await run_in_threadpool(
+        read_clubs, offset=offset, limit=limit, after=decode_cursor(cursor), db=db
+    )
+    set_next_cursor(response, clubs, limit)
+    return clubs
 
 
 @router.get("/{club_id}", response_model=ClubRead)
 async def get_a_club(club_id: int, db: Session = Depends(get_session)):
-    return read_club(club_id=club_id, db=db)
+    return await run_in_threadpool(read_club, club_id=club_id, db=db)
 
 
 @router.patch("/{club_id}", response_model=ClubRead)
 async def update_a_club(
     club_id: int, club: ClubUpdate, db: Session = Depends(get_session)
 ):
-    return update_club(club_id=club_id, club=club, db=db)
+    return await run_in_threadpool(update_club, club_id=club_id, club=club, db=db)
 
 
 @router.delete("/{club_id}")
 async def delete_a_club(club_id: int, db: Session = Depends(get_session)):
-    return delete_club(club_id=club_id, db=db)
+    return await run_in_threadpool(delete_club, club_id=club_id, db=db)
@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Response
+from fastapi.concurrency import run_in_threadpool
 from sqlmodel import Session
 
 from commons.schemas import *
 from backend.database import get_session
+from api.utils.pagination import decode_cursor, set_next_cursor
 from backend.crud.competition import (
     create_competition,
     read_competition,
@@ -11,7 +13,6 @@ from backend.crud.competition import (
     delete_competition,
 )
 
-
 router = APIRouter()
 
 
@@ -19,21 +20,33 @@ router = APIRouter()
 async def create_a_competition(
     competition: CompetitionCreate, db: Session = Depends(get_session)
 ):
-    return create_competition(competition=competition, db=db)
+    return await run_in_threadpool(create_competition, competition=competition, db=db)
 
 
 @router.get("", response_model=list[CompetitionRead])
 async def get_competitions(
+    response: Response,
     offset: int = 0,
     limit: int = Query(default=100, lte=100),
+    cursor: str | None = None,
     db: Session = Depends(get_session),
 ):
-    return read_competitions(offset=offset, limit=limit, db=db)
+    competitions = await run_in_threadpool(
+        read_competitions,
+        offset=offset,
+        limit=limit,
+        after=decode_cursor(cursor),
+        db=db,
+    )
+    set_next_cursor(response, competitions, limit)
+    return competitions
 
 
 @router.get("/{competition_id}", response_model=CompetitionRead)
 async def get_a_competition(competition_id: int, db: Session = Depends(get_session)):
-    return read_competition(competition_id=competition_id, db=db)
+    return await run_in_threadpool(
+        read_competition, competition_id=competition_id, db=db
+    )
 
 
 @router.patch("/{competition_id}", response_model=CompetitionRead)
@@ -42,11 +55,16 @@ async def update_a_competition(
     competition: CompetitionUpdate,
     db: Session = Depends(get_session),
 ):
-    return update_competition(
-        competition_id=competition_id, competition=competition, db=db
+    return await run_in_threadpool(
+        update_competition,
+        competition_id=competition_id,
+        competition=competition,
+        db=db,
     )
 
 
 @router.delete("/{competition_id}")
 async def delete_a_competition(competition_id: int, db: Session = Depends(get_session)):
-    return delete_competition(competition_id=competition_id, db=db)
+    return await run_in_threadpool(
+        delete_competition, competition_id=competition_id, db=db
+    )
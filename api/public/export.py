@@ -0,0 +1,32 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+from sqlmodel import Session
+
+from backend.database import get_session
+from backend.crud.export import MEDIA_TYPES, ExportFormat, export_performances
+
+router = APIRouter()
+
+
+@router.get("/performances")
+async def export_the_performances(
+    format: ExportFormat = "ndjson",
+    competition_id: int | None = None,
+    season: str | None = None,
+    club_id: int | None = None,
+    db: Session = Depends(get_session),
+):
+    chunks = export_performances(
+        format=format,
+        competition_id=competition_id,
+        season=season,
+        club_id=club_id,
+        db=db,
+    )
+    return StreamingResponse(
+        chunks,
+        media_type=MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="performances.{format}"'
+        },
+    )
@@ -1,12 +1,12 @@
 from fastapi import APIRouter, Depends, status
+from fastapi.concurrency import run_in_threadpool
 from sqlmodel import Session
 
-from commons.schemas import Health, Stats
+from commons.schemas import Health, PoolStatus, Stats
 from backend.database import Session, get_session
-from backend.crud.health import get_health, get_stats
+from backend.crud.health import get_health, get_pool_status, get_stats
 from logger import logger_config
 
-
 router = APIRouter()
 logger = logger_config(__name__)
 
@@ -18,7 +18,7 @@ logger = logger_config(__name__)
     responses={200: {"model": Health}},
 )
 async def health(db: Session = Depends(get_session)):
-    return get_health(db=db)
+    return await run_in_threadpool(get_health, db=db)
 
 
 @router.get(
@@ -27,5 +27,15 @@ async def health(db: Session = Depends(get_session)):
     status_code=status.HTTP_200_OK,
     responses={200: {"model": Stats}},
 )
-async def health_stats(db: Session = Depends(get_session)):
-    return get_stats(db=db)
+async def health_stats(exact: bool = False, db: Session = Depends(get_session)):
+    return await run_in_threadpool(get_stats, db=db, exact=exact)
+
+
+@router.get(
+    "/pool",
+    response_model=PoolStatus,
+    status_code=status.HTTP_200_OK,
+    responses={200: {"model": PoolStatus}},
+)
+async def pool_status():
+    return get_pool_status()
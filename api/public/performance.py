@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Response
+from fastapi.concurrency import run_in_threadpool
 from sqlmodel import Session
 
 from commons.schemas import *
 from backend.database import get_session
+from api.utils.pagination import decode_cursor, set_next_cursor
 from backend.crud.performance import (
     create_performance,
     read_performance,
@@ -11,7 +13,6 @@ from backend.crud.performance import (
     delete_performance,
 )
 
-
 router = APIRouter()
 
 
@@ -19,21 +20,33 @@ router = APIRouter()
 async def create_a_performance(
     performance: PerformanceCreate, db: Session = Depends(get_session)
 ):
-    return create_performance(performance=performance, db=db)
+    return await run_in_threadpool(create_performance, performance=performance, db=db)
 
 
 @router.get("", response_model=list[PerformanceRead])
 async def get_performances(
+    response: Response,
     offset: int = 0,
     limit: int = Query(default=100, lte=100),
+    cursor: str | None = None,
     db: Session = Depends(get_session),
 ):
-    return read_performances(offset=offset, limit=limit, db=db)
+    performances = await run_in_threadpool(
+        read_performances,
+        offset=offset,
+        limit=limit,
+        after=decode_cursor(cursor),
+        db=db,
+    )
+    set_next_cursor(response, performances, limit)
+    return performances
 
 
 @router.get("/{performance_id}", response_model=PerformanceRead)
 async def get_a_performance(performance_id: int, db: Session = Depends(get_session)):
-    return read_performance(performance_id=performance_id, db=db)
+    return await run_in_threadpool(
+        read_performance, performance_id=performance_id, db=db
+    )
 
 
 @router.patch("/{performance_id}", response_model=PerformanceRead)
@@ -42,11 +55,16 @@ async def update_a_performance(
     performance: PerformanceUpdate,
     db: Session = Depends(get_session),
 ):
-    return update_performance(
-        performance_id=performance_id, performance=performance, db=db
+    return await run_in_threadpool(
+        update_performance,
+        performance_id=performance_id,
+        performance=performance,
+        db=db,
     )
 
 
 @router.delete("/{performance_id}")
 async def delete_a_performance(performance_id: int, db: Session = Depends(get_session)):
-    return delete_performance(performance_id=performance_id, db=db)
+    return await run_in_threadpool(
+        delete_performance, performance_id=performance_id, db=db
+    )
@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Response
+from fastapi.concurrency import run_in_threadpool
 from sqlmodel import Session
 
 from commons.schemas import *
 from backend.database import get_session
+from api.utils.pagination import decode_cursor, set_next_cursor
 from backend.crud.skater import (
     create_skater,
     delete_skater,
@@ -10,37 +12,50 @@ from backend.crud.skater import (
     read_skaters,
     update_skater,
 )
-
+from backend.crud.summary import read_skater_summary
 
 router = APIRouter()
 
 
 @router.post("", response_model=SkaterRead)
 async def create_a_skater(skater: SkaterCreate, db: Session = Depends(get_session)):
-    return create_skater(skater=skater, db=db)
+    return await run_in_threadpool(create_skater, skater=skater, db=db)
 
 
 @router.get("", response_model=list[SkaterReadWithClub])
 async def get_skaters(
+    response: Response,
     offset: int = 0,
     limit: int = Query(default=100, lte=100),
+    cursor: str | None = None,
     db: Session = Depends(get_session),
 ):
-    return read_skaters(offset=offset, limit=limit, db=db)
+    skaters = await run_in_threadpool(
+        read_skaters, offset=offset, limit=limit, after=decode_cursor(cursor), db=db
+    )
+    set_next_cursor(response, skaters, limit)
+    return skaters
 
 
 @router.get("/{skater_id}", response_model=SkaterReadWithClub)
 async def get_a_skater(skater_id: int, db: Session = Depends(get_session)):
-    return read_skater(skater_id=skater_id, db=db)
+    return await run_in_threadpool(read_skater, skater_id=skater_id, db=db)
+
+
+@router.get("/{skater_id}/summary", response_model=list[SkaterSeasonSummaryRead])
+async def get_a_skater_summary(skater_id: int, db: Session = Depends(get_session)):
+    return await run_in_threadpool(read_skater_summary, skater_id=skater_id, db=db)
 
 
 @router.patch("/{skater_id}", response_model=SkaterRead)
 async def update_a_skater(
     skater_id: int, skater: SkaterUpdate, db: Session = Depends(get_session)
 ):
-    return update_skater(skater_id=skater_id, skater=skater, db=db)
+    return await run_in_threadpool(
+        update_skater, skater_id=skater_id, skater=skater, db=db
+    )
 
 
 @router.delete("/{skater_id}")
 async def delete_a_skater(skater_id: int, db: Session = Depends(get_session)):
-    return delete_skater(skater_id=skater_id, db=db)
+    return await run_in_threadpool(delete_skater, skater_id=skater_id, db=db)
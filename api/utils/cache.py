@@ -0,0 +1,74 @@
+import hashlib
+
+from fastapi import Request, Response, status
+
+from backend.cache import CachedResponse, response_cache
+from config import settings
+from logger import logger_config
+
+logger = logger_config(__name__)
+
+# Read endpoints whose responses are cached. The health and export endpoints are not.
+CACHED_PREFIXES = (
+    "/skaters",
+    "/competitions",
+    "/categories",
+    "/clubs",
+    "/performances",
+)
+# Headers of the responses kept in the cache, besides the body
+CACHED_HEADERS = ("content-type", "x-next-cursor")
+
+
+def cache_key(request: Request) -> str:
+    """Key of a request: its path and query, and its credentials so that a cached response
+    is only sent to a client which was authorized to get it"""
+    credentials = f"{request.headers.get('authorization')}:{settings.API_USERNAME}:{settings.API_PASSWORD}"
+    return ":".join(
+        [
+            request.url.path,
+            str(sorted(request.query_params.multi_items())),
+            hashlib.sha256(credentials.encode()).hexdigest(),
+        ]
+    )
+
+
+def cached_response(request: Request, cached: CachedResponse) -> Response:
+    headers = cached.headers | {"ETag": cached.etag}
+    if cached.etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=cached.body, headers=headers)
+
+
+async def cache_responses(request: Request, call_next) -> Response:
+    """Middleware answering the GET requests of the read endpoints from the response cache,
+    with a strong ETag and 304 Not Modified to a matching If-None-Match"""
+    if request.method != "GET" or not request.url.path.startswith(CACHED_PREFIXES):
+        return await call_next(request)
+
+    key = cache_key(request)
+    try:
+        generation = response_cache.generation()
+        cached = response_cache.get(key)
+    except Exception as e:
+        logger.error(f"Could not read the response cache: {e}")
+        return await call_next(request)
+    if cached is not None:
+        return cached_response(request, cached)
+
+    response = await call_next(request)
+    if response.status_code != status.HTTP_200_OK:
+        return response
+    body = b"".join([chunk async for chunk in response.body_iterator])  # type: ignore
+    cached = CachedResponse(
+        body=body,
+        etag=f'"{hashlib.sha256(body).hexdigest()}"',
+        headers={
+            h: response.headers[h] for h in CACHED_HEADERS if h in response.headers
+        },
+    )
+    try:
+        response_cache.set(key, cached, generation)
+    except Exception as e:
+        logger.error(f"Could not write the response cache: {e}")
+    return cached_response(request, cached)
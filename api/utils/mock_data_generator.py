@@ -1,10 +1,129 @@
+"""Synthetic database to test and benchmark the queries at scale.
+
+The rows are bulk inserted with one executemany per table. The shape of the data follows
+the results website: competitions of several seasons with a few categories each, and one
+performance with a short program and a free skating per entry of a category.
+"""
+
+import random
+from datetime import date, timedelta
+
+from sqlalchemy import Engine, insert
 from sqlmodel import Session
 
 from backend.database import engine
+from commons.schemas import *
 from logger import logger_config
 
 logger = logger_config(__name__)
 
+SEASONS = ["2019-2020", "2020-2021", "2021-2022", "2022-2023", "2023-2024"]
+NB_CLUBS = 60
+NB_SKATERS = 5000
+ENTRIES_PER_CATEGORY = 25
+CATEGORIES_PER_COMPETITION = 10
+
+
+def program_values(rng: random.Random, seg: str, rank: int, performance_id: int):
+    tes, co, pr, sk = [round(rng.uniform(5, 40), 2) for _ in range(4)]
+    return {
+        "type": seg,
+        "rank": rank,
+        "withdrawn": False,
+        "disqualified": False,
+        "starting_number": rng.randint(1, ENTRIES_PER_CATEGORY),
+        "total_segment_score": round(tes + co + pr + sk, 2),
+        "total_element_score": tes,
+        "total_component_score": round(co + pr + sk, 2),
+        "total_deductions": 0.0,
+        "composition": co,
+        "presentation": pr,
+        "skating_skills": sk,
+        "bonifications": 0.0,
+        "performance_id": performance_id,
+    }
+
 
-def create_skaters():
-    pass
+def create_mock_data(
+    nb_performances: int = 100_000, seed: int = 0, db_engine: Engine = engine
+):
+    """Fill an empty database with about `nb_performances` performances"""
+    rng = random.Random(seed)
+    nb_categories = max(1, nb_performances // ENTRIES_PER_CATEGORY)
+    nb_competitions = max(1, nb_categories // CATEGORIES_PER_COMPETITION)
+    with Session(db_engine) as db:
+        db.execute(
+            insert(Club),
+            [{"id": i + 1, "abbrev": f"CLUB{i:02}"} for i in range(NB_CLUBS)],
+        )
+        db.execute(
+            insert(Skater),
+            [
+                {
+                    "id": i + 1,
+                    "first_name": f"First{i}",
+                    "last_name": f"LAST{i}",
+                    "full_name_key": f"first{i} last{i}",
+                    "genre": rng.choice(["Dames", "Messieurs"]),
+                    "nation": "FRA",
+                    "club_id": rng.randint(1, NB_CLUBS),
+                }
+                for i in range(NB_SKATERS)
+            ],
+        )
+        db.execute(
+            insert(Competition),
+            [
+                {
+                    "id": i + 1,
+                    "name": f"Competition {i}",
+                    "type": rng.choice(["TF", "CR"]),
+                    "season": SEASONS[i * len(SEASONS) // nb_competitions],
+                    "start": date(2019, 9, 1)
+                    + timedelta(days=i * 1800 // nb_competitions),
+                    "end": None,
+                    "location": None,
+                    "rink_name": None,
+                    "url": None,
+                }
+                for i in range(nb_competitions)
+            ],
+        )
+        db.execute(
+            insert(Category),
+            [
+                {
+                    "id": i + 1,
+                    "genre": rng.choice(["Dames", "Messieurs"]),
+                    "age": rng.choice(["Novice", "Junior", "Senior"]),
+                    "level": rng.choice(["R1", "R2", "R3"]),
+                    "competition_id": i % nb_competitions + 1,
+                }
+                for i in range(nb_categories)
+            ],
+        )
+        performances, programs = [], []
+        for category_id in range(1, nb_categories + 1):
+            skaters = rng.sample(range(1, NB_SKATERS + 1), ENTRIES_PER_CATEGORY)
+            for rank, skater_id in enumerate(skaters, start=1):
+                performance_id = len(performances) + 1
+                performances.append(
+                    {
+                        "id": performance_id,
+                        "skater_id": skater_id,
+                        "category_id": category_id,
+                        "withdrawn": False,
+                        "disqualified": False,
+                        "rank": rank,
+                        "score": round(rng.uniform(20, 200), 2),
+                        "total_entries": ENTRIES_PER_CATEGORY,
+                    }
+                )
+                programs.append(program_values(rng, "SP", rank, performance_id))
+                programs.append(program_values(rng, "FS", rank, performance_id))
+        db.execute(insert(Performance), performances)
+        db.execute(insert(Program), programs)
+        db.commit()
+    logger.info(
+        f"Created {nb_competitions} competitions, {nb_categories} categories and {len(performances)} performances"
+    )
@@ -0,0 +1,35 @@
+import base64
+import binascii
+import json
+from typing import Sequence
+
+from fastapi import HTTPException, Response, status
+
+# Header holding the cursor of the next page of a list endpoint, missing on the last page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(key: int) -> str:
+    """Opaque cursor of the page after a primary key"""
+    return base64.urlsafe_b64encode(json.dumps({"after": key}).encode()).decode()
+
+
+def decode_cursor(cursor: str | None) -> int | None:
+    if cursor is None:
+        return None
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode()))["after"]
+        if not isinstance(key, int):
+            raise TypeError(key)
+        return key
+    except (binascii.Error, UnicodeError, ValueError, TypeError, KeyError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid cursor: {cursor}",
+        )
+
+
+def set_next_cursor(response: Response, rows: Sequence, limit: int, key: str = "id"):
+    """Send the cursor of the page after the rows, unless it is the last one"""
+    if rows and len(rows) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(getattr(rows[-1], key))
@@ -1,10 +1,12 @@
 from contextlib import asynccontextmanager
 
+from anyio import to_thread
 from fastapi import FastAPI
 
-from config import Settings
+from config import Settings, settings
 from backend.database import create_db_and_tables, drop_db_and_tables
 from api.public import api as public_api
+from api.utils.cache import cache_responses
 from logger import logger_config
 
 logger = logger_config(__name__)
@@ -13,6 +15,11 @@ logger = logger_config(__name__)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     create_db_and_tables()
+    # The route handlers run their synchronous database calls in this threadpool, so that
+    # they do not block the event loop
+    to_thread.current_default_thread_limiter().total_tokens = (
+        settings.API_THREADPOOL_SIZE
+    )
 
     logger.info("startup: triggered")
 
@@ -31,5 +38,6 @@ def create_app(settings: Settings):
     )
 
     app.include_router(public_api)
+    app.middleware("http")(cache_responses)
 
     return app
@@ -0,0 +1,118 @@
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any
+
+from config import settings
+from logger import logger_config
+
+logger = logger_config(__name__)
+
+
+@dataclass
+class CachedResponse:
+    body: bytes
+    etag: str
+    headers: dict[str, str] = field(default_factory=dict)
+
+
+class LRUCache:
+    """In-process cache of at most `maxsize` entries, each kept `ttl` seconds.
+
+    Clearing the cache starts a new generation: a value computed during the former one,
+    from data read before the change, is not stored."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self.lock = threading.Lock()
+        self._generation = 0
+
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, key: str) -> Any | None:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, generation: int):
+        if self.maxsize <= 0:
+            return
+        with self.lock:
+            if generation != self._generation:
+                return
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self._generation += 1
+
+
+class RedisCache:
+    """Cache shared by the processes of the API and the crawler. The keys are prefixed by a
+    generation number: clearing the cache increments it, and the entries of the former
+    generations expire with their TTL."""
+
+    GENERATION_KEY = "response-cache:generation"
+
+    def __init__(self, url: str, ttl: float):
+        import redis  # type: ignore
+
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+
+    def generation(self) -> int:
+        return int(self.client.get(self.GENERATION_KEY) or 0)
+
+    def get(self, key: str) -> Any | None:
+        value = self.client.get(f"response-cache:{self.generation()}:{key}")
+        return pickle.loads(value) if value is not None else None
+
+    def set(self, key: str, value: Any, generation: int):
+        self.client.set(
+            f"response-cache:{generation}:{key}",
+            pickle.dumps(value),
+            px=int(self.ttl * 1000),
+        )
+
+    def clear(self):
+        self.client.incr(self.GENERATION_KEY)
+
+
+def get_cache_backend() -> LRUCache | RedisCache:
+    """Redis cache if an URL is set in the settings and redis is installed, otherwise the
+    in-process LRU cache"""
+    if settings.RESPONSE_CACHE_REDIS_URL is not None:
+        try:
+            return RedisCache(
+                settings.RESPONSE_CACHE_REDIS_URL, settings.RESPONSE_CACHE_TTL
+            )
+        except ImportError:
+            logger.warning("redis is not installed, using the in-process cache")
+    return LRUCache(settings.RESPONSE_CACHE_SIZE, settings.RESPONSE_CACHE_TTL)
+
+
+response_cache = get_cache_backend()
+
+
+def invalidate_cache():
+    """Drop the cached responses, after a change of the data"""
+    try:
+        response_cache.clear()
+    except Exception as e:
+        logger.error(f"Could not clear the response cache: {e}")
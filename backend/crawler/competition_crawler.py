@@ -1,7 +1,7 @@
 from enum import Enum
 from operator import ge
 from pathlib import Path
-from typing import Optional, Tuple, Any, Dict, Literal
+from typing import Optional, Tuple, Any, Dict, Iterable, Literal
 import yaml  # type: ignore
 import json
 from datetime import datetime, date
@@ -9,14 +9,16 @@ from logger import logger_config
 import re
 
 from urllib.parse import urljoin, urlparse
-import requests  # type: ignore
-from bs4 import BeautifulSoup, ResultSet  # type: ignore
+from bs4 import BeautifulSoup, FeatureNotFound, ResultSet, Tag  # type: ignore
+from functools import cache
 from dateutil.parser import parse as date_parse
 from datetime import date
 
 import pandas as pd  # type: ignore
 
+from config import settings
 from commons.schemas import Competition
+from backend.crawler.fetcher import fetch, fetch_all
 
 log = logger_config(__name__)
 
@@ -27,41 +29,87 @@ def is_valid(url):
     return bool(parsed.netloc) and bool(parsed.scheme)
 
 
-def get_soup(url: str) -> BeautifulSoup | None:
+@cache
+def get_html_parser() -> str:
+    """Get the HTML parser used to build the BeautifulSoup objects. The parser set in the
+    settings (lxml by default) is used if it is installed, otherwise we fall back to Python's
+    built-in html.parser."""
+    try:
+        BeautifulSoup("", settings.CRAWLER_HTML_PARSER)
+        return settings.CRAWLER_HTML_PARSER
+    except FeatureNotFound:
+        log.warning(
+            f"HTML parser {settings.CRAWLER_HTML_PARSER} is not installed, using html.parser"
+        )
+        return "html.parser"
+
+
+def get_soup(
+    url: str, content: bytes | None = None, parser: str | None = None
+) -> BeautifulSoup | None:
     """Get the BeautifulSoup object for an URL
 
     :param url: URL to crawl
     :type url: str
+    :param content: Already fetched content of the page, if any
+    :type content: bytes | None
+    :param parser: HTML parser to use, defaults to the one returned by `get_html_parser`
+    :type parser: str | None
     :return: BeautifulSoup object for the URL
     :rtype: BeautifulSoup | None
     """
-    if not is_valid(url):
-        log.error(f"Invalid URL: {url}")
-        return None
-    resp = requests.get(url)
-    if resp.ok:
-        return BeautifulSoup(resp.content, "html.parser")
-    else:
-        log.error(f"Error {resp.status_code} when trying to crawl {url}")
-        return None
+    if content is None:
+        if not is_valid(url):
+            log.error(f"Invalid URL: {url}")
+            return None
+        content = fetch(url)
+        if content is None:
+            return None
+    return BeautifulSoup(content, parser or get_html_parser())
+
+
+def find_table(soup: BeautifulSoup, header: str) -> Tag | None:
+    """Find the first table of the page whose text starts with the given header
+
+    Only the first cell of each table is looked at, so the text of the whole tables is never
+    built. Leading whitespace of the header is ignored since it depends on the parser (lxml
+    drops some of the blank text nodes kept by html.parser). Layout tables wrapping another
+    table are skipped: their first cell contains a table.
+
+    :param soup: Page to search
+    :type soup: BeautifulSoup
+    :param header: Expected beginning of the table text, e.g. "\\n\\nNo."
+    :type header: str
+    :return: The table, or None if there is no such table in the page
+    :rtype: Tag | None
+    """
+    key = header.strip()
+    for table in soup.find_all("table"):
+        cell = table.find(["th", "td"])
+        if cell is None or cell.find("table") is not None:
+            continue
+        if cell.get_text().strip().startswith(key):
+            return table
+    return None
 
 
-def get_category_entries(url: str) -> Optional[pd.DataFrame]:
+def get_category_entries(
+    url: str, content: bytes | None = None
+) -> Optional[pd.DataFrame]:
     """Get the entries for a given category."""
-    soup = get_soup(url)
+    soup = get_soup(url, content)
     if soup is None:
         return None
 
-    df = pd.DataFrame(
-        columns=["Surname", "First Name", "Full name", "Club", "Nationality"]
-    )
-    table = None
+    columns = {
+        "Surname": [],
+        "First Name": [],
+        "Full name": [],
+        "Club": [],
+        "Nationality": [],
+    }  # type: dict[str, list[str]]
     header = "\n\nNo."
-    tables = soup.find_all("table")
-    while len(tables) > 0 and table is None:
-        t = tables.pop(0)
-        if t.text.startswith(header):
-            table = t
+    table = find_table(soup, header)
 
     if table is None:
         log.warning("Could not find entries table")
@@ -88,30 +136,23 @@ def get_category_entries(url: str) -> Optional[pd.DataFrame]:
         else:
             club = ""
             nationality = cells[2].text.strip()
-        df.loc[len(df.index)] = [  # type: ignore
-            surname,
-            first_name,
-            full_name,
-            club,
-            nationality,
-        ]
-    return df
+        columns["Surname"].append(surname)
+        columns["First Name"].append(first_name)
+        columns["Full name"].append(full_name)
+        columns["Club"].append(club)
+        columns["Nationality"].append(nationality)
+    return pd.DataFrame(columns)
 
 
-def get_category_panel(url: str) -> Optional[dict]:
+def get_category_panel(url: str, content: bytes | None = None) -> Optional[dict]:
     """Get the panel for a given category."""
-    soup = get_soup(url)
+    soup = get_soup(url, content)
     if soup is None:
         return None
 
     res = {}
-    table = None
     header = "\n\nFunction"
-    tables = soup.find_all("table")
-    while len(tables) > 0 and table is None:
-        t = tables.pop(0)
-        if t.text.startswith(header):
-            table = t
+    table = find_table(soup, header)
     if table is None:
         log.warning("Could not find entries table")
         return None
@@ -129,19 +170,22 @@ def get_category_panel(url: str) -> Optional[dict]:
     return res
 
 
-def get_category_results(url: str) -> Optional[pd.DataFrame]:
-    soup = get_soup(url)
+def get_category_results(
+    url: str, content: bytes | None = None
+) -> Optional[pd.DataFrame]:
+    soup = get_soup(url, content)
     if soup is None:
         return None
 
-    df = pd.DataFrame(columns=["FinalRank", "Name", "Club", "Nation", "Score"])
-    table = None
+    columns = {
+        "FinalRank": [],
+        "Name": [],
+        "Club": [],
+        "Nation": [],
+        "Score": [],
+    }  # type: dict[str, list[str]]
     header = "\n\nFPl."
-    tables = soup.find_all("table")
-    while len(tables) > 0 and table is None:
-        t = tables.pop(0)
-        if t.text.startswith(header):
-            table = t
+    table = find_table(soup, header)
 
     if table is None:
         log.warning("Could not find results table")
@@ -156,51 +200,43 @@ def get_category_results(url: str) -> Optional[pd.DataFrame]:
         name = " ".join(
             filter(lambda w: w != "", cells[1].text.strip().split(" "))
         )  # Remove double spaces
-        club = cells[2].text.strip()
-        nation = cells[6].text.strip()
-        if final_rank in ["WD", "DSQ"]:
-            score = 0.0
-        else:
-            score = float(cells[7].text.strip())
-        df.loc[len(df.index)] = [  # type: ignore
-            final_rank,
-            name,
-            club,
-            nation,
-            score,
-        ]
+        columns["FinalRank"].append(final_rank)
+        columns["Name"].append(name)
+        columns["Club"].append(cells[2].text.strip())
+        columns["Nation"].append(cells[6].text.strip())
+        columns["Score"].append(cells[7].text.strip())
+
+    df = pd.DataFrame(columns, dtype=str)
+    df["Score"] = parse_scores(df["Score"], df["FinalRank"])
     return df
 
 
-def get_program_detailed_results(url: str) -> Optional[pd.DataFrame]:
+def get_program_detailed_results(
+    url: str, content: bytes | None = None
+) -> Optional[pd.DataFrame]:
     """Get the detailed results for a given category."""
-    soup = get_soup(url)
+    soup = get_soup(url, content)
     if soup is None:
         return None
 
-    df = pd.DataFrame(
-        columns=[
-            "Rank",
-            "Name",
-            "Club",
-            "Nation",
-            "TSS",
-            "TES",
-            "PCS",
-            "CO",
-            "PR",
-            "SK",
-            "Ded.",
-            "StN.",
-        ]
-    )
-    table = None
+    # Index of the cell of each column in the table rows
+    cell_index = {
+        "Rank": 0,
+        "Name": 1,
+        "Club": 2,
+        "Nation": 3,
+        "TSS": 4,
+        "TES": 5,
+        "PCS": 7,
+        "CO": 8,
+        "PR": 9,
+        "SK": 10,
+        "Ded.": 11,
+        "StN.": 12,
+    }
+    columns = {name: [] for name in cell_index}  # type: dict[str, list[str]]
     header = "\n\n \xa0 Pl."
-    tables = soup.find_all("table")
-    while len(tables) > 0 and table is None:
-        t = tables.pop(0)
-        if t.text.startswith(header):
-            table = t
+    table = find_table(soup, header)
 
     if table is None:
         log.warning("Could not find detailed results table")
@@ -211,49 +247,36 @@ def get_program_detailed_results(url: str) -> Optional[pd.DataFrame]:
         cells = r.find_all("td")
         if len(cells) == 0:
             continue
-        rank = cells[0].text.strip()
-        name = name = " ".join(
-            filter(lambda w: w != "", cells[1].text.strip().split(" "))
+        for column, index in cell_index.items():
+            columns[column].append(cells[index].text.strip())
+        columns["Name"][-1] = " ".join(
+            filter(lambda w: w != "", columns["Name"][-1].split(" "))
         )  # Remove double spaces
-        club = cells[2].text.strip()
-        nation = cells[3].text.strip()
-        if rank in ["WD", "DSQ"]:
-            tss: float = 0.0
-            tes: float = 0.0
-            pcs: float = 0.0
-            co: float = 0.0
-            pr: float = 0.0
-            sk: float = 0.0
-            ded: float = 0.0
-            stn: int = 0
-        else:
-            tss: float = float(cells[4].text.strip())
-            tes: float = float(cells[5].text.strip())
-            pcs: float = float(cells[7].text.strip())
-            co: float = float(cells[8].text.strip())
-            pr: float = float(cells[9].text.strip())
-            sk: float = float(cells[10].text.strip())
-            ded: float = float(cells[11].text.strip())
-        stn: int = int(cells[12].text.strip()[1:])
-        df.loc[len(df.index)] = [
-            rank,
-            name,
-            club,
-            nation,
-            tss,
-            tes,
-            pcs,
-            co,
-            pr,
-            sk,
-            ded,
-            stn,
-        ]
+
+    df = pd.DataFrame(columns, dtype=str)
+    scores = ["TSS", "TES", "PCS", "CO", "PR", "SK", "Ded."]
+    df[scores] = parse_scores(df[scores], df["Rank"])
+    df["StN."] = df["StN."].str[1:].astype(int)
     return df
 
 
-def get_links_table(competition: Competition) -> Optional[Dict[str, Any]]:
-    """Crawl the competition website to get the links to the categories entries and the score cards"""
+def parse_scores(
+    scores: pd.DataFrame | pd.Series, ranks: pd.Series
+) -> pd.DataFrame | pd.Series:
+    """Convert score columns to floats in a single pass. Withdrawn and disqualified
+    skaters don't have scores, theirs are set to 0."""
+    return scores.mask(ranks.isin(["WD", "DSQ"]), "0", axis=0).astype(float)
+
+
+def get_links_table(
+    competition: Competition, prefetch: bool = True
+) -> Optional[Dict[str, Any]]:
+    """Crawl the competition website to get the links to the categories entries and the score cards
+
+    When `prefetch` is set, the entries, results, panel and detailed results pages of every
+    category are fetched concurrently and stored in the "pages" entry of each category, indexed
+    by URL, so that they don't have to be fetched again when the category is created.
+    """
     assert competition.url is not None
     soup = get_soup(competition.url)
     if soup is None:
@@ -261,13 +284,8 @@ def get_links_table(competition: Competition) -> Optional[Dict[str, Any]]:
     log.debug(f"Collecting links...")
 
     links_table = {}  # type: dict[str, Any]
-    table = None
     header = "\n\nCategory"
-    tables = soup.find_all("table")
-    while len(tables) > 0 and table is None:
-        t = tables.pop(0)
-        if t.text.startswith(header):
-            table = t
+    table = find_table(soup, header)
 
     if table is None:
         log.warning("Could not find master table")
@@ -320,9 +338,30 @@ def get_links_table(competition: Competition) -> Optional[Dict[str, Any]]:
     if category is not None:
         links_table[category["name"]] = category
 
+    if prefetch:
+        prefetch_pages(links_table.values())
+
     return links_table
 
 
+def prefetch_pages(categories: Iterable[Dict[str, Any]]):
+    """Fetch concurrently the pages of categories of a links table, and store them in their
+    "pages" entry"""
+    categories = list(categories)
+    log.debug(f"Fetching category pages...")
+    pages = fetch_all(url for cat in categories for url in category_urls(cat))
+    for cat in categories:
+        cat["pages"] = {url: pages[url] for url in category_urls(cat)}
+
+
+def category_urls(category: Dict[str, Any]) -> list[str]:
+    """Get the URLs of the HTML pages of a category (score cards PDFs excluded)"""
+    urls = [category["entries_link"], category["results_link"]]
+    for segment in category["segments"]:
+        urls += [segment["officials_link"], segment["details_link"]]
+    return urls
+
+
 def parse_category_age(
     name: str,
 ) -> str:
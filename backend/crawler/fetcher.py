@@ -0,0 +1,106 @@
+"""Shared HTTP fetch layer used by the competition crawler.
+
+All the pages of a competition live on the same results server, so instead of opening a new
+connection for every page we keep a single pooled session (keep-alive) and fan the requests
+out on a bounded thread pool. A per-host limit keeps us polite with the results servers.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional
+from urllib.parse import urlparse
+
+import requests  # type: ignore
+from requests.adapters import HTTPAdapter  # type: ignore
+
+from backend.crawler import http_cache
+from config import settings
+from logger import logger_config
+
+log = logger_config(__name__)
+
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
+_host_slots: Dict[str, threading.BoundedSemaphore] = {}
+_host_slots_lock = threading.Lock()
+_global_slots = threading.BoundedSemaphore(settings.CRAWLER_MAX_CONNECTIONS)
+
+
+def get_http_session() -> requests.Session:
+    """Get the process-wide HTTP session, creating it on first use."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            adapter = HTTPAdapter(
+                pool_connections=settings.CRAWLER_MAX_CONNECTIONS,
+                pool_maxsize=settings.CRAWLER_MAX_PER_HOST,
+                pool_block=True,
+            )
+            _session = requests.Session()
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+        return _session
+
+
+def _host_slot(url: str) -> threading.BoundedSemaphore:
+    host = urlparse(url).netloc
+    with _host_slots_lock:
+        if host not in _host_slots:
+            _host_slots[host] = threading.BoundedSemaphore(
+                settings.CRAWLER_MAX_PER_HOST
+            )
+        return _host_slots[host]
+
+
+def fetch(url: str) -> Optional[bytes]:
+    """Fetch the content of an URL through the shared session and the on-disk HTTP cache
+
+    Pages of closed seasons are served from the cache without any network call, other pages
+    are revalidated with a conditional GET. In offline mode only the cache is used.
+
+    :param url: URL to fetch
+    :type url: str
+    :return: Body of the response, or None if the page could not be fetched
+    :rtype: bytes | None
+    """
+    cached = http_cache.load(url)
+    if cached is not None and (settings.CRAWLER_OFFLINE or http_cache.is_frozen(url)):
+        return cached.body
+    if settings.CRAWLER_OFFLINE:
+        log.error(f"Page {url} is not in the HTTP cache (offline mode)")
+        return None
+
+    with _global_slots, _host_slot(url):
+        try:
+            resp = get_http_session().get(
+                url,
+                headers=http_cache.conditional_headers(cached),
+                timeout=settings.CRAWLER_TIMEOUT,
+            )
+        except requests.RequestException as e:
+            log.error(f"Error {e!r} when trying to crawl {url}")
+            return None
+    if resp.status_code == 304 and cached is not None:
+        return cached.body
+    if resp.ok:
+        http_cache.store(url, resp.content, resp.headers)
+        return resp.content
+    log.error(f"Error {resp.status_code} when trying to crawl {url}")
+    return None
+
+
+def fetch_all(urls: Iterable[str | None]) -> Dict[str, Optional[bytes]]:
+    """Fetch several URLs concurrently
+
+    :param urls: URLs to fetch, duplicates and None values are ignored
+    :type urls: Iterable[str | None]
+    :return: Body of each page (None if it could not be fetched), indexed by URL
+    :rtype: Dict[str, bytes | None]
+    """
+    unique = list(dict.fromkeys(url for url in urls if url is not None))
+    if len(unique) == 0:
+        return {}
+    workers = min(settings.CRAWLER_MAX_CONNECTIONS, len(unique))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pages = list(pool.map(fetch, unique))
+    return dict(zip(unique, pages))
@@ -0,0 +1,133 @@
+"""Persistent on-disk cache for the pages downloaded by the crawler.
+
+Entries are keyed by URL and store the response headers, ETag and Last-Modified values, while
+bodies are content-addressed (named after their SHA-256) so identical pages are stored once:
+```
+    <CRAWLER_CACHE_DIR>/entries/<sha256(url)>.json
+    <CRAWLER_CACHE_DIR>/bodies/<sha256(body)>
+```
+Results of a closed season never change, so their pages are served from the cache without any
+network call. Pages of the current season are revalidated with conditional GETs.
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+from config import settings
+from logger import logger_config
+
+log = logger_config(__name__)
+
+SEASON_REGEX = re.compile(r"(\d{4})-(\d{4})")
+
+
+@dataclass
+class CachedPage:
+    url: str
+    body: bytes
+    headers: Dict[str, str] = field(default_factory=dict)
+    etag: str | None = None
+    last_modified: str | None = None
+    fetched_at: str | None = None
+
+
+def _cache_dir() -> Optional[Path]:
+    if settings.CRAWLER_CACHE_DIR is None:
+        return None
+    return Path(settings.CRAWLER_CACHE_DIR)
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _write_atomic(path: Path, data: bytes):
+    """Write a file atomically so that concurrent fetches never read a partial file"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    with os.fdopen(fd, "wb") as file:
+        file.write(data)
+    os.replace(tmp, path)
+
+
+def is_frozen(url: str, today: date | None = None) -> bool:
+    """Check whether the page belongs to a closed season, in which case it can't change anymore.
+
+    The season is read from the URL (e.g. ".../Resultats-2022-2023/..."), seasons end on July 1st.
+    """
+    match = SEASON_REGEX.search(url)
+    if match is None:
+        return False
+    today = today or date.today()
+    return today >= date(int(match.group(2)), 7, 1)
+
+
+def load(url: str) -> Optional[CachedPage]:
+    """Load the cached version of an URL, if any"""
+    cache_dir = _cache_dir()
+    if cache_dir is None:
+        return None
+    entry_path = cache_dir / "entries" / f"{_sha256(url.encode())}.json"
+    try:
+        entry = json.loads(entry_path.read_text())
+        body = (cache_dir / "bodies" / entry["body"]).read_bytes()
+    except (OSError, ValueError, KeyError):
+        return None
+    return CachedPage(
+        url=url,
+        body=body,
+        headers=entry.get("headers", {}),
+        etag=entry.get("etag"),
+        last_modified=entry.get("last_modified"),
+        fetched_at=entry.get("fetched_at"),
+    )
+
+
+def store(url: str, body: bytes, headers: Dict[str, str]) -> Optional[CachedPage]:
+    """Store the body and headers of a response in the cache"""
+    cache_dir = _cache_dir()
+    if cache_dir is None:
+        return None
+    page = CachedPage(
+        url=url,
+        body=body,
+        headers=dict(headers),
+        etag=headers.get("ETag"),
+        last_modified=headers.get("Last-Modified"),
+        fetched_at=datetime.now().isoformat(),
+    )
+    body_hash = _sha256(body)
+    body_path = cache_dir / "bodies" / body_hash
+    if not body_path.exists():
+        _write_atomic(body_path, body)
+    entry = {
+        "url": url,
+        "body": body_hash,
+        "headers": page.headers,
+        "etag": page.etag,
+        "last_modified": page.last_modified,
+        "fetched_at": page.fetched_at,
+    }
+    _write_atomic(
+        cache_dir / "entries" / f"{_sha256(url.encode())}.json",
+        json.dumps(entry).encode(),
+    )
+    return page
+
+
+def conditional_headers(page: Optional[CachedPage]) -> Dict[str, str]:
+    """Get the headers turning a GET into a conditional GET against a cached page"""
+    headers = {}
+    if page is not None:
+        if page.etag is not None:
+            headers["If-None-Match"] = page.etag
+        if page.last_modified is not None:
+            headers["If-Modified-Since"] = page.last_modified
+    return headers
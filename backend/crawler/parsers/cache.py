@@ -0,0 +1,90 @@
+import gzip
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List
+
+
+def file_hash(path: Path) -> str:
+    """SHA-256 of the content of a file"""
+    sha = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def write_atomic(path: Path, data: bytes):
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    with os.fdopen(fd, "wb") as file:
+        file.write(data)
+    os.replace(tmp, path)
+
+
+class ParseCache:
+    """
+    On-disk cache of the parsed pages of a PDF, keyed by the content
+    hash of the PDF. Each page is stored in its own gzipped pickle,
+    loaded only when requested:
+    ```
+        <cache_dir>/<sha256 of the PDF>/index.json
+        <cache_dir>/<sha256 of the PDF>/page-0042.pkl.gz
+    ```
+    The index records, for each page, the versions of the parsers
+    that produced it. A page is parsed again only when the version
+    of a parser it went through has changed: changing the score
+    sheet parser doesn't invalidate pages without score sheets.
+    """
+
+    def __init__(self, cache_dir: Path, pdf_path: Path, versions: Dict[str, int]):
+        self.key = file_hash(pdf_path)
+        self.dir = Path(cache_dir) / self.key
+        self.versions = versions
+        try:
+            index = json.loads((self.dir / "index.json").read_text())
+        except (OSError, ValueError):
+            index = {}
+        self.nb_pages: int | None = index.get("nb_pages")
+        self.pages: Dict[str, Dict[str, Any]] = index.get("pages", {})
+
+    def is_valid(self, page: int) -> bool:
+        entry = self.pages.get(str(page))
+        if entry is None or entry["prefilter"] != self.versions["prefilter"]:
+            return False
+        # Pages skipped before the score sheet parser never went through it
+        return entry["parser"] is None or entry["parser"] == self.versions["parser"]
+
+    def missing_pages(self, nb_pages: int) -> List[int]:
+        """Pages that are not cached, or were parsed by another version of the parsers"""
+        return [i for i in range(nb_pages) if not self.is_valid(i)]
+
+    def page_path(self, page: int) -> Path:
+        return self.dir / f"page-{page:04d}.pkl.gz"
+
+    def load(self, page: int) -> Dict[str, Any] | None:
+        if self.pages[str(page)]["parser"] is None:
+            return None
+        return pickle.loads(gzip.decompress(self.page_path(page).read_bytes()))
+
+    def store(self, page: int, raw: Dict[str, Any] | None):
+        """Store the raw parsed data of a page, None for the pages skipped before the score
+        sheet parser"""
+        self.dir.mkdir(parents=True, exist_ok=True)
+        if raw is not None:
+            write_atomic(
+                self.page_path(page),
+                gzip.compress(pickle.dumps(raw, protocol=pickle.HIGHEST_PROTOCOL)),
+            )
+        self.pages[str(page)] = {
+            "prefilter": self.versions["prefilter"],
+            "parser": self.versions["parser"] if raw is not None else None,
+        }
+
+    def save_index(self, nb_pages: int):
+        self.nb_pages = nb_pages
+        self.dir.mkdir(parents=True, exist_ok=True)
+        index = {"nb_pages": nb_pages, "pages": self.pages}
+        write_atomic(self.dir / "index.json", json.dumps(index).encode())
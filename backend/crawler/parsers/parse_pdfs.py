@@ -1,30 +1,104 @@
+import os
 import re
-from typing import Dict, Any
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, asdict
+from typing import Dict, Any, Iterator, List, Tuple
 import pdfplumber  # type: ignore
 import sys
 import numpy as np
 import logging
 from pathlib import Path
 from datetime import date
+from parsers.cache import ParseCache  # type: ignore
 from parsers.common import EmptyResultsException  # type: ignore
 from parsers.standard import parse_page as parse_standard  # type: ignore
+from parsers.standard import PARSER_VERSION  # type: ignore
 
 LOGGER = logging.getLogger()
 
+SCORE_SHEET_TITLE = "JUDGES DETAILS PER SKATER"
+# Part of the page height where the title of the score sheets is looked for
+HEADER_BAND = 0.25
+# To be increased whenever the selection of the score sheet pages
+# changes. Changes of the score sheet parser itself are tracked by
+# its own PARSER_VERSION.
+PREFILTER_VERSION = 1
 
-def parse_page(page, context=None):
+
+@dataclass
+class ParseStats:
+    """Number of pages parsed and skipped, and time spent in each stage (in seconds)"""
+
+    pages: int = 0
+    skipped: int = 0
+    cached: int = 0
+    timings: Dict[str, float] = field(
+        default_factory=lambda: {"prefilter": 0.0, "text": 0.0, "parse": 0.0}
+    )
+
+    def merge(self, other: "ParseStats"):
+        self.pages += other.pages
+        self.skipped += other.skipped
+        self.cached += other.cached
+        for stage, duration in other.timings.items():
+            self.timings[stage] = self.timings.get(stage, 0.0) + duration
+
+
+def is_score_sheet_candidate(page) -> bool:
+    """
+    Cheap pre-filter: looks for the score sheets title in the raw
+    characters of the top band of the page, without any layout
+    analysis. Spaces are ignored since they are not always part of
+    the character stream.
+    """
+    title = SCORE_SHEET_TITLE.replace(" ", "")
+    band = page.height * HEADER_BAND
+    chars = sorted(
+        (c for c in page.chars if c["top"] < band and not c["text"].isspace()),
+        key=lambda c: (round(c["top"]), c["x0"]),
+    )
+    return title in "".join(c["text"] for c in chars)
+
+
+def read_page(page, stats: ParseStats | None = None) -> Dict[str, Any] | None:
     """
     This function takes a page object, checks whether there
     are any score sheets on the page, and the parsed out the
-    structured score data from each score sheet
+    structured score data from each score sheet. It returns the
+    text of the page with the parsed data, before any context is
+    applied (see `apply_context`), or None if the page is skipped
+    before the score sheet parser. Pages the parser finds no
+    performance on have an empty list of parsed data, so that they
+    are parsed again by a new version of the parser.
     """
+    stats = stats if stats is not None else ParseStats()
+    stats.pages += 1
 
     try:
-        text = page.extract_text()
+        # Cover pages, summaries and blank pages are skipped before
+        # the costly text extraction.
+        start = time.perf_counter()
+        try:
+            candidate = is_score_sheet_candidate(page)
+        finally:
+            stats.timings["prefilter"] += time.perf_counter() - start
+        if not candidate:
+            LOGGER.debug(f"Cannot find score sheets on page {page.page_number}")
+            stats.skipped += 1
+            return None
+
+        start = time.perf_counter()
+        try:
+            text = page.extract_text()
+        finally:
+            stats.timings["text"] += time.perf_counter() - start
 
     # If pdfplumber cannot read the page, we note it in the parsing log.
     except Exception:
         LOGGER.warning(f"Cannot read page {page.page_number}")
+        stats.skipped += 1
         return None
 
     # For some pages -- often the graphical cover pages -- pdfplumber
@@ -32,16 +106,19 @@ def parse_page(page, context=None):
     # the parsing log.
     if text is None or len(text) == 0:
         LOGGER.debug(f"Cannot find text on page {page.page_number}")
+        stats.skipped += 1
         return None
 
     # All the score sheets should have "JUDGES DETAILS PER SKATER"
     # on the page. If a page doesn't, we continue to the next page.
-    if "JUDGES DETAILS PER SKATER" not in text:
+    if SCORE_SHEET_TITLE not in text:
         LOGGER.debug(f"Cannot find score sheets on page {page.page_number}")
+        stats.skipped += 1
         return None
 
     parser = parse_standard
 
+    start = time.perf_counter()
     try:
         parsed = parser(page)
 
@@ -50,13 +127,21 @@ def parse_page(page, context=None):
     # check the parsing log to see which these are.
     except EmptyResultsException:
         LOGGER.debug(f"Cannot find performances on page {page.page_number}")
-        return None
+        stats.skipped += 1
+        return {"text": text, "parsed": []}
+    finally:
+        stats.timings["parse"] += time.perf_counter() - start
 
     # If we got this far, we've been able to locate, and parse the
     # score sheets on this page.
+    return {"text": text, "parsed": parsed}
+
 
-    # Here, we extract the competition and program names,
-    # and add them to the parsed data.
+def apply_context(parsed, text: str, context=None):
+    """
+    Here, we extract the competition and program names,
+    and add them to the parsed data.
+    """
     if context is not None:
         header = text.split("\n")
         if header[0] == "JUDGES DETAILS PER SKATER":
@@ -102,7 +187,19 @@ def parse_page(page, context=None):
     return parsed
 
 
-def parse_pdf(pdf, context=None):
+def parse_page(page, context=None, stats: ParseStats | None = None):
+    """
+    This function takes a page object, checks whether there
+    are any score sheets on the page, and the parsed out the
+    structured score data from each score sheet
+    """
+    raw = read_page(page, stats)
+    if raw is None:
+        return None
+    return apply_context(raw["parsed"], raw["text"], context)
+
+
+def parse_pdf(pdf, context=None, stats: ParseStats | None = None):
     """
     This function takes a PDF object, iterates through
     each page, and returns structured data representing for
@@ -110,30 +207,261 @@ def parse_pdf(pdf, context=None):
     """
     performances = []
     for i, page in enumerate(pdf.pages):
-        parsed = parse_page(page, context)
+        parsed = parse_page(page, context, stats)
         if parsed is None:
             continue
         performances += parsed
 
+    fix_nb_entries(performances)
+    return performances
+
+
+def fix_nb_entries(performances):
+    """
+    Sets the number of entries of each performance to the number
+    of performances parsed for the same program.
+    """
+    counts = Counter(
+        p["metadata"]["program"] for p in performances if "program" in p["metadata"]
+    )
     for performance in performances:
-        nb_entries = len(
-            list(
-                filter(
-                    lambda x: x["metadata"]["program"]
-                    == performance["metadata"]["program"],
-                    performances,
-                )
-            )
-        )
-        if nb_entries != performance["metadata"]["nb_entries"]:
-            performance["metadata"]["nb_entries"] = nb_entries
+        if "program" in performance["metadata"]:
+            performance["metadata"]["nb_entries"] = counts[
+                performance["metadata"]["program"]
+            ]
+
 
+def read_page_range(path: Path, pages: List[int]):
+    """
+    Worker of `read_pdf`: opens the PDF itself and reads the
+    given pages.
+    """
+    results = []
+    stats = ParseStats()
+    with pdfplumber.open(path) as pdf:
+        for i in pages:
+            results.append((i, read_page(pdf.pages[i], stats)))
+            pdf.pages[i].close()
+    return results, stats
+
+
+def split_pages(pages: List[int], nb_chunks: int) -> List[List[int]]:
+    """Splits a list of pages into contiguous chunks of similar sizes."""
+    nb_chunks = max(1, min(nb_chunks, len(pages)))
+    bounds = [round(i * len(pages) / nb_chunks) for i in range(nb_chunks + 1)]
+    return [pages[bounds[i] : bounds[i + 1]] for i in range(nb_chunks)]
+
+
+def count_pages(path: Path) -> int:
+    with pdfplumber.open(path) as pdf:
+        return len(pdf.pages)
+
+
+def read_pdf(
+    path: Path,
+    workers: int | None = 1,
+    stats: ParseStats | None = None,
+    pages: List[int] | None = None,
+) -> Iterator[Tuple[int, Dict[str, Any] | None]]:
+    """
+    Reads the given pages of the PDF (all of them by default) and
+    yields the index and the raw parsed data of each page, in page
+    order. With more than one worker, the pages are split into
+    chunks read by a pool of processes, each one opening the PDF
+    itself. `workers=None` uses one process per CPU.
+    """
+    if workers is not None and workers <= 1:
+        with pdfplumber.open(path) as pdf:
+            for i in pages if pages is not None else range(len(pdf.pages)):
+                raw = read_page(pdf.pages[i], stats)
+                # Releases the objects cached by pdfplumber for the page
+                pdf.pages[i].close()
+                yield i, raw
+        return
+
+    workers = workers or os.cpu_count() or 1
+    pages = pages if pages is not None else list(range(count_pages(path)))
+    if len(pages) == 0:
+        return
+    # Several chunks per worker so that a slow chunk doesn't hold the others
+    chunks = split_pages(pages, workers * 4)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Only a few chunks are submitted ahead of the one being
+        # consumed, so that results don't pile up in memory.
+        pending: deque = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(read_page_range, path, chunk))
+            if len(pending) < 2 * workers:
+                continue
+            results, chunk_stats = pending.popleft().result()
+            if stats is not None:
+                stats.merge(chunk_stats)
+            yield from results
+        while pending:
+            results, chunk_stats = pending.popleft().result()
+            if stats is not None:
+                stats.merge(chunk_stats)
+            yield from results
+
+
+def read_pdf_cached(
+    path: Path,
+    cache: ParseCache,
+    workers: int | None = 1,
+    stats: ParseStats | None = None,
+) -> Iterator[Tuple[int, Dict[str, Any] | None]]:
+    """
+    Same as `read_pdf`, but pages already parsed by the current
+    version of the parsers are loaded from the cache. Only the other
+    pages are read from the PDF, and their results are stored in
+    the cache.
+    """
+    nb_pages = cache.nb_pages if cache.nb_pages is not None else count_pages(path)
+    missing = set(cache.missing_pages(nb_pages))
+    read = read_pdf(path, workers, stats, sorted(missing)) if missing else None
+    try:
+        for i in range(nb_pages):
+            if read is not None and i in missing:
+                j, raw = next(read)
+                assert i == j
+                cache.store(i, raw)
+            else:
+                raw = cache.load(i)
+                if stats is not None:
+                    stats.pages += 1
+                    stats.cached += 1
+            yield i, raw
+    finally:
+        if read is not None:
+            read.close()
+            cache.save_index(nb_pages)
+
+
+def parse_pdf_parallel(
+    path: Path,
+    context=None,
+    workers: int | None = None,
+    stats: ParseStats | None = None,
+):
+    """
+    Parallel version of `parse_pdf`: the pages are split into ranges
+    parsed by a pool of processes, each one opening the PDF itself.
+    Results are merged in page order, so the output is the same as
+    the serial version.
+    """
+    return parse_raw_pages(read_pdf(path, workers or None, stats), context)
+
+
+def parse_raw_pages(raw_pages, context=None):
+    performances = []
+    for _, raw in raw_pages:
+        if raw is None:
+            continue
+        performances += apply_context(raw["parsed"], raw["text"], context)
+
+    fix_nb_entries(performances)
     return performances
 
 
-def parse_pdf_from_path(path: Path, context=None) -> Dict[str, Any]:
+def iter_raw_pages(raw_pages, context=None) -> Iterator[Dict[str, Any]]:
+    """
+    Streaming version of `parse_raw_pages`. The score sheets of a
+    program are on consecutive pages, so the performances of a
+    program are yielded as soon as the next program starts, with
+    their number of entries set to the size of the program. Only
+    one program is held in memory at a time.
+    """
+    program = []  # type: list[Dict[str, Any]]
+    current = None
+    for _, raw in raw_pages:
+        if raw is None:
+            continue
+        for performance in apply_context(raw["parsed"], raw["text"], context):
+            name = performance["metadata"].get("program")
+            if len(program) > 0 and name != current:
+                fix_nb_entries(program)
+                yield from program
+                program = []
+            current = name
+            program.append(performance)
+    fix_nb_entries(program)
+    yield from program
+
+
+def iter_pdf(pdf, context=None, stats: ParseStats | None = None):
+    """
+    Streaming version of `parse_pdf`: yields the performances
+    while the pages of the PDF object are parsed.
+    """
+
+    def raw_pages():
+        for i, page in enumerate(pdf.pages):
+            raw = read_page(page, stats)
+            page.close()
+            yield i, raw
+
+    return iter_raw_pages(raw_pages(), context)
+
+
+def iter_pdf_from_path(
+    path: Path,
+    context=None,
+    workers: int | None = 1,
+    cache_dir: Path | None = None,
+    stats: ParseStats | None = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Streaming version of `parse_pdf_from_path`: yields the
+    performances program by program while the PDF is parsed, so
+    that they can be stored while parsing goes on. Exceptions are
+    raised to the caller.
+    """
+    return iter_raw_pages(read_pdf_from_path(path, workers, cache_dir, stats), context)
+
+
+def read_pdf_from_path(
+    path: Path,
+    workers: int | None = 1,
+    cache_dir: Path | None = None,
+    stats: ParseStats | None = None,
+):
+    """Reads the raw pages of a PDF, through the cache if a directory is given"""
+    if cache_dir is None:
+        return read_pdf(path, workers, stats)
+    cache = ParseCache(
+        cache_dir,
+        path,
+        {"prefilter": PREFILTER_VERSION, "parser": PARSER_VERSION},
+    )
+    return read_pdf_cached(path, cache, workers, stats)
+
+
+def parse_pdf_from_path(
+    path: Path,
+    context=None,
+    workers: int | None = 1,
+    cache_dir: Path | None = None,
+) -> Dict[str, Any]:
+    """
+    Parses the PDF at the given path. With more than one worker,
+    the pages are parsed in parallel by a pool of processes (see
+    `read_pdf`), `workers=None` uses one per CPU.
+
+    When a cache directory is given, the parsed pages are cached
+    there, keyed by the content hash of the PDF and the version of
+    the parsers (see `ParseCache`): an unchanged PDF is not opened
+    again.
+    """
+    stats = ParseStats()
     try:
-        with pdfplumber.open(path) as pdf:
-            return {"performances": parse_pdf(pdf, context), "pdf": path.name}
+        performances = parse_raw_pages(
+            read_pdf_from_path(path, workers, cache_dir, stats), context
+        )
+        LOGGER.info(
+            f"{path.name}: {stats.pages} pages, {stats.skipped} skipped, "
+            + f"{stats.cached} from cache, "
+            + ", ".join(f"{k} {v:.2f}s" for k, v in stats.timings.items())
+        )
+        return {"performances": performances, "pdf": path.name, "stats": asdict(stats)}
     except Exception as e:
         return {"exception": e.__repr__(), "pdf": path.name}
@@ -1,11 +1,16 @@
-from typing import Tuple, Union, Optional, List, Any
+from dataclasses import dataclass
+from typing import Tuple, Union, Optional, List, Any, Dict
 import pdfplumber
-from pdfplumber.page import Page
+from pdfplumber.page import Page, CroppedPage
 import pandas as pd  # type: ignore
 import numpy as np
 from pydantic import AnyHttpUrl
 from parsers.common import EmptyResultsException, dictify, snake_case  # type: ignore
 
+# To be increased whenever a change of this parser changes its output,
+# so that the cached results of the previous version are parsed again.
+PARSER_VERSION = 1
+
 
 def parse_upper_table(
     page: Page,
@@ -60,7 +65,36 @@ def parse_upper_table(
     return series
 
 
-def parse_upper_rect(page: Page, bbox: Tuple[int]):
+@dataclass
+class Block:
+    """A part of a score sheet, with its words extracted once and indexed by text so that
+    the sub-parsers can locate their headers without scanning the words again."""
+
+    bbox: Tuple
+    cropped: CroppedPage
+    words: List[dict]
+    headers: Dict[str, dict]
+
+    def header(self, text: str) -> dict:
+        """First word of the block with the given text"""
+        return self.headers[text]
+
+    def chars_in(self, bbox: Tuple) -> List[dict]:
+        """Characters of the block within the bbox, clipped like `page.crop(bbox).chars`"""
+        return pdfplumber.utils.crop_to_bbox(self.cropped.chars, bbox)
+
+
+def extract_block(page: Page, bbox: Tuple) -> Block:
+    """Crops the page to the bbox and extracts its words once"""
+    cropped = page.crop(bbox)
+    words = cropped.extract_words()
+    headers: Dict[str, dict] = {}
+    for w in words:
+        headers.setdefault(w["text"], w)
+    return Block(bbox=bbox, cropped=cropped, words=words, headers=headers)
+
+
+def parse_upper_rect(page: Page, bbox: Tuple[int], block: Block | None = None):
     header_words = [
         "Rank",
         "Name",
@@ -71,21 +105,17 @@ def parse_upper_rect(page: Page, bbox: Tuple[int]):
         "Program",
         "Deductions",
     ]
-    cropped = page.crop(bbox)
-    words = cropped.extract_words()
+    block = block or extract_block(page, bbox)
     v_lines = (
         [bbox[0]]
-        + [
-            [w for w in words if w["text"] == header][0]["x0"] - 5
-            for header in header_words[1:]
-        ]
+        + [block.header(header)["x0"] - 5 for header in header_words[1:]]
         + [bbox[2]]
     )
     h_lines = [
-        [w for w in words if w["text"] == "Score"][0]["bottom"] + 1,
+        block.header("Score")["bottom"] + 1,
         bbox[3],
     ]
-    rows: List[List[Any]] | None = cropped.extract_table(
+    rows: List[List[Any]] | None = block.cropped.extract_table(
         {
             "explicit_vertical_lines": v_lines,
             "explicit_horizontal_lines": h_lines,
@@ -131,7 +161,7 @@ def parse_upper_rect(page: Page, bbox: Tuple[int]):
     return series
 
 
-def parse_elements(page: Page, bbox: Tuple[int]):
+def parse_elements(page: Page, bbox: Tuple[int], block: Block | None = None):
     header_words = [
         "#",
         "Executed",
@@ -150,21 +180,15 @@ def parse_elements(page: Page, bbox: Tuple[int]):
         "Ref.",
         "Scores",
     ]
-    cropped = page.crop(bbox)
-    words = cropped.extract_words()
-    internal_v_lines = [
-        [w for w in words if w["text"] == header][0]["x0"] - 8
-        for header in header_words[1:]
-    ]
+    block = block or extract_block(page, bbox)
+    internal_v_lines = [block.header(header)["x0"] - 8 for header in header_words[1:]]
     v_lines = [bbox[0]] + internal_v_lines + [bbox[2]]
     # Adding column for the highlights
     v_lines = v_lines[:4] + [v_lines[4] - 20] + v_lines[4:]
-    h_start = [w for w in words if w["text"] == "Elements"][0]["bottom"] + 4
-    h_end = [w for w in words if w["text"] == "Components"][0]["top"] - 1
-    center = cropped.crop((bbox[0], h_start, bbox[2], h_end))
-    tops = [
-        x[0]["top"] for x in pdfplumber.utils.cluster_objects(center.chars, "top", 0)
-    ]
+    h_start = block.header("Elements")["bottom"] + 4
+    h_end = block.header("Components")["top"] - 1
+    center = block.chars_in((bbox[0], h_start, bbox[2], h_end))
+    tops = [x[0]["top"] for x in pdfplumber.utils.cluster_objects(center, "top", 0)]
     h_lines = tops + [h_end]
 
     table_settings = {
@@ -228,7 +252,7 @@ def parse_elements(page: Page, bbox: Tuple[int]):
     return df, (panel_score - element_sum).round()
 
 
-def parse_program_components(page: Page, bbox: Tuple[int]):
+def parse_program_components(page: Page, bbox: Tuple[int], block: Block | None = None):
     header_words = [
         "Program",
         "Factor",
@@ -244,21 +268,15 @@ def parse_program_components(page: Page, bbox: Tuple[int]):
         "Ref.",
         "Scores",
     ]
-    cropped = page.crop(bbox)
-    words = cropped.extract_words()
+    block = block or extract_block(page, bbox)
     v_lines = (
         [bbox[0]]
-        + [
-            [w for w in words if w["text"] == header][0]["x0"] - 8
-            for header in header_words[1:]
-        ]
+        + [block.header(header)["x0"] - 8 for header in header_words[1:]]
         + [bbox[2]]
     )
-    h_start = [w for w in words if w["text"] == "Program"][0]["bottom"] + 1
-    center = cropped.crop((bbox[0], h_start, bbox[2], bbox[3]))
-    tops = [
-        x[0]["top"] for x in pdfplumber.utils.cluster_objects(center.chars, "top", 0)
-    ]
+    h_start = block.header("Program")["bottom"] + 1
+    center = block.chars_in((bbox[0], h_start, bbox[2], bbox[3]))
+    tops = [x[0]["top"] for x in pdfplumber.utils.cluster_objects(center, "top", 0)]
     h_lines = tops + [bbox[3]]
 
     table_settings = {
@@ -329,12 +347,15 @@ def parse_page(page: Page):
     for t in tables:
         assert len(t.rows) == 3
         # metadata = parse_upper_rect(page, rects[i * 3]).to_dict()
-        metadata = parse_upper_rect(page, t.rows[0].bbox).to_dict()
-        elements, bonifications = parse_elements(page, t.rows[1].bbox)
+        # Words are extracted once per block and shared by the sub-parsers
+        upper = extract_block(page, t.rows[0].bbox)
+        details = extract_block(page, t.rows[1].bbox)
+        metadata = parse_upper_rect(page, upper.bbox, upper).to_dict()
+        elements, bonifications = parse_elements(page, details.bbox, details)
         if bonifications != 0:
             pass
         metadata["bonifications"] = bonifications
-        components = parse_program_components(page, t.rows[1].bbox)
+        components = parse_program_components(page, details.bbox, details)
         results.append(
             {
                 "metadata": metadata,
@@ -1,13 +1,20 @@
+import hashlib
 from calendar import c
+from typing import Any, Sequence
 from unicodedata import category
 from venv import logger
 from fastapi import Depends, HTTPException, status
 from numpy import full
+
+from sqlalchemy import delete, insert
+from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy.orm.interfaces import ORMOption
 from sqlmodel import Session, select, col
 from sqlmodel.sql.expression import SelectOfScalar
-from sqlalchemy import func as F
 
+from backend.cache import invalidate_cache
 from backend.database import get_session
+from backend.crud.pagination import paginate
 from backend.crawler.competition_crawler import (
     get_category_results,
     get_program_detailed_results,
@@ -17,8 +24,10 @@ from backend.crawler.competition_crawler import (
     parse_category_genre,
     parse_category_level,
 )
-from backend.crud.skater import find_or_create_skater
-from backend.crud.club import find_or_create_club
+from backend.crud.crawl_job import CrawlJobs
+from backend.crud.identity_map import IdentityMap
+from backend.crud.skater import find_skater_ids
+from backend.crud.summary import category_skaters, summarize_category, summarize_skaters
 
 from commons.schemas import *
 
@@ -26,24 +35,60 @@ from logger import logger_config
 
 logger = logger_config(__name__)
 
+# Relationships serialized by the read models, loaded with the categories instead of
+# lazily during the serialization of each of them
+CATEGORY_READ_OPTIONS = (
+    selectinload(Category.sp_panel),
+    selectinload(Category.fs_panel),
+)
+CATEGORY_READ_WITH_COMPETITION_OPTIONS = (
+    joinedload(Category.competition),
+    *CATEGORY_READ_OPTIONS,
+)
+
+
+def reload_category(category: Category, db: Session = Depends(get_session)) -> Category:
+    """Reload a committed category with the panels serialized by CategoryRead, so that the
+    response is not lazy loaded outside of the threadpool"""
+    reloaded = db.get(
+        Category, category.id, options=CATEGORY_READ_OPTIONS, populate_existing=True
+    )
+    assert reloaded is not None
+    return reloaded
+
 
 def create_category(category: CategoryCreate, db: Session = Depends(get_session)):
     category_to_db = Category.model_validate(category)
     db.add(category_to_db)
     db.commit()
-    db.refresh(category_to_db)
-    return category_to_db
+    invalidate_cache()
+    return reload_category(category_to_db, db)
 
 
 def read_categories(
-    offset: int = 0, limit: int = 20, db: Session = Depends(get_session)
+    offset: int = 0,
+    limit: int = 20,
+    after: int | None = None,
+    db: Session = Depends(get_session),
 ):
-    categories = db.exec(select(Category).offset(offset).limit(limit)).all()
+    categories = db.exec(
+        paginate(
+            select(Category).options(*CATEGORY_READ_OPTIONS),
+            Category.id,
+            offset,
+            limit,
+            after,
+        )
+    ).all()
     return categories
 
 
-def read_category(category_id: int, db: Session = Depends(get_session)):
-    category = db.get(Category, category_id)
+def read_category(
+    category_id: int,
+    db: Session = Depends(get_session),
+    options: Sequence[ORMOption] = CATEGORY_READ_WITH_COMPETITION_OPTIONS,
+):
+    category = db.get(Category, category_id, options=options)
     if not category:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -66,8 +111,8 @@ def update_category(
     category_to_update.sqlmodel_update(category_data)
     db.add(category_to_update)
     db.commit()
-    db.refresh(category_to_update)
-    return category_to_update
+    invalidate_cache()
+    return reload_category(category_to_update, db)
 
 
 def delete_category(category_id: int, db: Session = Depends(get_session)):
@@ -80,6 +125,7 @@ def delete_category(category_id: int, db: Session = Depends(get_session)):
 
     db.delete(category)
     db.commit()
+    invalidate_cache()
 
 
 def find_or_create_category(
@@ -94,16 +140,12 @@ def find_or_create_category(
         return create_category(category, db)
 
 
-def create_category_from_crawler(
-    crawled: dict, competition: Competition, db: Session = Depends(get_session)
-) -> Category:
-    assert competition.id is not None
+def read_segments(crawled: dict) -> dict[str, dict[str, str | None]]:
+    """Links of the short program and free skating segments of a category of the links table"""
     segment = {
-        "SP": {"details": None, "scores": None, "panel": {"URL": None, "dict": {}}},
-        "FS": {"details": None, "scores": None, "panel": {}},
-    }
-    sp_panel_url = None
-    fs_panel_url = None
+        seg: {"details": None, "scores": None, "officials": None}
+        for seg in ["SP", "FS"]
+    }  # type: dict[str, dict[str, str | None]]
     for seg in crawled["segments"]:
         if seg["name"].lower() == "short program":
             seg_name = "SP"
@@ -113,240 +155,520 @@ def create_category_from_crawler(
             logger.warning(f"Unknown segment {seg['name']}")
             continue
         segment[seg_name]["details"] = seg["details_link"]
-        segment[seg_name]["scores"] = seg["scores_link"]
-        segment[seg_name]["panel"]["URL"] = seg["officials_link"]
-        segment[seg_name]["panel"]["dict"] = get_category_panel(
-            segment[seg_name]["panel"]["URL"]
-        )
+        segment[seg_name]["scores"] = seg.get("scores_link")
+        segment[seg_name]["officials"] = seg["officials_link"]
+    return segment
+
+
+def category_links(crawled: dict, segment: dict[str, dict[str, str | None]]) -> dict:
+    """Links columns of a category"""
+    return {
+        "entries_url": crawled["entries_link"],
+        "results_url": crawled["results_link"],
+        "sp_detailed_results_url": segment["SP"]["details"],
+        "sp_panel_url": segment["SP"]["officials"],
+        "sp_judge_scores": segment["SP"]["scores"],
+        "fs_detailed_results_url": segment["FS"]["details"],
+        "fs_panel_url": segment["FS"]["officials"],
+        "fs_judge_scores": segment["FS"]["scores"],
+    }
+
+
+def build_panel(officials: dict | None) -> Panel:
+    """Panel of a segment from the officials of its panel page"""
+    panel = Panel()
+    first_tech_spec = True
+    for oa_func, oa in (officials or {}).items():
+        match oa_func:
+            case "Referee":
+                panel.referee = oa["name"]
+            case "Technical Controller":
+                panel.technical_controller = oa["name"]
+            case "Technical Specialist":
+                if first_tech_spec:
+                    panel.technical_specialist_1 = oa["name"]
+                    first_tech_spec = False
+                else:
+                    panel.technical_specialist_2 = oa["name"]
+            case "Data Operator":
+                panel.data_operator = oa["name"]
+            case "Replay Operator":
+                panel.replay_operator = oa["name"]
+            case j if j.startswith("Judge"):
+                nb = int(j[-1])
+                setattr(panel, f"judge_{nb}", oa["name"])
+    return panel
+
+
+def create_category_from_crawler(
+    crawled: dict,
+    competition: Competition,
+    db: Session = Depends(get_session),
+    identity_map: IdentityMap | None = None,
+    jobs: CrawlJobs | None = None,
+) -> Category:
+    """Create a category, its panels, entries, performances and programs from a category of
+    the links table of the crawler, in a single transaction. The crawl `jobs` of the category
+    and of its segments are committed with it.
+
+    Raises ValueError when the entries or the results of the category cannot be read, so
+    that the category is rolled back and its job recorded as failed by the caller."""
+    assert competition.id is not None
+    identity_map = identity_map or IdentityMap(db)
+    pages = crawled.get("pages", {})
+    segment = read_segments(crawled)
     category_to_db = Category(
         competition=competition,
         competition_id=competition.id,
         genre=parse_category_genre(crawled["name"]),
         level=parse_category_level(crawled["name"]),
         age=parse_category_age(crawled["name"]),
-        entries_url=crawled["entries_link"],
-        results_url=crawled["results_link"],
-        sp_detailed_results_url=segment["SP"]["details"],
-        sp_panel_url=segment["SP"]["panel"]["URL"],
-        sp_judge_scores=segment["SP"]["scores"],
-        fs_detailed_results_url=segment["FS"]["details"],
-        fs_panel_url=segment["FS"]["panel"]["URL"],
-        fs_judge_scores=segment["FS"]["scores"],
+        **category_links(crawled, segment),
     )
 
     ## Panels
     ############################
-
-    for segment_obj in segment.values():
-        if segment_obj["panel"]["URL"] is None:
-            continue
-        segment_obj["panel"]["obj"] = Panel()
-        first_tech_spec = True
-        for oa_func, oa in segment_obj["panel"]["dict"].items():
-            match oa_func:
-                case "Referee":
-                    segment_obj["panel"]["obj"].referee = oa["name"]
-                case "Technical Controller":
-                    segment_obj["panel"]["obj"].technical_controller = oa["name"]
-                case "Technical Specialist":
-                    if first_tech_spec:
-                        segment_obj["panel"]["obj"].technical_specialist_1 = oa["name"]
-                        first_tech_spec = False
-                    else:
-                        segment_obj["panel"]["obj"].technical_specialist_2 = oa["name"]
-                case "Data Operator":
-                    segment_obj["panel"]["obj"].data_operator = oa["name"]
-                case "Replay Operator":
-                    segment_obj["panel"]["obj"].replay_operator = oa["name"]
-                case j if j.startswith("Judge"):
-                    nb = int(j[-1])
-                    setattr(segment_obj["panel"]["obj"], f"judge_{nb}", oa["name"])
-
-    if segment["SP"]["panel"]["URL"] is not None:
-        category_to_db.sp_panel = segment["SP"]["panel"]["obj"]
-    if segment["FS"]["panel"]["URL"] is not None:
-        category_to_db.fs_panel = segment["FS"]["panel"]["obj"]
+    if segment["SP"]["officials"] is not None:
+        category_to_db.sp_panel = build_panel(
+            get_category_panel(
+                segment["SP"]["officials"], pages.get(segment["SP"]["officials"])
+            )
+        )
+    if segment["FS"]["officials"] is not None:
+        category_to_db.fs_panel = build_panel(
+            get_category_panel(
+                segment["FS"]["officials"], pages.get(segment["FS"]["officials"])
+            )
+        )
+    db.add(category_to_db)
 
     ## Entries
     ############################
-    df_entry = get_category_entries(crawled["entries_link"])
+    df_entry = get_category_entries(
+        crawled["entries_link"], pages.get(crawled["entries_link"])
+    )
     if df_entry is None:
-        logger.warning(f"Could not get entries for {crawled['name']}")
-    else:
-        entries = []
-        for _, entry in df_entry.iterrows():
-            club_db = find_or_create_club(
-                query=select(Club).where(Club.abbrev == entry["Club"]),
-                club=ClubCreate(abbrev=entry.Club),
-                db=db,
-            )
+        raise ValueError(f"Could not get entries for {crawled['name']}")
+    skater_ids = identity_map.resolve_entries(df_entry, category_to_db.genre)
+    entries = list(dict.fromkeys(skater_ids))
+
+    db.flush()
+    db.add_all(
+        [
+            Inscription(skater_id=skater_id, category_id=category_to_db.id)
+            for skater_id in entries
+        ]
+    )
 
-            entries.append(
-                find_or_create_skater(
-                    query=select(Skater).where(
-                        Skater.first_name == entry["First Name"],
-                        Skater.last_name == entry["Surname"],
-                        Skater.club_id == club_db.id,
-                    ),
-                    skater=SkaterCreate(
-                        first_name=entry["First Name"],
-                        last_name=entry["Surname"],
-                        genre=category_to_db.genre,
-                        club_id=club_db.id,
-                        nation=entry["Nationality"],
-                    ),
-                    db=db,
-                )
-            )
-            category_to_db.entries = entries
+    ## Performances
+    ############################
+    # Performances and programs are bulk inserted in the transaction of the category,
+    # programs are linked to the ids returned for the performances
+    performance_ids = {}  # type: dict[int, int]
+    performances = read_performances_values(
+        category_to_db, pages.get(category_to_db.results_url), db
+    )
+    if performances is None:
+        raise ValueError(f"Could not get results for {crawled['name']}")
+    if len(performances) > 0:
+        for performance_id, skater_id in db.execute(
+            insert(Performance).returning(
+                Performance.id,
+                Performance.skater_id,
+                sort_by_parameter_order=True,
+            ),
+            performances,
+        ):
+            performance_ids.setdefault(skater_id, performance_id)
 
-    db.add(category_to_db)
+    ## Programs
+    ############################
+    for seg, segment_obj in segment.items():
+        if segment_obj["details"] is None:
+            continue
+        if create_programs_from_crawler(
+            category_to_db, seg, pages.get(segment_obj["details"]), performance_ids, db
+        ):
+            status = CrawlStatus.DONE
+        else:
+            logger.warning(
+                f"Could not get detailed results for {seg} of {crawled['name']}"
+            )
+            status = CrawlStatus.FAILED
+        if jobs is not None:
+            jobs.set(status, crawled["name"], seg, category_to_db.id)
+
+    if jobs is not None:
+        jobs.set(
+            CrawlStatus.DONE,
+            crawled["name"],
+            category_id=category_to_db.id,
+            page_hashes=page_hashes(pages),
+        )
+    summarize_category(category_to_db.id, db)
     db.commit()
     db.refresh(category_to_db)
+    return category_to_db
+
+
+def refresh_category_from_crawler(
+    crawled: dict,
+    category: Category,
+    jobs: CrawlJobs,
+    db: Session = Depends(get_session),
+    identity_map: IdentityMap | None = None,
+) -> bool:
+    """Update an already crawled category from freshly fetched pages of the links table.
+
+    Only the pages whose content hash differs from the one stored in the crawl job of the
+    category are parsed, and only the rows that differ from the stored ones are updated,
+    inserted or deleted, in a single transaction. Returns whether the category changed.
+    """
+    assert category.id is not None
+    identity_map = identity_map or IdentityMap(db)
+    pages = crawled.get("pages", {})
+    job = jobs.get(crawled["name"])
+    stored_hashes = (job.page_hashes if job is not None else None) or {}
+    hashes = page_hashes(pages)
+    changed = {url for url, h in hashes.items() if stored_hashes.get(url) != h}
+    failed = set()  # type: set[str]
+    errors = []  # type: list[str]
+    segment = read_segments(crawled)
+    links = category_links(crawled, segment)
+    links_changed = any(getattr(category, k) != v for k, v in links.items())
+    if len(changed) == 0 and not links_changed:
+        return False
+    _, previous_skaters = category_skaters(category.id, db)
+    category.sqlmodel_update(links)
+    db.add(category)
+
+    ## Panels
+    ############################
+    # The panels of both segments are only linked to the category: they are replaced
+    # together when one of them differs
+    officials = [segment[seg]["officials"] for seg in ["SP", "FS"]]
+    if links_changed or any(url in changed for url in officials):
+        panels = [
+            build_panel(get_category_panel(url, pages.get(url)))
+            for url in officials
+            if url is not None
+        ]
+        stored_panels = db.exec(
+            select(Panel).where(Panel.category_id == category.id).order_by(Panel.id)
+        ).all()
+
+        def panel_values(panel: Panel) -> dict:
+            return panel.model_dump(exclude={"id", "category_id"})
+
+        if sorted(map(str, map(panel_values, panels))) != sorted(
+            map(str, map(panel_values, stored_panels))
+        ):
+            for panel in stored_panels:
+                db.delete(panel)
+            for panel in panels:
+                panel.category_id = category.id
+            db.add_all(panels)
+
+    ## Entries
+    ############################
+    if category.entries_url in changed:
+        df_entry = get_category_entries(
+            category.entries_url, pages.get(category.entries_url)
+        )
+        if df_entry is None:
+            logger.warning(f"Could not get entries for {crawled['name']}")
+            failed.add(category.entries_url)
+            errors.append(f"Could not get entries for {crawled['name']}")
+        else:
+            entries = set(identity_map.resolve_entries(df_entry, category.genre))
+            stored_entries = set(
+                db.exec(
+                    select(Inscription.skater_id).where(
+                        Inscription.category_id == category.id
+                    )
+                )
+            )
+            db.add_all(
+                [
+                    Inscription(skater_id=skater_id, category_id=category.id)
+                    for skater_id in entries - stored_entries
+                ]
+            )
+            removed = stored_entries - entries
+            if len(removed) > 0:
+                db.execute(
+                    delete(Inscription)
+                    .where(col(Inscription.category_id) == category.id)
+                    .where(col(Inscription.skater_id).in_(removed))
+                )
 
     ## Performances
     ############################
-    if category_to_db.results_url is not None:
-        df_perfs = get_category_results(category_to_db.results_url)
-        if df_perfs is None:
+    stored_performances = {}  # type: dict[int, Performance]
+    for performance in db.exec(
+        select(Performance)
+        .where(Performance.category_id == category.id)
+        .order_by(Performance.id)
+    ):
+        assert performance.skater_id is not None
+        stored_performances.setdefault(performance.skater_id, performance)
+    performance_ids = {
+        skater_id: performance.id
+        for skater_id, performance in stored_performances.items()
+        if performance.id is not None
+    }
+    results_changed = links_changed or category.results_url in changed
+    if results_changed:
+        performances = read_performances_values(
+            category, pages.get(category.results_url), db
+        )
+        if performances is None:
             logger.warning(f"Could not get results for {crawled['name']}")
+            if category.results_url is not None:
+                failed.add(category.results_url)
+            errors.append(f"Could not get results for {crawled['name']}")
         else:
-            performances = []
-            nb_valid_entries = len(df_perfs.query("FinalRank not in ['WD', 'DSQ']"))
-            for _, perf in df_perfs.iterrows():
-                skater = db.exec(
-                    select(Skater)
-                    .where(
-                        F.concat(Skater.first_name, " ", Skater.last_name)
-                        == perf["Name"]
-                    )
-                    .where(
-                        col(Skater.club_id).in_(
-                            select(Club.id).where(Club.abbrev == perf["Club"])
-                        )
-                    )
-                ).first()
-                if skater is None:
-                    logger.warning(
-                        f"Could not find skater {perf['Name']} in the database"
-                    )
-                    continue
-                valid_perf = perf["FinalRank"] not in ["WD", "DSQ"]
-                if valid_perf:
-                    performances.append(
-                        Performance(
-                            skater_id=skater.id,
-                            skater=skater,
-                            category_id=category_to_db.id,
-                            category=category_to_db,
-                            withdrawn=perf["FinalRank"] == "WD",
-                            disqualified=perf["FinalRank"] == "DSQ",
-                            rank=perf["FinalRank"],
-                            score=perf["Score"],
-                            total_entries=nb_valid_entries,
-                        )
-                    )
-                else:
-                    performances.append(
-                        Performance(
-                            skater_id=skater.id,
-                            skater=skater,
-                            category_id=category_to_db.id,
-                            category=category_to_db,
-                            withdrawn=perf["FinalRank"] == "WD",
-                            disqualified=perf["FinalRank"] == "DSQ",
-                            rank=None,
-                            score=None,
-                            total_entries=nb_valid_entries,
-                        )
-                    )
-            db.add_all(performances)
-            db.commit()
+            values = {}  # type: dict[int, dict]
+            for performance in performances:
+                values.setdefault(performance["skater_id"], performance)
+            removed_ids = [
+                performance.id
+                for skater_id, performance in stored_performances.items()
+                if skater_id not in values
+            ]
+            if len(removed_ids) > 0:
+                db.execute(
+                    delete(Program).where(col(Program.performance_id).in_(removed_ids))
+                )
+            performance_ids = sync_rows(Performance, stored_performances, values, db)
 
     ## Programs
     ############################
-    programs = []
-    performances = []
-    for seg, segment_obj in segment.items():
-        if segment_obj["details"] is None:
+    for seg in ["SP", "FS"]:
+        details_url = segment[seg]["details"]
+        if details_url is None or (details_url not in changed and not results_changed):
             continue
-        df_progs = get_program_detailed_results(segment_obj["details"])
-        if df_progs is None:
+        programs = read_programs_values(
+            category, seg, pages.get(details_url), performance_ids, db
+        )
+        if programs is None:
             logger.warning(
                 f"Could not get detailed results for {seg} of {crawled['name']}"
             )
-        else:
-            for _, program in df_progs.iterrows():
-                performance = db.exec(
-                    select(Performance)
-                    .where(
-                        Performance.category_id == category_to_db.id,
-                    )
-                    .where(
-                        col(Performance.skater_id).in_(
-                            select(Skater.id)
-                            .where(
-                                F.concat(Skater.first_name, " ", Skater.last_name)
-                                == program["Name"]
-                            )
-                            .where(
-                                col(Skater.club_id).in_(
-                                    select(Club.id).where(
-                                        Club.abbrev == program["Club"]
-                                    )
-                                )
-                            )
-                        )
-                    )
-                ).first()
-                if performance is None:
-                    logger.warning(
-                        f"Could not find performance of skater {program['Name']} in the database"
-                    )
-                    continue
-                valid_prog = program["Rank"] not in ["WD", "DSQ"]
-                if valid_prog:
-                    program_db = Program(
-                        type=seg,
-                        withdrawn=program["Rank"] == "WD",
-                        disqualified=program["Rank"] == "DSQ",
-                        total_element_score=program["TES"],
-                        total_component_score=program["PCS"],
-                        total_deductions=program["Ded."],
-                        total_segment_score=program["TSS"],
-                        composition=program["CO"],
-                        presentation=program["PR"],
-                        skating_skills=program["SK"],
-                        rank=program["Rank"],
-                        bonifications=0.0,
-                        starting_number=program["StN."],
-                    )
+            failed.add(details_url)
+            jobs.set(CrawlStatus.FAILED, crawled["name"], seg, category.id)
+            continue
+        stored_programs = {}  # type: dict[int, Program]
+        for program in db.exec(
+            select(Program)
+            .join(Performance)
+            .where(Performance.category_id == category.id)
+            .where(Program.type == seg)
+            .order_by(Program.id)
+        ):
+            assert program.performance_id is not None
+            stored_programs.setdefault(program.performance_id, program)
+        values = {}
+        for program_value in programs:
+            values.setdefault(program_value["performance_id"], program_value)
+        sync_rows(Program, stored_programs, values, db)
+        jobs.set(CrawlStatus.DONE, crawled["name"], seg, category.id)
+
+    # Without its entries or results, the category is failed: the next crawl creates it again
+    hashes = {url: h for url, h in hashes.items() if url not in failed}
+    jobs.set(
+        CrawlStatus.FAILED if len(errors) > 0 else CrawlStatus.DONE,
+        crawled["name"],
+        category_id=category.id,
+        error="; ".join(errors) or None,
+        page_hashes={**stored_hashes, **hashes},
+    )
+    summarize_category(category.id, db, previous_skaters)
+    db.commit()
+    return True
 
-                else:
-                    program_db = Program(
-                        type=seg,
-                        withdrawn=program["Rank"] == "WD",
-                        disqualified=program["Rank"] == "DSQ",
-                        total_element_score=None,
-                        total_component_score=None,
-                        total_deductions=None,
-                        total_segment_score=None,
-                        composition=None,
-                        presentation=None,
-                        skating_skills=None,
-                        rank=None,
-                        bonifications=None,
-                        starting_number=program["StN."],
-                    )
 
-                programs.append(program_db)
-                performance.short_program = program_db if seg == "SP" else None
-                performance.free_skating = program_db if seg == "FS" else None
-                performances.append(performance)
+def sync_rows(
+    model: type[SQLModel],
+    stored: dict,
+    values: dict[Any, dict],
+    db: Session = Depends(get_session),
+) -> dict:
+    """Synchronize stored rows with new column values, both indexed by the same key: the
+    differing columns are updated, the missing rows are bulk inserted and the rows without
+    values are deleted. Returns the ids of the rows by key."""
+    ids = {}
+    for key, row_values in values.items():
+        row = stored.get(key)
+        if row is None:
+            continue
+        for column, value in row_values.items():
+            if getattr(row, column) != value:
+                setattr(row, column, value)
+        ids[key] = row.id
+    new_keys = [key for key in values if key not in stored]
+    if len(new_keys) > 0:
+        rows = db.execute(
+            insert(model).returning(model.id, sort_by_parameter_order=True),  # type: ignore
+            [values[key] for key in new_keys],
+        )
+        ids.update(zip(new_keys, rows.scalars()))
+    removed = [row.id for key, row in stored.items() if key not in values]
+    if len(removed) > 0:
+        db.execute(delete(model).where(col(model.id).in_(removed)))  # type: ignore
+    return ids
+
+
+def delete_category_rows(category_id: int, db: Session = Depends(get_session)):
+    """Delete a category and its panels, inscriptions, performances and programs, and update
+    the summaries of its skaters. Nothing is committed."""
+    season, skaters = category_skaters(category_id, db)
+    performance_ids = select(Performance.id).where(
+        Performance.category_id == category_id
+    )
+    db.execute(delete(Program).where(col(Program.performance_id).in_(performance_ids)))
+    db.execute(delete(Performance).where(col(Performance.category_id) == category_id))
+    db.execute(delete(Inscription).where(col(Inscription.category_id) == category_id))
+    db.execute(delete(Panel).where(col(Panel.category_id) == category_id))
+    db.execute(delete(Category).where(col(Category.id) == category_id))
+    if season is not None:
+        summarize_skaters(skaters, season, db)
+
+
+def page_hashes(pages: dict[str, bytes | None]) -> dict[str, str]:
+    """Content hashes of fetched pages, by URL"""
+    return {
+        url: hashlib.sha256(content).hexdigest()
+        for url, content in pages.items()
+        if content is not None
+    }
+
 
-    db.add_all(programs)
-    db.add_all(performances)
-    db.commit()
+def read_performances_values(
+    category: Category, content: bytes | None, db: Session = Depends(get_session)
+) -> list[dict] | None:
+    """Column values of the performances of the results page of a category, None if the page
+    could not be parsed"""
+    if category.results_url is None:
+        return []
+    assert category.id is not None
+    df_perfs = get_category_results(category.results_url, content)
+    if df_perfs is None:
+        return None
+    performances = []
+    nb_valid_entries = len(df_perfs.query("FinalRank not in ['WD', 'DSQ']"))
+    skater_ids = find_skater_ids(list(zip(df_perfs["Name"], df_perfs["Club"])), db)
+    for (_, perf), skater_id in zip(df_perfs.iterrows(), skater_ids):
+        if skater_id is None:
+            logger.warning(f"Could not find skater {perf['Name']} in the database")
+            continue
+        performances.append(
+            performance_values(perf, skater_id, category.id, nb_valid_entries)
+        )
+    return performances
 
-    db.refresh(category_to_db)
-    return category_to_db
+
+def read_programs_values(
+    category: Category,
+    seg: str,
+    content: bytes | None,
+    performance_ids: dict[int, int],
+    db: Session = Depends(get_session),
+) -> list[dict] | None:
+    """Column values of the programs of the detailed results page of a segment ("SP" or "FS")
+    of a category, linked to the performances of `performance_ids` (skater id -> performance
+    id). None if the page could not be parsed."""
+    details_url = (
+        category.sp_detailed_results_url
+        if seg == "SP"
+        else category.fs_detailed_results_url
+    )
+    assert details_url is not None
+    df_progs = get_program_detailed_results(details_url, content)
+    if df_progs is None:
+        return None
+    programs = []
+    skater_ids = find_skater_ids(list(zip(df_progs["Name"], df_progs["Club"])), db)
+    for (_, program), skater_id in zip(df_progs.iterrows(), skater_ids):
+        performance_id = (
+            performance_ids.get(skater_id) if skater_id is not None else None
+        )
+        if performance_id is None:
+            logger.warning(
+                f"Could not find performance of skater {program['Name']} in the database"
+            )
+            continue
+        programs.append(program_values(program, seg, performance_id))
+    return programs
+
+
+def create_programs_from_crawler(
+    category: Category,
+    seg: str,
+    content: bytes | None,
+    performance_ids: dict[int, int],
+    db: Session = Depends(get_session),
+) -> bool:
+    """Bulk insert the programs of a segment of a category from its detailed results page.
+    Returns False if the page could not be parsed. Nothing is committed."""
+    programs = read_programs_values(category, seg, content, performance_ids, db)
+    if programs is None:
+        return False
+    if len(programs) > 0:
+        db.execute(insert(Program), programs)
+    return True
+
+
+def read_performance_ids(
+    category_id: int, db: Session = Depends(get_session)
+) -> dict[int, int]:
+    """Ids of the performances of a category, by skater id"""
+    performance_ids = {}  # type: dict[int, int]
+    for skater_id, performance_id in db.exec(
+        select(Performance.skater_id, Performance.id)
+        .where(Performance.category_id == category_id)
+        .order_by(Performance.id)
+    ):
+        performance_ids.setdefault(skater_id, performance_id)
+    return performance_ids
+
+
+def performance_values(
+    perf, skater_id: int, category_id: int, nb_valid_entries: int
+) -> dict:
+    """Column values of the performance of a row of the results table"""
+    valid_perf = perf["FinalRank"] not in ["WD", "DSQ"]
+    return {
+        "skater_id": skater_id,
+        "category_id": category_id,
+        "withdrawn": perf["FinalRank"] == "WD",
+        "disqualified": perf["FinalRank"] == "DSQ",
+        "rank": int(perf["FinalRank"]) if valid_perf else None,
+        "score": float(perf["Score"]) if valid_perf else None,
+        "total_entries": nb_valid_entries,
+    }
+
+
+def program_values(program, seg: str, performance_id: int) -> dict:
+    """Column values of the program of a row of the detailed results table"""
+    valid_prog = program["Rank"] not in ["WD", "DSQ"]
+
+    def score(column: str) -> float | None:
+        return float(program[column]) if valid_prog else None
+
+    return {
+        "type": seg,
+        "withdrawn": program["Rank"] == "WD",
+        "disqualified": program["Rank"] == "DSQ",
+        "total_element_score": score("TES"),
+        "total_component_score": score("PCS"),
+        "total_deductions": score("Ded."),
+        "total_segment_score": score("TSS"),
+        "composition": score("CO"),
+        "presentation": score("PR"),
+        "skating_skills": score("SK"),
+        "rank": int(program["Rank"]) if valid_prog else None,
+        "bonifications": 0.0 if valid_prog else None,
+        "starting_number": int(program["StN."]),
+        "performance_id": performance_id,
+    }
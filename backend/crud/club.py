@@ -2,7 +2,9 @@ from fastapi import Depends, HTTPException, status
 from sqlmodel import Session, select
 from sqlmodel.sql.expression import SelectOfScalar
 
+from backend.cache import invalidate_cache
 from backend.database import get_session
+from backend.crud.pagination import paginate
 from commons.schemas import *
 
 
@@ -10,12 +12,18 @@ def create_club(club: ClubCreate, db: Session = Depends(get_session)):
     club_to_db = Club.model_validate(club)
     db.add(club_to_db)
     db.commit()
+    invalidate_cache()
     db.refresh(club_to_db)
     return club_to_db
 
 
-def read_clubs(offset: int = 0, limit: int = 20, db: Session = Depends(get_session)):
-    clubs = db.exec(select(Club).offset(offset).limit(limit)).all()
+def read_clubs(
+    offset: int = 0,
+    limit: int = 20,
+    after: int | None = None,
+    db: Session = Depends(get_session),
+):
+    clubs = db.exec(paginate(select(Club), Club.id, offset, limit, after)).all()
     return clubs
 
 
@@ -45,6 +53,7 @@ def update_club(
     club_to_update.sqlmodel_update(club_data)
     db.add(club_to_update)
     db.commit()
+    invalidate_cache()
     db.refresh(club_to_update)
     return club_to_update
 
@@ -59,6 +68,7 @@ def delete_club(club_id: int, db: Session = Depends(get_session)):
 
     db.delete(club)
     db.commit()
+    invalidate_cache()
     return {"ok": True}
 
 
@@ -6,11 +6,23 @@ from fastapi import Depends, HTTPException, status
 from sqlmodel import Session, select
 
 from logger import logger_config
+from backend.cache import invalidate_cache
 from backend.database import get_session
+from backend.crud.pagination import paginate
 from commons.schemas import *
 
-from backend.crud.category import create_category_from_crawler
-from backend.crawler.competition_crawler import get_links_table
+from backend.crud.category import (
+    create_category_from_crawler,
+    create_programs_from_crawler,
+    delete_category_rows,
+    read_category,
+    read_performance_ids,
+    refresh_category_from_crawler,
+)
+from backend.crud.crawl_job import CrawlJobs
+from backend.crud.summary import summarize_category
+from backend.crud.identity_map import IdentityMap
+from backend.crawler.competition_crawler import get_links_table, prefetch_pages
 
 logger = logger_config(__name__)
 
@@ -21,14 +33,20 @@ def create_competition(
     competition_to_db = Competition.model_validate(competition)
     db.add(competition_to_db)
     db.commit()
+    invalidate_cache()
     db.refresh(competition_to_db)
     return competition_to_db
 
 
 def read_competitions(
-    offset: int = 0, limit: int = 20, db: Session = Depends(get_session)
+    offset: int = 0,
+    limit: int = 20,
+    after: int | None = None,
+    db: Session = Depends(get_session),
 ):
-    competitions = db.exec(select(Competition).offset(offset).limit(limit)).all()
+    competitions = db.exec(
+        paginate(select(Competition), Competition.id, offset, limit, after)
+    ).all()
     return competitions
 
 
@@ -58,6 +76,7 @@ def update_competition(
     competition_to_update.sqlmodel_update(competition_data)
     db.add(competition_to_update)
     db.commit()
+    invalidate_cache()
     db.refresh(competition_to_update)
     return competition_to_update
 
@@ -72,21 +91,173 @@ def delete_competition(competition_id: int, db: Session = Depends(get_session)):
 
     db.delete(competition)
     db.commit()
+    invalidate_cache()
     return {"ok": True}
 
 
-def crawl_competition(competition_id: int, db: Session = Depends(get_session)):
+def crawl_competition(
+    competition_id: int,
+    db: Session = Depends(get_session),
+    links_table: dict | None = None,
+    refresh: bool = False,
+):
     """Crawls the competition's website to get the links to the categories entries and
     the score cards. Adds the skaters to the database if they are not already there.
+    An already crawled `links_table` can be given.
+
+    The progress is recorded in the crawl jobs of the competition: a re-run only crawls the
+    categories and segments that are not done, and fetches only their pages.
+
+    With `refresh`, the pages of the crawled categories are fetched again and the categories
+    are updated from the pages that changed since the last crawl (see
+    `refresh_category_from_crawler`). Categories removed from the website are deleted.
+    The categories of competitions crawled before the crawl jobs existed are first linked
+    to their jobs (see `link_crawled_categories`).
     """
     competition = read_competition(competition_id, db)
+    jobs = CrawlJobs(competition_id, db)
+    if jobs.done() and not refresh:
+        logger.info(f"Competition {competition.name} is already crawled")
+        return
 
     # Crawls the competition's website to get the links to the categories entries and the score cards
-    links_table = get_links_table(competition)
-    assert links_table is not None
+    if links_table is None:
+        links_table = get_links_table(competition, prefetch=False)
+        if links_table is not None:
+            prefetch_pages(
+                cat
+                for cat in links_table.values()
+                if refresh or not jobs.done(cat["name"])
+            )
+    if links_table is None:
+        logger.error(f"Could not get the links table of {competition.name}")
+        jobs.set(CrawlStatus.FAILED, error="Could not get the links table")
+        db.commit()
+        return
+
+    if len(jobs.jobs) == 0:
+        link_crawled_categories(competition_id, links_table, jobs, db)
+
+    # Clubs and skaters are resolved in memory for the whole crawl
+    identity_map = IdentityMap(db)
+    for cat in links_table.values():
+        created = jobs.done(cat["name"])
+        try:
+            if created:
+                resume_category(cat, jobs, db)
+                if refresh:
+                    job = jobs.get(cat["name"])
+                    assert job is not None and job.category_id is not None
+                    if refresh_category_from_crawler(
+                        cat,
+                        read_category(job.category_id, db, options=()),
+                        jobs,
+                        db,
+                        identity_map,
+                    ):
+                        logger.info(f"Category {cat['name']} refreshed")
+            else:
+                job = jobs.get(cat["name"])
+                if job is not None and job.category_id is not None:
+                    # The category was created, but its entries or results were missing
+                    category_id = job.category_id
+                    jobs.unlink(cat["name"])
+                    delete_category_rows(category_id, db)
+                create_category_from_crawler(cat, competition, db, identity_map, jobs)
+        except Exception as e:
+            logger.error(f"Could not crawl category {cat['name']}: {e}")
+            db.rollback()
+            # The clubs, skaters and jobs of the failed category were rolled back
+            identity_map = IdentityMap(db)
+            jobs = CrawlJobs(competition_id, db)
+            if not created:
+                jobs.set(CrawlStatus.FAILED, cat["name"], error=repr(e))
+                db.commit()
+
+    if refresh:
+        removed = {
+            job.category
+            for job in jobs.jobs.values()
+            if job.category is not None and job.category not in links_table
+        }
+        for category in removed:
+            job = jobs.get(category)
+            logger.info(f"Category {category} was removed from the website")
+            category_id = job.category_id if job is not None else None
+            # The jobs reference the category, they are deleted first
+            jobs.delete(category)
+            db.flush()
+            if category_id is not None:
+                delete_category_rows(category_id, db)
+        db.commit()
 
+    if not jobs.done() and all(
+        jobs.done(cat["name"]) and len(jobs.unfinished_segments(cat["name"])) == 0
+        for cat in links_table.values()
+    ):
+        jobs.set(CrawlStatus.DONE)
+        db.commit()
+    # The responses cached before the crawl miss its categories
+    invalidate_cache()
+
+
+def link_crawled_categories(
+    competition_id: int,
+    links_table: dict,
+    jobs: CrawlJobs,
+    db: Session = Depends(get_session),
+):
+    """Create the jobs of the categories of a competition crawled before the crawl jobs
+    existed. The stored categories are matched with the categories of the website on their
+    entries or results URL, so that they are refreshed instead of created again. The stored
+    categories without a match are left untouched."""
+    categories = {}  # type: dict[str, Category]
+    for category in db.exec(
+        select(Category)
+        .where(Category.competition_id == competition_id)
+        .order_by(Category.id)
+    ):
+        for url in [category.entries_url, category.results_url]:
+            if url is not None:
+                categories.setdefault(url, category)
+    if len(categories) == 0:
+        return
     for cat in links_table.values():
-        create_category_from_crawler(cat, competition, db)
+        category = categories.get(cat["entries_link"]) or categories.get(
+            cat["results_link"]
+        )
+        if category is not None:
+            jobs.set(CrawlStatus.DONE, cat["name"], category_id=category.id)
+    db.commit()
+
+
+def resume_category(crawled: dict, jobs: CrawlJobs, db: Session = Depends(get_session)):
+    """Crawl again the segments of an already created category whose programs could not be
+    crawled"""
+    for seg in jobs.unfinished_segments(crawled["name"]):
+        job = jobs.get(crawled["name"], seg)
+        assert job is not None and job.category_id is not None
+        category = read_category(job.category_id, db, options=())
+        details_url = (
+            category.sp_detailed_results_url
+            if seg == "SP"
+            else category.fs_detailed_results_url
+        )
+        if create_programs_from_crawler(
+            category,
+            seg,
+            crawled.get("pages", {}).get(details_url),
+            read_performance_ids(job.category_id, db),
+            db,
+        ):
+            jobs.set(CrawlStatus.DONE, crawled["name"], seg)
+            summarize_category(category.id, db)
+        else:
+            logger.warning(
+                f"Could not get detailed results for {seg} of {crawled['name']}"
+            )
+            jobs.set(CrawlStatus.FAILED, crawled["name"], seg)
+        db.commit()
 
 
 # def create_inscriptions(
@@ -0,0 +1,113 @@
+from datetime import datetime, timezone
+
+from sqlmodel import Session, func, select
+
+from commons.schemas import *
+
+
+class CrawlJobs:
+    """Crawl jobs of a competition, keyed by (category, segment). Jobs are added to the session
+    without being committed, so that they are committed with the rows of their unit."""
+
+    def __init__(self, competition_id: int, db: Session):
+        self.competition_id = competition_id
+        self.db = db
+        self.jobs = {
+            (job.category, job.segment): job
+            for job in db.exec(
+                select(CrawlJob).where(CrawlJob.competition_id == competition_id)
+            )
+        }  # type: dict[tuple[str | None, str | None], CrawlJob]
+
+    def done(self, category: str | None = None, segment: str | None = None) -> bool:
+        job = self.jobs.get((category, segment))
+        return job is not None and job.status == CrawlStatus.DONE
+
+    def done_categories(self) -> set[str]:
+        return {
+            category
+            for (category, segment), job in self.jobs.items()
+            if category is not None
+            and segment is None
+            and job.status == CrawlStatus.DONE
+        }
+
+    def delete(self, category: str):
+        """Delete the jobs of a category and of its segments"""
+        for key in [key for key in self.jobs if key[0] == category]:
+            self.db.delete(self.jobs.pop(key))
+
+    def unlink(self, category: str):
+        """Unlink the jobs of a category and of its segments from the category row, so that
+        it can be deleted"""
+        for key, job in self.jobs.items():
+            if key[0] == category:
+                job.category_id = None
+                self.db.add(job)
+        self.db.flush()
+
+    def get(self, category: str, segment: str | None = None) -> CrawlJob | None:
+        return self.jobs.get((category, segment))
+
+    def unfinished_segments(self, category: str) -> list[str]:
+        """Segments of a crawled category whose programs could not be crawled"""
+        return [
+            job.segment
+            for (job_category, segment), job in self.jobs.items()
+            if job_category == category
+            and job.segment is not None
+            and job.status != CrawlStatus.DONE
+        ]
+
+    def set(
+        self,
+        status: CrawlStatus,
+        category: str | None = None,
+        segment: str | None = None,
+        category_id: int | None = None,
+        error: str | None = None,
+        page_hashes: dict[str, str] | None = None,
+    ):
+        job = self.jobs.get((category, segment))
+        if job is None:
+            job = CrawlJob(
+                competition_id=self.competition_id,
+                category=category,
+                segment=segment,
+                status=status,
+                updated_at=datetime.now(timezone.utc),
+            )
+            self.jobs[(category, segment)] = job
+        elif (
+            job.status == status
+            and job.error == error
+            and category_id in (None, job.category_id)
+            and page_hashes in (None, job.page_hashes)
+        ):
+            return
+        job.status = status
+        job.error = error
+        job.updated_at = datetime.now(timezone.utc)
+        if category_id is not None:
+            job.category_id = category_id
+        if page_hashes is not None:
+            job.page_hashes = page_hashes
+        self.db.add(job)
+
+
+def is_competition_crawled(competition_id: int, db: Session) -> bool:
+    """Whether the crawl of a competition is complete. Competitions crawled before the crawl
+    jobs existed have categories but no jobs, they are considered complete."""
+    if CrawlJobs(competition_id, db).done():
+        return True
+    nb_jobs = db.exec(
+        select(func.count())
+        .select_from(CrawlJob)
+        .where(CrawlJob.competition_id == competition_id)
+    ).one()
+    nb_categories = db.exec(
+        select(func.count())
+        .select_from(Category)
+        .where(Category.competition_id == competition_id)
+    ).one()
+    return nb_jobs == 0 and nb_categories > 0
@@ -0,0 +1,129 @@
+import csv
+import io
+import json
+from typing import Iterator, Literal
+
+from fastapi import Depends, HTTPException, status
+from sqlalchemy import Boolean, Float, Integer, Select
+from sqlmodel import Session
+
+from backend.database import get_session
+from backend.queries import query_performances_export
+from logger import logger_config
+
+logger = logger_config(__name__)
+
+ExportFormat = Literal["ndjson", "csv", "parquet"]
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+# Rows fetched at once from the server-side cursor, and written as one chunk of the output
+EXPORT_BATCH_SIZE = 5000
+
+
+def fetch_batches(
+    query: Select, db: Session, batch_size: int = EXPORT_BATCH_SIZE
+) -> Iterator[list[dict]]:
+    """Rows of a query, by batches. With yield_per, the rows are streamed from a
+    server-side cursor (on PostgreSQL) instead of being fetched all at once."""
+    result = db.execute(query, execution_options={"yield_per": batch_size})
+    for partition in result.mappings().partitions():
+        yield [dict(row) for row in partition]
+
+
+def ndjson_chunks(query: Select, batches: Iterator[list[dict]]) -> Iterator[bytes]:
+    for batch in batches:
+        yield "".join(json.dumps(row) + "\n" for row in batch).encode()
+
+
+def csv_chunks(query: Select, batches: Iterator[list[dict]]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=list(query.selected_columns.keys()))
+    writer.writeheader()
+    for batch in batches:
+        writer.writerows(batch)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+class ChunkSink(io.RawIOBase):
+    """Write-only file keeping only the bytes written since the last `take`, so that a
+    Parquet file can be sent while it is written"""
+
+    def __init__(self):
+        self.chunks: list[bytes] = []
+        self.position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self.chunks.append(bytes(b))
+        self.position += len(b)
+        return len(b)
+
+    def tell(self) -> int:
+        return self.position
+
+    def take(self) -> bytes:
+        data, self.chunks = b"".join(self.chunks), []
+        return data
+
+
+def parquet_chunks(query: Select, batches: Iterator[list[dict]]) -> Iterator[bytes]:
+    """Parquet file with one row group per batch"""
+    import pyarrow as pa  # type: ignore
+    import pyarrow.parquet as pq  # type: ignore
+
+    def arrow_type(sql_type):
+        if isinstance(sql_type, Boolean):
+            return pa.bool_()
+        if isinstance(sql_type, Integer):
+            return pa.int64()
+        if isinstance(sql_type, Float):
+            return pa.float64()
+        return pa.string()
+
+    schema = pa.schema(
+        [(c.key, arrow_type(c.type)) for c in query.selected_columns]  # type: ignore
+    )
+    sink = ChunkSink()
+    with pq.ParquetWriter(sink, schema) as writer:
+        for batch in batches:
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            yield sink.take()
+    yield sink.take()
+
+
+CHUNKS = {"ndjson": ndjson_chunks, "csv": csv_chunks, "parquet": parquet_chunks}
+
+
+def export_performances(
+    format: ExportFormat = "ndjson",
+    competition_id: int | None = None,
+    season: str | None = None,
+    club_id: int | None = None,
+    db: Session = Depends(get_session),
+) -> Iterator[bytes]:
+    """Chunks of the export of the performances, with their competition, category, skater,
+    club and programs. Only one batch of rows is held in memory at a time."""
+    if format == "parquet":
+        try:
+            import pyarrow  # type: ignore
+        except ImportError:
+            raise HTTPException(
+                status_code=status.HTTP_501_NOT_IMPLEMENTED,
+                detail="Parquet export needs pyarrow, which is not installed",
+            )
+    query = query_performances_export(competition_id, season, club_id)
+    logger.info(
+        f"Exporting performances as {format} (competition {competition_id}, season {season}, club {club_id})"
+    )
+    return CHUNKS[format](query, fetch_batches(query, db))
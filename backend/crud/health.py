@@ -1,22 +1,56 @@
-from fastapi import Depends
+from fastapi import Depends, HTTPException, status
+from sqlalchemy import Engine
 from sqlmodel import Session, text
 
 from config import settings
-from backend.database import get_session
-from commons.schemas import Health, Stats, Status
+from backend.cache import LRUCache
+from backend.database import engine, get_session
+from backend.pool import MonitoredQueuePool
+from commons.schemas import Health, PoolStatus, Stats, Status
 from logger import logger_config
 
 logger = logger_config(__name__)
 
+# Tables counted by the stats, by field of Stats
+STATS_TABLES = {
+    "skaters": "skater",
+    "clubs": "club",
+    "competitions": "competition",
+    "performances": "performance",
+}
+
+# Last stats, refreshed at most every STATS_CACHE_TTL seconds
+stats_cache = LRUCache(maxsize=1, ttl=settings.STATS_CACHE_TTL)
+
 
 def count_from_db(table: str, db: Session = Depends(get_session)):
     teams = db.exec(text(f"SELECT COUNT(id) FROM {table};")).one_or_none()
     return teams[0] if teams else 0
 
 
+def estimate_from_db(db: Session = Depends(get_session)) -> dict[str, int] | None:
+    """Row counts of the tables estimated by PostgreSQL's planner statistics, without
+    scanning them. None on other databases, or if a table was never analyzed."""
+    if db.get_bind().dialect.name != "postgresql":
+        return None
+    estimates = dict(
+        db.exec(  # type: ignore
+            text(
+                "SELECT relname, reltuples::bigint FROM pg_class "
+                "WHERE relkind = 'r' AND relname = ANY(:tables) "
+                "AND relnamespace = 'public'::regnamespace"
+            ),
+            params={"tables": list(STATS_TABLES.values())},
+        ).all()
+    )
+    if any(estimates.get(table, -1) < 0 for table in STATS_TABLES.values()):
+        return None
+    return {field: estimates[table] for field, table in STATS_TABLES.items()}
+
+
 def health_db(db: Session = Depends(get_session)) -> Status:
     try:
-        db.exec(text(f"SELECT COUNT(id) FROM skater;")).one_or_none()
+        db.exec(text("SELECT 1;")).one_or_none()
         return Status.OK
     except Exception as e:
         logger.exception(e)
@@ -30,12 +64,31 @@ def get_health(db: Session) -> Health:
     return Health(app_status=Status.OK, db_status=db_status, environment=settings.ENV)
 
 
-def get_stats(db: Session) -> Stats:
-    stats = Stats(
-        skaters=count_from_db("skater", db),
-        clubs=count_from_db("club", db),
-        competitions=count_from_db("competition", db),
-        performances=count_from_db("performance", db),
-    )
+def get_stats(db: Session, exact: bool = False) -> Stats:
+    """Number of rows of the main tables. Unless `exact`, the stats are taken from the cache,
+    or estimated by the database when it can, and counted otherwise."""
+    stats = None if exact else stats_cache.get("stats")
+    if stats is not None:
+        return stats
+
+    generation = stats_cache.generation()
+    estimates = None if exact else estimate_from_db(db)
+    if estimates is not None:
+        stats = Stats(**estimates, estimated=True)
+    else:
+        counts = {field: count_from_db(t, db) for field, t in STATS_TABLES.items()}
+        stats = Stats(**counts, estimated=False)
+    stats_cache.set("stats", stats, generation)
     logger.info("%sget_stats: %s", __name__, stats)
     return stats
+
+
+def get_pool_status(db_engine: Engine = engine) -> PoolStatus:
+    if not isinstance(db_engine.pool, MonitoredQueuePool):
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail=f"No pool metrics with {db_engine.pool.__class__.__name__}",
+        )
+    pool_status = db_engine.pool.metrics()
+    logger.info("%s.get_pool_status: %s", __name__, pool_status)
+    return pool_status
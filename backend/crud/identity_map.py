@@ -0,0 +1,84 @@
+from typing import Iterable
+
+import pandas as pd  # type: ignore
+from sqlmodel import Session, select
+
+from commons.schemas import *
+
+
+class IdentityMap:
+    """In-memory map of the ids of the clubs and skaters of the database, used while crawling
+    so that entries are resolved without a query per row. Clubs are keyed by abbreviation and
+    skaters by (first name, last name, club id). Missing rows are inserted in batches.
+    """
+
+    def __init__(self, db: Session, preload: bool = True):
+        self.db = db
+        self.clubs: dict[str, int] = {}
+        self.skaters: dict[tuple[str, str, int | None], int] = {}
+        if preload:
+            self.load()
+
+    def load(self):
+        """Load the ids of all the clubs and skaters of the database"""
+        for club_id, abbrev in self.db.exec(
+            select(Club.id, Club.abbrev).order_by(Club.id)
+        ):
+            self.clubs.setdefault(abbrev, club_id)
+        for skater_id, first_name, last_name, club_id in self.db.exec(
+            select(
+                Skater.id, Skater.first_name, Skater.last_name, Skater.club_id
+            ).order_by(Skater.id)
+        ):
+            self.skaters.setdefault((first_name, last_name, club_id), skater_id)
+
+    def resolve_clubs(self, abbrevs: Iterable[str]) -> dict[str, int]:
+        """Get the ids of the clubs with the given abbreviations, creating the missing ones"""
+        abbrevs = list(dict.fromkeys(abbrevs))
+        new_clubs = [
+            Club.model_validate(ClubCreate(abbrev=abbrev))
+            for abbrev in abbrevs
+            if abbrev not in self.clubs
+        ]
+        if len(new_clubs) > 0:
+            self.db.add_all(new_clubs)
+            self.db.flush()
+            for club in new_clubs:
+                assert club.id is not None
+                self.clubs[club.abbrev] = club.id
+        return {abbrev: self.clubs[abbrev] for abbrev in abbrevs}
+
+    def resolve_skaters(self, skaters: list[SkaterCreate]) -> list[int]:
+        """Get the ids of the given skaters, creating the missing ones"""
+        new_skaters = {}  # type: dict[tuple[str, str, int | None], Skater]
+        for skater in skaters:
+            key = (skater.first_name, skater.last_name, skater.club_id)
+            if key not in self.skaters and key not in new_skaters:
+                new_skaters[key] = Skater.model_validate(skater)
+        if len(new_skaters) > 0:
+            self.db.add_all(new_skaters.values())
+            self.db.flush()
+            for key, skater_db in new_skaters.items():
+                assert skater_db.id is not None
+                self.skaters[key] = skater_db.id
+        return [
+            self.skaters[(skater.first_name, skater.last_name, skater.club_id)]
+            for skater in skaters
+        ]
+
+    def resolve_entries(self, df_entry: pd.DataFrame, genre: str) -> list[int]:
+        """Get the ids of the skaters of an entries table, creating the missing clubs and
+        skaters"""
+        club_ids = self.resolve_clubs(df_entry["Club"])
+        return self.resolve_skaters(
+            [
+                SkaterCreate(
+                    first_name=entry["First Name"],
+                    last_name=entry["Surname"],
+                    genre=genre,
+                    club_id=club_ids[entry["Club"]],
+                    nation=entry["Nationality"],
+                )
+                for _, entry in df_entry.iterrows()
+            ]
+        )
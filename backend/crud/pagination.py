@@ -0,0 +1,21 @@
+from typing import Any
+
+from sqlmodel.sql.expression import SelectOfScalar
+
+
+def paginate(
+    statement: SelectOfScalar,
+    key: Any,
+    offset: int = 0,
+    limit: int = 20,
+    after: Any | None = None,
+) -> SelectOfScalar:
+    """Page of a statement ordered by a unique key, usually the primary key.
+
+    With `after`, the page starts right after this key with an index search, whatever its
+    depth (keyset pagination). Otherwise, `offset` rows are skipped.
+    """
+    statement = statement.order_by(key).limit(limit)
+    if after is not None:
+        return statement.where(key > after)
+    return statement.offset(offset)
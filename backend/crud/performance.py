@@ -1,8 +1,34 @@
 from fastapi import Depends, HTTPException, status
-from sqlmodel import Session, select
+from sqlalchemy import delete
+from sqlalchemy.orm import selectinload
+from sqlmodel import Session, col, select
 
+from backend.cache import invalidate_cache
 from backend.database import get_session
-from commons.schemas import PerformanceCreate, PerformanceUpdate, Performance
+from backend.crud.pagination import paginate
+from backend.crud.summary import summarize_performance
+from commons.schemas import PerformanceCreate, PerformanceUpdate, Performance, Program
+
+# Programs serialized by PerformanceRead, loaded with the performances
+PERFORMANCE_READ_OPTIONS = (
+    selectinload(Performance.short_program),
+    selectinload(Performance.free_skating),
+)
+
+
+def reload_performance(
+    performance: Performance, db: Session = Depends(get_session)
+) -> Performance:
+    """Reload a committed performance with the programs serialized by PerformanceRead, so
+    that the response is not lazy loaded outside of the threadpool"""
+    reloaded = db.get(
+        Performance,
+        performance.id,
+        options=PERFORMANCE_READ_OPTIONS,
+        populate_existing=True,
+    )
+    assert reloaded is not None
+    return reloaded
 
 
 def create_performance(
@@ -10,20 +36,35 @@ def create_performance(
 ):
     performance_to_db = Performance.model_validate(performance)
     db.add(performance_to_db)
+    db.flush()
+    summarize_performance(
+        performance_to_db.category_id, performance_to_db.skater_id, db
+    )
     db.commit()
-    db.refresh(performance_to_db)
-    return performance_to_db
+    invalidate_cache()
+    return reload_performance(performance_to_db, db)
 
 
 def read_performances(
-    offset: int = 0, limit: int = 20, db: Session = Depends(get_session)
+    offset: int = 0,
+    limit: int = 20,
+    after: int | None = None,
+    db: Session = Depends(get_session),
 ):
-    performances = db.exec(select(Performance).offset(offset).limit(limit)).all()
+    performances = db.exec(
+        paginate(
+            select(Performance).options(*PERFORMANCE_READ_OPTIONS),
+            Performance.id,
+            offset,
+            limit,
+            after,
+        )
+    ).all()
     return performances
 
 
 def read_performance(performance_id: int, db: Session = Depends(get_session)):
-    performance = db.get(Performance, performance_id)
+    performance = db.get(Performance, performance_id, options=PERFORMANCE_READ_OPTIONS)
     if not performance:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -44,12 +85,18 @@ def update_performance(
             detail=f"Performance not found with id: {performance_id}",
         )
 
+    previous = (performance_to_update.category_id, performance_to_update.skater_id)
     performance_data = performance.model_dump(exclude_unset=True)
     performance_to_update.sqlmodel_update(performance_data)
     db.add(performance_to_update)
+    db.flush()
+    summarize_performance(*previous, db)
+    summarize_performance(
+        performance_to_update.category_id, performance_to_update.skater_id, db
+    )
     db.commit()
-    db.refresh(performance_to_update)
-    return performance_to_update
+    invalidate_cache()
+    return reload_performance(performance_to_update, db)
 
 
 def delete_performance(performance_id: int, db: Session = Depends(get_session)):
@@ -60,6 +107,11 @@ def delete_performance(performance_id: int, db: Session = Depends(get_session)):
             detail=f"Performance not found with id: {performance_id}",
         )
 
+    # The programs are only linked by viewonly relationships, the ORM does not delete them
+    db.execute(delete(Program).where(col(Program.performance_id) == performance_id))
     db.delete(performance)
+    db.flush()
+    summarize_performance(performance.category_id, performance.skater_id, db)
     db.commit()
+    invalidate_cache()
     return {"ok": True}
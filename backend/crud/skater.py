@@ -1,26 +1,46 @@
 from fastapi import Depends, HTTPException, status
-from sqlmodel import Session, select
+from sqlalchemy.orm import joinedload
+from sqlmodel import Session, col, select
 from sqlmodel.sql.expression import SelectOfScalar
 
+from backend.cache import invalidate_cache
 from backend.database import get_session
+from backend.crud.pagination import paginate
 from commons.schemas import *
 
+# Club serialized by SkaterReadWithClub, joined to the skaters
+SKATER_READ_WITH_CLUB_OPTIONS = (joinedload(Skater.club),)
+
 
 def create_skater(skater: SkaterCreate, db: Session = Depends(get_session)):
     skater_to_db = Skater.model_validate(skater)
     db.add(skater_to_db)
     db.commit()
+    invalidate_cache()
     db.refresh(skater_to_db)
     return skater_to_db
 
 
-def read_skaters(offset: int = 0, limit: int = 20, db: Session = Depends(get_session)):
-    skaters = db.exec(select(Skater).offset(offset).limit(limit)).all()
+def read_skaters(
+    offset: int = 0,
+    limit: int = 20,
+    after: int | None = None,
+    db: Session = Depends(get_session),
+):
+    skaters = db.exec(
+        paginate(
+            select(Skater).options(*SKATER_READ_WITH_CLUB_OPTIONS),
+            Skater.id,
+            offset,
+            limit,
+            after,
+        )
+    ).all()
     return skaters
 
 
 def read_skater(skater_id: int, db: Session = Depends(get_session)):
-    skater = db.get(Skater, skater_id)
+    skater = db.get(Skater, skater_id, options=SKATER_READ_WITH_CLUB_OPTIONS)
     if not skater:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -43,6 +63,7 @@ def update_skater(
     skater_to_update.sqlmodel_update(skater_data)
     db.add(skater_to_update)
     db.commit()
+    invalidate_cache()
     db.refresh(skater_to_update)
     return skater_to_update
 
@@ -57,6 +78,7 @@ def delete_skater(skater_id: int, db: Session = Depends(get_session)):
 
     db.delete(skater)
     db.commit()
+    invalidate_cache()
     return {"ok": True}
 
 
@@ -72,6 +94,23 @@ def find_or_create_skater(
         return create_skater(skater, db)
 
 
+def find_skater_ids(
+    names: list[tuple[str, str]], db: Session = Depends(get_session)
+) -> list[int | None]:
+    """Match the (full name, club abbreviation) pairs of a results table with the ids of the
+    skaters, in a single query on the normalized full name"""
+    keys = {normalize_full_name(name) for name, _ in names}
+    skater_ids = {}  # type: dict[tuple[str, str], int]
+    for skater_id, key, abbrev in db.exec(
+        select(Skater.id, Skater.full_name_key, Club.abbrev)
+        .join(Club)
+        .where(col(Skater.full_name_key).in_(keys))
+        .order_by(Skater.id)
+    ):
+        skater_ids.setdefault((key, abbrev), skater_id)
+    return [skater_ids.get((normalize_full_name(name), club)) for name, club in names]
+
+
 # def skater_get_or_create(skater: Skater, db: Session = Depends(get_session)):
 #     """Get a skater from the database or create it if it doesn't exist."""
 #     skater_db = db.exec(
@@ -0,0 +1,122 @@
+from typing import Iterable
+
+from fastapi import Depends, HTTPException, status
+from sqlalchemy import delete, insert
+from sqlmodel import Session, col, select
+
+from backend.database import get_session
+from backend.queries import query_skater_season_summaries
+from commons.schemas import *
+
+DEFERRED_SUMMARIES = "deferred_summaries"
+
+
+def category_skaters(
+    category_id: int, db: Session = Depends(get_session)
+) -> tuple[str | None, set[int]]:
+    """Season of a category and the skaters of its performances"""
+    rows = db.exec(
+        select(Competition.season, Performance.skater_id)
+        .join(Category, col(Category.competition_id) == Competition.id)
+        .outerjoin(Performance, col(Performance.category_id) == Category.id)
+        .where(Category.id == category_id)
+    ).all()
+    if len(rows) == 0:
+        return None, set()
+    return rows[0][0], {skater_id for _, skater_id in rows if skater_id is not None}
+
+
+def defer_summaries(db: Session = Depends(get_session)) -> dict[str, set[int]]:
+    """Collect the skaters to summarize by season in the session instead of recomputing
+    their summaries, e.g. while competitions are ingested in parallel: the summaries are
+    recomputed by `summarize_deferred` once all the performances are committed."""
+    return db.info.setdefault(DEFERRED_SUMMARIES, {})
+
+
+def summarize_deferred(
+    deferred: dict[str, set[int]], db: Session = Depends(get_session)
+):
+    """Recompute the summaries of the skaters collected by `defer_summaries`. Nothing is
+    committed."""
+    for season, skater_ids in sorted(deferred.items()):
+        summarize_skaters(skater_ids, season, db)
+
+
+def summarize_skaters(
+    skater_ids: Iterable[int], season: str, db: Session = Depends(get_session)
+):
+    """Recompute the summaries of skaters for a season from their performances. Nothing is
+    committed."""
+    skater_ids = sorted(set(skater_ids))
+    if len(skater_ids) == 0:
+        return
+    deferred = db.info.get(DEFERRED_SUMMARIES)
+    if deferred is not None:
+        deferred.setdefault(season, set()).update(skater_ids)
+        return
+    db.execute(
+        delete(SkaterSeasonSummary)
+        .where(col(SkaterSeasonSummary.season) == season)
+        .where(col(SkaterSeasonSummary.skater_id).in_(skater_ids))
+    )
+    summaries = db.execute(query_skater_season_summaries(season, skater_ids))
+    rows = [dict(row) for row in summaries.mappings()]
+    if len(rows) > 0:
+        db.execute(insert(SkaterSeasonSummary), rows)
+
+
+def summarize_category(
+    category_id: int,
+    db: Session = Depends(get_session),
+    skater_ids: Iterable[int] = (),
+):
+    """Recompute the summaries of the skaters of a category, and of other `skater_ids` of
+    its season (e.g. the skaters removed from it). Nothing is committed."""
+    season, skaters = category_skaters(category_id, db)
+    if season is not None:
+        summarize_skaters(skaters | set(skater_ids), season, db)
+
+
+def summarize_competition(competition_id: int, db: Session = Depends(get_session)):
+    """Recompute the summaries of the skaters of the categories of a competition. Nothing is
+    committed."""
+    rows = db.exec(
+        select(Competition.season, Performance.skater_id)
+        .join(Category, col(Category.competition_id) == Competition.id)
+        .join(Performance, col(Performance.category_id) == Category.id)
+        .where(Competition.id == competition_id)
+    ).all()
+    if len(rows) > 0:
+        summarize_skaters({skater_id for _, skater_id in rows}, rows[0][0], db)
+
+
+def summarize_performance(
+    category_id: int | None,
+    skater_id: int | None,
+    db: Session = Depends(get_session),
+):
+    """Recompute the summary of the skater of a performance for the season of its category.
+    Nothing is committed."""
+    if category_id is None or skater_id is None:
+        return
+    season = db.exec(
+        select(Competition.season)
+        .join(Category, col(Category.competition_id) == Competition.id)
+        .where(Category.id == category_id)
+    ).first()
+    if season is not None:
+        summarize_skaters([skater_id], season, db)
+
+
+def read_skater_summary(skater_id: int, db: Session = Depends(get_session)):
+    summaries = db.exec(
+        select(SkaterSeasonSummary)
+        .where(SkaterSeasonSummary.skater_id == skater_id)
+        .order_by(col(SkaterSeasonSummary.season))
+    ).all()
+    if len(summaries) == 0 and db.get(Skater, skater_id) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Skater not found with id: {skater_id}",
+        )
+    return summaries
@@ -1,10 +1,36 @@
+from sqlalchemy import make_url
 from sqlmodel import Session, SQLModel, create_engine
 
-from config import settings
-
-# connect_args = {"check_same_thread": False}
-connect_args = {}
-engine = create_engine(settings.DATABASE_URI, echo=False, connect_args=connect_args)
+from backend.migrations import run_migrations
+from backend.pool import MonitoredQueuePool
+from config import Settings, settings
+
+
+def engine_options(settings: Settings) -> dict:
+    """Pool and connection options of the engine. In-memory SQLite databases keep the pool
+    chosen by SQLAlchemy, a connection being the whole database."""
+    url = make_url(settings.DATABASE_URI)
+    options: dict = {"pool_pre_ping": settings.DATABASE_POOL_PRE_PING}
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return options
+    options |= {
+        "poolclass": MonitoredQueuePool,
+        "pool_size": settings.DATABASE_POOL_SIZE,
+        "max_overflow": settings.DATABASE_MAX_OVERFLOW,
+        "pool_timeout": settings.DATABASE_POOL_TIMEOUT,
+        "pool_recycle": settings.DATABASE_POOL_RECYCLE,
+    }
+    if (
+        url.get_backend_name() == "postgresql"
+        and settings.DATABASE_STATEMENT_TIMEOUT is not None
+    ):
+        options["connect_args"] = {
+            "options": f"-c statement_timeout={settings.DATABASE_STATEMENT_TIMEOUT}"
+        }
+    return options
+
+
+engine = create_engine(settings.DATABASE_URI, echo=False, **engine_options(settings))
 
 
 def drop_db_and_tables():
@@ -13,6 +39,7 @@ def drop_db_and_tables():
 
 def create_db_and_tables():
     SQLModel.metadata.create_all(engine)
+    run_migrations(engine)
 
 
 def get_session():
@@ -0,0 +1,102 @@
+"""Upgrades of existing databases to the current models.
+
+`SQLModel.metadata.create_all` only creates missing tables, so the columns and indexes added to
+existing tables are created here. Every migration must be idempotent, they are all run at each
+startup by `create_db_and_tables`.
+"""
+
+from sqlalchemy import Engine, bindparam, insert, inspect, text, update
+from sqlmodel import SQLModel, select
+
+from backend.queries import query_skater_season_summaries
+from commons.schemas import (
+    Performance,
+    Skater,
+    SkaterSeasonSummary,
+    normalize_full_name,
+)
+from logger import logger_config
+
+logger = logger_config(__name__)
+
+
+def add_skater_full_name_key(engine: Engine):
+    """Add and fill the `skater.full_name_key` column"""
+    columns = [c["name"] for c in inspect(engine).get_columns("skater")]
+    if "full_name_key" in columns:
+        return
+    logger.info("Adding column skater.full_name_key")
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE skater ADD COLUMN full_name_key VARCHAR"))
+        keys = [
+            {"skater_id": skater_id, "key": normalize_full_name(f"{first} {last}")}
+            for skater_id, first, last in conn.execute(
+                select(Skater.id, Skater.first_name, Skater.last_name)
+            )
+        ]
+        if len(keys) > 0:
+            conn.execute(
+                update(Skater)
+                .where(Skater.id == bindparam("skater_id"))
+                .values(full_name_key=bindparam("key")),
+                keys,
+            )
+
+
+def add_missing_columns(engine: Engine):
+    """Add the nullable columns of the models that do not exist in the database"""
+    inspector = inspect(engine)
+    for table in SQLModel.metadata.sorted_tables:
+        existing = {c["name"] for c in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing or not column.nullable:
+                continue
+            logger.info(f"Adding column {table.name}.{column.name}")
+            column_type = column.type.compile(dialect=engine.dialect)
+            with engine.begin() as conn:
+                conn.execute(
+                    text(
+                        f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"
+                    )
+                )
+
+
+def create_missing_indexes(engine: Engine):
+    """Create the indexes of the models that do not exist in the database"""
+    inspector = inspect(engine)
+    for table in SQLModel.metadata.sorted_tables:
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                logger.info(f"Creating index {index.name}")
+                index.create(engine)
+
+
+def fill_skater_summaries(engine: Engine):
+    """Compute the skater summaries of a database whose performances were ingested before
+    the summaries were maintained"""
+    with engine.begin() as conn:
+        if conn.execute(select(SkaterSeasonSummary.id).limit(1)).first() is not None:
+            return
+        if conn.execute(select(Performance.id).limit(1)).first() is None:
+            return
+        logger.info("Computing the skater summaries")
+        rows = [
+            dict(row)
+            for row in conn.execute(query_skater_season_summaries()).mappings()
+        ]
+        if len(rows) > 0:
+            conn.execute(insert(SkaterSeasonSummary), rows)
+
+
+MIGRATIONS = [
+    add_skater_full_name_key,
+    add_missing_columns,
+    create_missing_indexes,
+    fill_skater_summaries,
+]
+
+
+def run_migrations(engine: Engine):
+    for migration in MIGRATIONS:
+        migration(engine)
@@ -0,0 +1,55 @@
+import threading
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool
+
+from commons.schemas import PoolStatus
+
+
+class MonitoredQueuePool(QueuePool):
+    """QueuePool counting its checkouts, the time spent waiting for a connection, and the
+    connections opened beyond the size of the pool. A long wait with fast queries means that
+    the pool is starved, not that the database is slow."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._metrics_lock = threading.Lock()
+        self.checkouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.overflows = 0
+        self.timeouts = 0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        overflow = self.overflow()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            with self._metrics_lock:
+                self.timeouts += 1
+            raise
+        wait = time.perf_counter() - start
+        with self._metrics_lock:
+            self.checkouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            if self.overflow() > max(overflow, 0):
+                self.overflows += 1
+        return connection
+
+    def metrics(self) -> PoolStatus:
+        with self._metrics_lock:
+            return PoolStatus(
+                size=self.size(),
+                checked_out=self.checkedout(),
+                overflow=max(self.overflow(), 0),
+                checkouts=self.checkouts,
+                mean_wait_ms=(
+                    1000 * self.total_wait / self.checkouts if self.checkouts else 0.0
+                ),
+                max_wait_ms=1000 * self.max_wait,
+                overflows=self.overflows,
+                timeouts=self.timeouts,
+            )
@@ -1,39 +1,297 @@
-from backend.database import engine
+from functools import lru_cache
+
+from sqlalchemy import bindparam, case, distinct, func
+from sqlalchemy.orm import aliased
 from sqlmodel import select, col
 from commons.schemas import *
 
+# Statements are built once, with bound parameters, and cached: a query only binds its values
+# to the cached statement, and SQLAlchemy reuses the SQL compiled for it from the compiled
+# cache of the engine instead of compiling it again.
+
 
 ## Get all skaters from a given club
-def query_skaters_from_club(club_name: str, id_only: bool = False):
-    query = select(Skater if not id_only else Skater.id).where(
-        col(Skater.club_id).in_(select(Club.id).where(Club.abbrev == club_name))
+@lru_cache
+def _skaters_from_club(id_only: bool):
+    return (
+        select(Skater if not id_only else Skater.id)
+        .join(Club)
+        .where(Club.abbrev == bindparam("club_name"))
     )
-    return query
+
+
+def query_skaters_from_club(club_name: str, id_only: bool = False):
+    return _skaters_from_club(id_only).params(club_name=club_name)
 
 
 ## Get all competitions where a given club was present
+@lru_cache
+def _competitions_from_club(id_only: bool):
+    return (
+        select(Competition if not id_only else Competition.id)
+        .join(Category)
+        .join(Performance)
+        .join(Skater)
+        .join(Club)
+        .where(Club.abbrev == bindparam("club_name"))
+        .distinct()
+    )
+
+
 def query_competitions_from_club(club_name: str, id_only: bool = False):
-    query = select(Competition if not id_only else Competition.id).where(
-        col(Competition.id).in_(
-            select(Category.competition_id).where(
-                col(Category.id).in_(
-                    select(Performance.category_id).where(
-                        col(Performance.skater_id).in_(
-                            query_skaters_from_club(club_name, id_only=True)
-                        )
-                    )
-                )
-            )
+    return _competitions_from_club(id_only).params(club_name=club_name)
+
+
+## Get all performances from a given competition
+@lru_cache
+def _performances_from_competition(id_only: bool):
+    return (
+        select(Performance if not id_only else Performance.id)
+        .join(Category)
+        .where(Category.competition_id == bindparam("competition_id"))
+    )
+
+
+def query_performances_from_competition(competition_id: int, id_only: bool = False):
+    return _performances_from_competition(id_only).params(competition_id=competition_id)
+
+
+## Get the performances of a skater with their category and competition, by date
+@lru_cache
+def _skater_history():
+    return (
+        select(Performance, Category, Competition)
+        .join(Category, col(Performance.category_id) == Category.id)
+        .join(Competition)
+        .where(Performance.skater_id == bindparam("skater_id"))
+        .order_by(col(Competition.start), col(Performance.id))
+    )
+
+
+def query_skater_history(skater_id: int):
+    return _skater_history().params(skater_id=skater_id)
+
+
+## Get the results of a category: performances with their skater, club, short program and
+## free skating, by rank
+@lru_cache
+def _category_results():
+    short_program = aliased(Program)
+    free_skating = aliased(Program)
+    return (
+        select(Performance, Skater, Club, short_program, free_skating)
+        .join(Skater, col(Performance.skater_id) == Skater.id)
+        .outerjoin(Club, col(Skater.club_id) == Club.id)
+        .outerjoin(
+            short_program,
+            (short_program.performance_id == Performance.id)
+            & (short_program.type == "SP"),
+        )
+        .outerjoin(
+            free_skating,
+            (free_skating.performance_id == Performance.id)
+            & (free_skating.type == "FS"),
         )
+        .where(Performance.category_id == bindparam("category_id"))
+        .order_by(col(Performance.rank).is_(None), col(Performance.rank))
+    )
+
+
+def query_category_results(category_id: int):
+    return _category_results().params(category_id=category_id)
+
+
+## Count the podiums of the skaters of each club during a season
+@lru_cache
+def _club_podiums():
+    podiums = func.count(col(Performance.id)).label("podiums")
+    return (
+        select(Club.id, Club.abbrev, podiums)
+        .join(Skater, col(Skater.club_id) == Club.id)
+        .join(Performance, col(Performance.skater_id) == Skater.id)
+        .join(Category, col(Performance.category_id) == Category.id)
+        .join(Competition, col(Category.competition_id) == Competition.id)
+        .where(Competition.season == bindparam("season"))
+        .where(col(Performance.rank) <= 3)
+        .group_by(col(Club.id), col(Club.abbrev))
+        .order_by(podiums.desc(), col(Club.abbrev))
     )
+
+
+def query_club_podiums(season: str):
+    return _club_podiums().params(season=season)
+
+
+## Get the best score and number of performances of each skater during a season
+@lru_cache
+def _skater_season_bests():
+    best_score = func.max(Performance.score).label("best_score")
+    return (
+        select(
+            Skater.id,
+            Skater.first_name,
+            Skater.last_name,
+            best_score,
+            func.count(col(Performance.id)).label("performances"),
+        )
+        .join(Performance, col(Performance.skater_id) == Skater.id)
+        .join(Category, col(Performance.category_id) == Category.id)
+        .join(Competition, col(Category.competition_id) == Competition.id)
+        .where(Competition.season == bindparam("season"))
+        .group_by(col(Skater.id), col(Skater.first_name), col(Skater.last_name))
+        .order_by(best_score.desc())
+    )
+
+
+def query_skater_season_bests(season: str):
+    return _skater_season_bests().params(season=season)
+
+
+## Export the performances of a competition, a season and/or a club, flattened with their
+## competition, category, skater, club, short program and free skating
+PROGRAM_EXPORT_COLUMNS = [
+    "rank",
+    "starting_number",
+    "total_segment_score",
+    "total_element_score",
+    "total_component_score",
+    "total_deductions",
+    "composition",
+    "presentation",
+    "skating_skills",
+    "bonifications",
+]
+
+
+@lru_cache
+def _performances_export(competition: bool, season: bool, club: bool):
+    short_program = aliased(Program)
+    free_skating = aliased(Program)
+    query = (
+        select(
+            col(Performance.id).label("performance_id"),
+            col(Competition.id).label("competition_id"),
+            col(Competition.name).label("competition"),
+            Competition.season,
+            col(Category.id).label("category_id"),
+            Category.genre,
+            Category.age,
+            Category.level,
+            col(Skater.id).label("skater_id"),
+            Skater.first_name,
+            Skater.last_name,
+            Skater.nation,
+            col(Club.abbrev).label("club"),
+            Performance.rank,
+            Performance.score,
+            Performance.withdrawn,
+            Performance.disqualified,
+            Performance.total_entries,
+            *[
+                getattr(program, column).label(f"{prefix}_{column}")
+                for prefix, program in [("sp", short_program), ("fs", free_skating)]
+                for column in PROGRAM_EXPORT_COLUMNS
+            ],
+        )
+        .join(Category, col(Performance.category_id) == Category.id)
+        .join(Competition, col(Category.competition_id) == Competition.id)
+        .join(Skater, col(Performance.skater_id) == Skater.id)
+        .outerjoin(Club, col(Skater.club_id) == Club.id)
+        .outerjoin(
+            short_program,
+            (short_program.performance_id == Performance.id)
+            & (short_program.type == "SP"),
+        )
+        .outerjoin(
+            free_skating,
+            (free_skating.performance_id == Performance.id)
+            & (free_skating.type == "FS"),
+        )
+        .order_by(col(Performance.id))
+    )
+    if competition:
+        query = query.where(Competition.id == bindparam("competition_id"))
+    if season:
+        query = query.where(Competition.season == bindparam("season"))
+    if club:
+        query = query.where(Skater.club_id == bindparam("club_id"))
     return query
 
 
-## Get all performances from a given competition
-def query_performances_from_competition(competition_id: int, id_only: bool = False):
-    query = select(Performance if not id_only else Performance.id).where(
-        col(Performance.category_id).in_(
-            select(Category.id).where(col(Category.competition_id) == competition_id)
+def query_performances_export(
+    competition_id: int | None = None,
+    season: str | None = None,
+    club_id: int | None = None,
+):
+    filters = {
+        "competition_id": competition_id,
+        "season": season,
+        "club_id": club_id,
+    }
+    query = _performances_export(*(value is not None for value in filters.values()))
+    return query.params(
+        {name: value for name, value in filters.items() if value is not None}
+    )
+
+
+## Aggregate the performances and programs of skaters by season, as the rows of
+## SkaterSeasonSummary. The scores of withdrawn or disqualified performances are left out.
+@lru_cache
+def _skater_season_summaries(filtered: bool):
+    short_program = aliased(Program)
+    free_skating = aliased(Program)
+    valid = ~(
+        func.coalesce(Performance.withdrawn, False)
+        | func.coalesce(Performance.disqualified, False)
+    )
+
+    def scores(column):
+        return case((valid, column))
+
+    query = (
+        select(
+            col(Performance.skater_id).label("skater_id"),
+            Competition.season,
+            func.count(distinct(Competition.id)).label("competitions"),
+            func.count(col(Performance.id)).label("performances"),
+            func.count(case((col(Performance.rank) <= 3, 1))).label("podiums"),
+            func.min(Performance.rank).label("best_rank"),
+            func.max(scores(Performance.score)).label("best_score"),
+            func.avg(scores(Performance.score)).label("average_score"),
+            *[
+                aggregate(scores(program.total_segment_score)).label(
+                    f"{prefix}_{name}_score"
+                )
+                for prefix, program in [("sp", short_program), ("fs", free_skating)]
+                for name, aggregate in [("best", func.max), ("average", func.avg)]
+            ],
+        )
+        .join(Category, col(Performance.category_id) == Category.id)
+        .join(Competition, col(Category.competition_id) == Competition.id)
+        .outerjoin(
+            short_program,
+            (short_program.performance_id == Performance.id)
+            & (short_program.type == "SP"),
+        )
+        .outerjoin(
+            free_skating,
+            (free_skating.performance_id == Performance.id)
+            & (free_skating.type == "FS"),
         )
+        .where(col(Performance.skater_id).is_not(None))
+        .group_by(col(Performance.skater_id), col(Competition.season))
     )
+    if filtered:
+        query = query.where(Competition.season == bindparam("season")).where(
+            col(Performance.skater_id).in_(bindparam("skater_ids", expanding=True))
+        )
     return query
+
+
+def query_skater_season_summaries(
+    season: str | None = None, skater_ids: list[int] | None = None
+):
+    """Summaries of the skaters of a season, or of all the skaters and seasons"""
+    if season is None or skater_ids is None:
+        return _skater_season_summaries(False)
+    return _skater_season_summaries(True).params(season=season, skater_ids=skater_ids)
@@ -0,0 +1,230 @@
+"""Benchmark of the write path of a crawled category.
+
+Times `create_category_from_crawler`, which bulk inserts the performances and programs,
+against the former ORM path (one object per row, a commit per stage and a SELECT per program
+to find its performance), on synthetic pages of `NB_SKATERS` skaters made from the saved
+sample pages of tests/crawler/pages. Both paths parse the same pages. The database is given
+by `BENCH_DATABASE_URI` (see `benchmarks.database`) and its tables are dropped and created.
+Run from the repository root:
+```
+    BENCH_DATABASE_URI=sqlite:///bench.db python -m benchmarks.bench_bulk_insert
+```
+"""
+
+# Imported first: sets the database of the application
+import benchmarks.database  # isort: skip
+
+import re
+import string
+import time
+from pathlib import Path
+
+from sqlmodel import Session, select
+
+from backend.crawler.competition_crawler import (
+    get_category_entries,
+    get_category_panel,
+    get_category_results,
+    get_program_detailed_results,
+    parse_category_age,
+    parse_category_genre,
+    parse_category_level,
+)
+from backend.crud.category import (
+    build_panel,
+    category_links,
+    create_category_from_crawler,
+    performance_values,
+    program_values,
+    read_segments,
+)
+from backend.crud.identity_map import IdentityMap
+from backend.crud.skater import find_skater_ids
+from backend.database import create_db_and_tables, drop_db_and_tables, engine
+from commons.schemas import *
+
+NB_SKATERS = 200
+NB_CATEGORIES = 10
+NB_CLUBS = 10
+PAGES = Path(__file__).parent.parent / "tests" / "crawler" / "pages"
+SITE_URL = "http://localhost/Resultats-2023-2024/BENCH/"
+
+
+def first_name(i: int) -> str:
+    """Distinct first names without digits nor capitals after the first letter"""
+    letters = ""
+    while True:
+        letters = string.ascii_lowercase[i % 26] + letters
+        i //= 26
+        if i == 0:
+            return "Skater" + letters
+
+
+def synthetic_page(name: str, row) -> bytes:
+    """Sample page whose rows are replaced by NB_SKATERS rows made by `row(i)`"""
+    content = (PAGES / name).read_text("latin-1")
+    rows = re.findall(r'<tr class="Line\dWhite">.*?</tr>', content, flags=re.S)
+    start = content.index(rows[0])
+    end = content.index(rows[-1]) + len(rows[-1])
+    body = "\n".join(
+        f'<tr class="Line{i % 2 + 1}White">\n{row(i)}\n</tr>' for i in range(NB_SKATERS)
+    )
+    return (content[:start] + body + content[end:]).encode("latin-1")
+
+
+def cells(*values) -> str:
+    return "".join(f'<td class="CellRight">{value}</td>' for value in values)
+
+
+def skater_cells(i: int) -> str:
+    return (
+        f'<td class="CellLeft">{first_name(i)} BENCH</td>'
+        + f'<td class="CellLeft">CLUB{i % NB_CLUBS}</td>'
+    )
+
+
+def crawled_category() -> dict:
+    """Category of the links table of the crawler, with its synthetic pages"""
+    details = synthetic_page(
+        "SEG001.htm",
+        lambda i: cells(i + 1)
+        + skater_cells(i)
+        + '<td class="CellCenter">FRA</td>'
+        + cells(40.0, 22.0)
+        + '<td class="CellCenter">+</td>'
+        + cells(18.0, 6.0, 6.0, 6.0, 0.0, f"#{i + 1}"),
+    )
+    pages = {
+        "CAT001EN.htm": synthetic_page(
+            "CAT001EN.htm",
+            lambda i: cells(i + 1)
+            + skater_cells(i)
+            + '<td class="CellCenter">FRA</td>',
+        ),
+        "CAT001RS.htm": synthetic_page(
+            "CAT001RS.htm",
+            lambda i: cells(i + 1)
+            + skater_cells(i)
+            + cells("&nbsp;", i + 1, "&nbsp;")
+            + '<td class="CellCenter">FRA</td>'
+            + cells(f"{150 - i * 0.5:.2f}"),
+        ),
+        "SEG001.htm": details,
+        "SEG002.htm": details,
+        "SEG001OF.htm": (PAGES / "SEG001OF.htm").read_bytes(),
+        "SEG002OF.htm": (PAGES / "SEG001OF.htm").read_bytes(),
+    }
+    return {
+        "name": "R1 Junior-Senior Dames",
+        "entries_link": SITE_URL + "CAT001EN.htm",
+        "results_link": SITE_URL + "CAT001RS.htm",
+        "segments": [
+            {
+                "name": name,
+                "details_link": SITE_URL + f"SEG00{i}.htm",
+                "officials_link": SITE_URL + f"SEG00{i}OF.htm",
+            }
+            for i, name in [(1, "Short Program"), (2, "Free Skating")]
+        ],
+        "pages": {SITE_URL + name: content for name, content in pages.items()},
+    }
+
+
+def orm_path(crawled: dict, competition: Competition, db: Session):
+    """Former write path"""
+    pages = crawled["pages"]
+    segment = read_segments(crawled)
+    category = Category(
+        competition_id=competition.id,
+        genre=parse_category_genre(crawled["name"]),
+        level=parse_category_level(crawled["name"]),
+        age=parse_category_age(crawled["name"]),
+        **category_links(crawled, segment),
+    )
+    for seg, panel in [("SP", "sp_panel"), ("FS", "fs_panel")]:
+        url = segment[seg]["officials"]
+        setattr(category, panel, build_panel(get_category_panel(url, pages[url])))
+    db.add(category)
+    db.commit()
+
+    df_entry = get_category_entries(
+        crawled["entries_link"], pages[crawled["entries_link"]]
+    )
+    skater_ids = IdentityMap(db).resolve_entries(df_entry, category.genre)
+    db.add_all(
+        [
+            Inscription(skater_id=skater_id, category_id=category.id)
+            for skater_id in dict.fromkeys(skater_ids)
+        ]
+    )
+    db.commit()
+
+    df_perfs = get_category_results(category.results_url, pages[category.results_url])
+    nb_valid_entries = len(df_perfs.query("FinalRank not in ['WD', 'DSQ']"))
+    skater_ids = find_skater_ids(list(zip(df_perfs["Name"], df_perfs["Club"])), db)
+    db.add_all(
+        [
+            Performance(
+                **performance_values(perf, skater_id, category.id, nb_valid_entries)
+            )
+            for (_, perf), skater_id in zip(df_perfs.iterrows(), skater_ids)
+        ]
+    )
+    db.commit()
+
+    for seg in ["SP", "FS"]:
+        url = segment[seg]["details"]
+        df_progs = get_program_detailed_results(url, pages[url])
+        skater_ids = find_skater_ids(list(zip(df_progs["Name"], df_progs["Club"])), db)
+        programs = []
+        for (_, prog), skater_id in zip(df_progs.iterrows(), skater_ids):
+            performance = db.exec(
+                select(Performance)
+                .where(Performance.category_id == category.id)
+                .where(Performance.skater_id == skater_id)
+            ).first()
+            assert performance is not None
+            programs.append(Program(**program_values(prog, seg, performance.id)))
+        db.add_all(programs)
+        db.commit()
+
+
+def bulk_path(crawled: dict, competition: Competition, db: Session):
+    create_category_from_crawler(crawled, competition, db)
+
+
+def run(write_path) -> float:
+    drop_db_and_tables()
+    create_db_and_tables()
+    crawled = crawled_category()
+    elapsed = 0.0
+    with Session(engine) as db:
+        for i in range(NB_CATEGORIES):
+            competition = Competition(
+                name=f"Bench {i}",
+                season="2023-2024",
+                type="TF",
+                start=None,
+                end=None,
+                location=None,
+                rink_name=None,
+                url=SITE_URL + "index.htm",
+            )
+            db.add(competition)
+            db.commit()
+            start = time.perf_counter()
+            write_path(crawled, competition, db)
+            elapsed += time.perf_counter() - start
+        nb_programs = len(db.exec(select(Program.id)).all())
+        assert nb_programs == 2 * NB_SKATERS * NB_CATEGORIES, nb_programs
+    return elapsed / NB_CATEGORIES
+
+
+if __name__ == "__main__":
+    before = run(orm_path)
+    after = run(bulk_path)
+    print(
+        f"{engine.dialect.name}, {NB_SKATERS} skaters, mean of {NB_CATEGORIES} categories"
+    )
+    print(f"ORM objects: {before * 1000:8.2f} ms")
+    print(f"bulk insert: {after * 1000:8.2f} ms ({before / after:.1f}x)")
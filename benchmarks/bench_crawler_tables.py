@@ -0,0 +1,76 @@
+"""Micro-benchmark of the HTML table parsers of the competition crawler.
+
+Compares the columnar parser of `get_program_detailed_results` with the former row-by-row
+`df.loc[len(df.index)] = [...]` growth, on a synthetic 60-skater detailed results page.
+Run from the repository root:
+```
+    python -m benchmarks.bench_crawler_tables
+```
+"""
+
+import random
+import timeit
+
+import pandas as pd  # type: ignore
+from bs4 import BeautifulSoup  # type: ignore
+
+from backend.crawler.competition_crawler import get_program_detailed_results
+
+NB_SKATERS = 60
+REPEAT = 20
+
+
+def make_detailed_results_page(nb_skaters: int = NB_SKATERS) -> bytes:
+    """Build a detailed results page with the same layout as the results website"""
+    rng = random.Random(0)
+    headers = [" \xa0 Pl.", "Name", "Club", "Nation", "TSS", "TES", "+", "PCS"]
+    headers += ["CO", "PR", "SK", "Ded.", "StN."]
+    rows = ["<tr>\n" + "".join(f"<th>{h}</th>" for h in headers) + "</tr>"]
+    for i in range(nb_skaters):
+        rank = "WD" if i == nb_skaters - 1 else str(i + 1)
+        tes, co, pr, sk = [round(rng.uniform(5, 40), 2) for _ in range(4)]
+        pcs = round(co + pr + sk, 2)
+        cells = [rank, f"Skater{i}  SURNAME{i}", f"CLUB{i % 7}", "FRA"]
+        cells += [f"{tes + pcs:.2f}", f"{tes:.2f}", "+", f"{pcs:.2f}"]
+        cells += [f"{co:.2f}", f"{pr:.2f}", f"{sk:.2f}", "0.00", f"#{i + 1}"]
+        rows.append("<tr>\n" + "".join(f"<td>{c}</td>" for c in cells) + "</tr>")
+    table = "<table>\n" + "\n".join(rows) + "</table>"
+    return f"<html><body>{table}</body></html>".encode()
+
+
+def row_by_row(content: bytes) -> pd.DataFrame:
+    """Former implementation: the DataFrame is grown one row at a time"""
+    soup = BeautifulSoup(content, "html.parser")
+    table = [t for t in soup.find_all("table") if t.text.startswith("\n\n \xa0 Pl.")][0]
+    columns = ["Rank", "Name", "Club", "Nation", "TSS", "TES", "PCS"]
+    df = pd.DataFrame(columns=columns + ["CO", "PR", "SK", "Ded.", "StN."])
+    for r in table.find_all("tr")[1:]:
+        cells = [c.text.strip() for c in r.find_all("td")]
+        rank = cells[0]
+        name = " ".join(filter(lambda w: w != "", cells[1].split(" ")))
+        if rank in ["WD", "DSQ"]:
+            scores = [0.0] * 7
+        else:
+            scores = [float(cells[i]) for i in [4, 5, 7, 8, 9, 10, 11]]
+        df.loc[len(df.index)] = [rank, name, cells[2], cells[3], *scores] + [
+            int(cells[12][1:])
+        ]
+    return df
+
+
+if __name__ == "__main__":
+    page = make_detailed_results_page()
+    url = "http://localhost/detailed.htm"
+    expected = row_by_row(page)
+    result = get_program_detailed_results(url, page)
+    assert result is not None
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+    before = timeit.timeit(lambda: row_by_row(page), number=REPEAT) / REPEAT
+    after = (
+        timeit.timeit(lambda: get_program_detailed_results(url, page), number=REPEAT)
+        / REPEAT
+    )
+    print(f"{NB_SKATERS} skaters, mean of {REPEAT} runs")
+    print(f"row by row: {before * 1000:8.2f} ms")
+    print(f"columnar:   {after * 1000:8.2f} ms ({before / after:.1f}x)")
@@ -0,0 +1,63 @@
+"""Benchmark of the export of a season of performances.
+
+The database given by `BENCH_DATABASE_URI` (see `benchmarks.database`) is rebuilt with about
+100k performances by `create_mock_data`. The performances of a season are exported in each
+format by `export_performances`, and read page by page as `GET /performances` does, 100 rows
+at a time. The peak of the memory allocated by Python is reported for each. Run from the
+repository root:
+```
+    BENCH_DATABASE_URI=sqlite:///bench.db python -m benchmarks.bench_export
+```
+"""
+
+# Imported first: sets the database of the application
+import benchmarks.database  # isort: skip
+
+import time
+import tracemalloc
+
+from sqlmodel import Session
+
+from api.utils.mock_data_generator import SEASONS, create_mock_data
+from backend.crud.export import export_performances
+from backend.crud.performance import read_performances
+from backend.database import create_db_and_tables, drop_db_and_tables, engine
+
+NB_PERFORMANCES = 100_000
+SEASON = SEASONS[-1]
+
+
+def exported(format: str) -> int:
+    with Session(engine) as db:
+        return sum(map(len, export_performances(format=format, season=SEASON, db=db)))
+
+
+def paginated() -> int:
+    nb_rows, after = 0, None
+    while True:
+        with Session(engine) as db:
+            performances = read_performances(limit=100, after=after, db=db)
+        nb_rows += len(performances)
+        if len(performances) < 100:
+            return nb_rows
+        after = performances[-1].id
+
+
+def measure(name: str, run):
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = run()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{name:24} {elapsed:6.2f} s   peak {peak / 2**20:6.1f} MiB   ({size})")
+
+
+if __name__ == "__main__":
+    drop_db_and_tables()
+    create_db_and_tables()
+    create_mock_data(NB_PERFORMANCES)
+    print(f"{engine.dialect.name}, season {SEASON}")
+    for format in ["ndjson", "csv", "parquet"]:
+        measure(f"export {format}", lambda: exported(format))
+    measure("pages of 100 (all)", paginated)
@@ -0,0 +1,100 @@
+"""Load test of the API under concurrent clients.
+
+The database given by `BENCH_DATABASE_URI` (see `benchmarks.database`) is rebuilt with about
+10k performances by `create_mock_data`, and every statement is delayed by `LATENCY` to stand
+for the round-trip to a database server. `NB_CLIENTS` clients then call `GET /skaters/{id}`
+concurrently, through the ASGI app in this process:
+- with the routes of the API, which run their database calls in the threadpool;
+- with the former `async def` routes, which run the same synchronous calls on the event
+  loop and serve one request at a time.
+Run from the repository root:
+```
+    BENCH_DATABASE_URI=sqlite:///bench.db python -m benchmarks.bench_load
+```
+"""
+
+# Imported first: sets the database of the application
+import benchmarks.database  # isort: skip
+
+import asyncio
+import random
+import time
+
+import httpx
+from anyio import to_thread
+from fastapi import Depends
+from sqlalchemy import event
+from sqlmodel import Session
+
+from api.auth import authent
+from api.utils.mock_data_generator import NB_SKATERS, create_mock_data
+from app import create_app
+from backend.crud.health import get_pool_status
+from backend.crud.skater import read_skater
+from backend.database import (
+    create_db_and_tables,
+    drop_db_and_tables,
+    engine,
+    get_session,
+)
+from commons.schemas import SkaterReadWithClub
+from config import settings
+
+NB_PERFORMANCES = 10_000
+NB_CLIENTS = 100
+REQUESTS_PER_CLIENT = 5
+LATENCY = 0.01
+
+
+def delay(conn, cursor, statement, parameters, context, executemany):
+    time.sleep(LATENCY)
+
+
+def build_app():
+    app = create_app(settings)
+    app.dependency_overrides[authent] = lambda: True
+
+    @app.get("/blocking/skaters/{skater_id}", response_model=SkaterReadWithClub)
+    async def get_a_skater_blocking(skater_id: int, db: Session = Depends(get_session)):
+        return read_skater(skater_id=skater_id, db=db)
+
+    return app
+
+
+async def load(app, prefix: str) -> float:
+    """Requests per second of the clients"""
+    rng = random.Random(0)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+
+        async def run_client():
+            for _ in range(REQUESTS_PER_CLIENT):
+                skater_id = rng.randint(1, NB_SKATERS)
+                response = await client.get(f"{prefix}/skaters/{skater_id}")
+                assert response.status_code == 200
+
+        start = time.perf_counter()
+        await asyncio.gather(*(run_client() for _ in range(NB_CLIENTS)))
+        return NB_CLIENTS * REQUESTS_PER_CLIENT / (time.perf_counter() - start)
+
+
+async def main():
+    to_thread.current_default_thread_limiter().total_tokens = (
+        settings.API_THREADPOOL_SIZE
+    )
+    app = build_app()
+    print(
+        f"{engine.dialect.name}, {NB_CLIENTS} clients, {LATENCY * 1000:.0f} ms per statement,"
+        f" {settings.API_THREADPOOL_SIZE} threads"
+    )
+    for name, prefix in [("API routes", ""), ("async def routes", "/blocking")]:
+        print(f"{name:20} {await load(app, prefix):8.1f} requests/s")
+        print(f"{'':20} {get_pool_status()}")
+
+
+if __name__ == "__main__":
+    drop_db_and_tables()
+    create_db_and_tables()
+    create_mock_data(NB_PERFORMANCES)
+    event.listen(engine, "before_cursor_execute", delay)
+    asyncio.run(main())
@@ -0,0 +1,58 @@
+"""Benchmark of the offset and keyset pagination of `read_performances`.
+
+The database given by `BENCH_DATABASE_URI` (see `benchmarks.database`) is rebuilt with about
+100k performances by `create_mock_data`, then walked page by page in both modes. The time
+per page is reported at several depths. Run from the repository root:
+```
+    BENCH_DATABASE_URI=sqlite:///bench.db python -m benchmarks.bench_pagination
+```
+"""
+
+# Imported first: sets the database of the application
+import benchmarks.database  # isort: skip
+
+import time
+
+from sqlmodel import Session
+
+from api.utils.mock_data_generator import create_mock_data
+from backend.crud.performance import read_performances
+from backend.database import create_db_and_tables, drop_db_and_tables, engine
+
+NB_PERFORMANCES = 100_000
+LIMIT = 100
+REPORTED_PAGES = [1, 10, 100, 500, 1000]
+
+
+def walk(db: Session, keyset: bool) -> dict[int, float]:
+    """Time of the reported pages while walking all the performances"""
+    times, page, after = {}, 0, None
+    while True:
+        page += 1
+        start = time.perf_counter()
+        if keyset:
+            performances = read_performances(limit=LIMIT, after=after, db=db)
+        else:
+            performances = read_performances(
+                offset=(page - 1) * LIMIT, limit=LIMIT, db=db
+            )
+        if page in REPORTED_PAGES:
+            times[page] = time.perf_counter() - start
+        if len(performances) < LIMIT:
+            return times
+        after = performances[-1].id
+        db.expunge_all()
+
+
+if __name__ == "__main__":
+    drop_db_and_tables()
+    create_db_and_tables()
+    create_mock_data(NB_PERFORMANCES)
+    with Session(engine) as db:
+        offset, keyset = walk(db, False), walk(db, True)
+    print(f"{engine.dialect.name}, pages of {LIMIT} performances")
+    for page in REPORTED_PAGES:
+        print(
+            f"page {page:5}   offset: {offset[page] * 1000:7.2f} ms"
+            f"   keyset: {keyset[page] * 1000:7.2f} ms"
+        )
@@ -0,0 +1,108 @@
+"""Benchmark of the statements of `backend.queries` on a synthetic database.
+
+The database given by `BENCH_DATABASE_URI` (see `benchmarks.database`) is rebuilt with about
+100k performances by `create_mock_data`. Each query is timed as a join on its cached
+statement, and the three former queries are also timed in their nested IN (SELECT ...) form,
+built and compiled at each call. Run from the repository root:
+```
+    BENCH_DATABASE_URI=sqlite:///bench.db python -m benchmarks.bench_queries
+```
+"""
+
+# Imported first: sets the database of the application
+import benchmarks.database  # isort: skip
+
+import time
+
+from sqlmodel import Session, col, select
+
+from api.utils.mock_data_generator import create_mock_data
+from backend.database import create_db_and_tables, drop_db_and_tables, engine
+from backend.queries import *
+from commons.schemas import *
+
+NB_PERFORMANCES = 100_000
+REPEAT = 50
+
+
+def nested_skaters_from_club(club_name: str):
+    return select(Skater).where(
+        col(Skater.club_id).in_(select(Club.id).where(Club.abbrev == club_name))
+    )
+
+
+def nested_competitions_from_club(club_name: str):
+    return select(Competition).where(
+        col(Competition.id).in_(
+            select(Category.competition_id).where(
+                col(Category.id).in_(
+                    select(Performance.category_id).where(
+                        col(Performance.skater_id).in_(
+                            select(Skater.id).where(
+                                col(Skater.club_id).in_(
+                                    select(Club.id).where(Club.abbrev == club_name)
+                                )
+                            )
+                        )
+                    )
+                )
+            )
+        )
+    )
+
+
+def nested_performances_from_competition(competition_id: int):
+    return select(Performance).where(
+        col(Performance.category_id).in_(
+            select(Category.id).where(col(Category.competition_id) == competition_id)
+        )
+    )
+
+
+QUERIES = {
+    "skaters_from_club": (query_skaters_from_club, nested_skaters_from_club, "CLUB07"),
+    "competitions_from_club": (
+        query_competitions_from_club,
+        nested_competitions_from_club,
+        "CLUB07",
+    ),
+    "performances_from_competition": (
+        query_performances_from_competition,
+        nested_performances_from_competition,
+        42,
+    ),
+    "skater_history": (query_skater_history, None, 42),
+    "category_results": (query_category_results, None, 42),
+    "club_podiums": (query_club_podiums, None, "2023-2024"),
+    "skater_season_bests": (query_skater_season_bests, None, "2023-2024"),
+}
+
+
+def timed(db: Session, query, argument) -> float:
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        db.exec(query(argument)).all()
+    return (time.perf_counter() - start) / REPEAT
+
+
+if __name__ == "__main__":
+    drop_db_and_tables()
+    create_db_and_tables()
+    start = time.perf_counter()
+    create_mock_data(NB_PERFORMANCES)
+    print(
+        f"{NB_PERFORMANCES} performances created in {time.perf_counter() - start:.1f} s"
+    )
+    print(f"{engine.dialect.name}, mean of {REPEAT} runs")
+    with Session(engine) as db:
+        for name, (query, nested, argument) in QUERIES.items():
+            db.exec(query(argument)).all()  # warm up the caches
+            after = timed(db, query, argument)
+            line = f"{name:30} join: {after * 1000:8.2f} ms"
+            if nested is not None:
+                assert sorted(map(str, db.exec(query(argument)))) == sorted(
+                    map(str, db.exec(nested(argument)))
+                )
+                before = timed(db, nested, argument)
+                line += f"   nested IN: {before * 1000:8.2f} ms ({before / after:.1f}x)"
+            print(line)
@@ -0,0 +1,20 @@
+"""Database of the benchmarks.
+
+The benchmarks drop and rebuild the tables of their database, so they never use the
+`DATABASE_URI` of the settings: the database is given by `BENCH_DATABASE_URI` (SQLite or
+PostgreSQL), and is a temporary SQLite file by default. The engine of `backend.database` is
+created on import, so this module is imported by the benchmarks before any module of the
+application.
+"""
+
+import os
+import sys
+import tempfile
+
+if "config" in sys.modules:
+    raise RuntimeError("benchmarks.database must be imported before the settings")
+
+BENCH_DATABASE_URI = os.environ.get("BENCH_DATABASE_URI") or (
+    "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="bench-"), "bench.db")
+)
+os.environ["DATABASE_URI"] = BENCH_DATABASE_URI
@@ -4,12 +4,13 @@ A Club is an organization that can be associated to a Skater.
 
 from typing import Optional, Literal
 from enum import Enum
-from datetime import date
+from datetime import date, datetime
+import unicodedata
 
 from pydantic import BaseModel, computed_field
+from sqlalchemy import JSON, Column, Index, event
 from sqlmodel import SQLModel, Field, Relationship
 
-
 # =================== INSCRIPTION MODELS =====================
 
 
@@ -18,7 +19,7 @@ class Inscription(SQLModel, table=True):
         default=None, foreign_key="skater.id", primary_key=True
     )
     category_id: int | None = Field(
-        default=None, foreign_key="category.id", primary_key=True
+        default=None, foreign_key="category.id", primary_key=True, index=True
     )
 
 
@@ -41,7 +42,7 @@ class PanelBase(SQLModel):
     technical_controller: str | None = None
     data_operator: str | None = None
     replay_operator: str | None = None
-    category_id: int | None = Field(default=None, foreign_key="category.id")
+    category_id: int | None = Field(default=None, foreign_key="category.id", index=True)
 
 
 class Panel(PanelBase, table=True):
@@ -66,7 +67,7 @@ class CategoryBase(SQLModel):
     fs_judge_scores: str | None = None
     results_url: str | None = None
 
-    competition_id: int = Field(foreign_key="competition.id")
+    competition_id: int = Field(foreign_key="competition.id", index=True)
 
     @computed_field
     def name(self) -> str:
@@ -143,11 +144,25 @@ class SkaterBase(SQLModel):
     birth_date: Optional[str] = None
     genre: str
     nation: Optional[str]
-    club_id: Optional[int] = Field(default=None, foreign_key="club.id")
+    club_id: Optional[int] = Field(default=None, foreign_key="club.id", index=True)
+
+
+def normalize_full_name(full_name: str) -> str:
+    """Key used to match the names of the results website with skaters: accents, case and
+    repeated spaces are ignored, e.g. "Léa  MARTIN" -> "lea martin" """
+    decomposed = unicodedata.normalize("NFKD", full_name)
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(stripped.casefold().split())
 
 
 class Skater(SkaterBase, table=True):
+    __table_args__ = (
+        Index("ix_skater_full_name_key_club_id", "full_name_key", "club_id"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
+    # Normalized "first_name last_name", kept up to date by `set_skater_full_name_key`
+    full_name_key: Optional[str] = None
 
     club: Optional["Club"] = Relationship(back_populates="skaters")
 
@@ -157,6 +172,14 @@ class Skater(SkaterBase, table=True):
     performances: list["Performance"] = Relationship(back_populates="skater")
 
 
+@event.listens_for(Skater, "before_insert")
+@event.listens_for(Skater, "before_update")
+def set_skater_full_name_key(mapper, connection, skater: Skater):
+    skater.full_name_key = normalize_full_name(
+        f"{skater.first_name} {skater.last_name}"
+    )
+
+
 class SkaterCreate(SkaterBase):
     pass
 
@@ -228,6 +251,11 @@ class CompetitionBase(SQLModel):
 
 
 class Competition(CompetitionBase, table=True):
+    __table_args__ = (
+        Index("ix_competition_name_season", "name", "season"),
+        Index("ix_competition_season", "season"),
+    )
+
     id: int | None = Field(default=None, primary_key=True)
     categories: list["Category"] = Relationship(back_populates="competition")
 
@@ -255,7 +283,7 @@ class CompetitionUpdate(SQLModel):
 
 # =================== PERFORMANCE MODELS =====================
 class PerformanceBase(SQLModel):
-    skater_id: int | None = Field(default=None, foreign_key="skater.id")
+    skater_id: int | None = Field(default=None, foreign_key="skater.id", index=True)
     category_id: int | None = Field(default=None, foreign_key="category.id")
     withdrawn: bool | None
     disqualified: bool | None
@@ -265,13 +293,30 @@ class PerformanceBase(SQLModel):
 
 
 class Performance(PerformanceBase, table=True):
+    __table_args__ = (
+        Index("ix_performance_category_id_skater_id", "category_id", "skater_id"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
 
     skater: "Skater" = Relationship(back_populates="performances")
     category: "Category" = Relationship(back_populates="performances")
 
-    short_program: Optional["Program"] = Relationship(back_populates="performance")
-    free_skating: Optional["Program"] = Relationship(back_populates="performance")
+    # Both programs are linked with Program.performance_id, told apart by their type
+    short_program: Optional["Program"] = Relationship(
+        sa_relationship_kwargs={
+            "primaryjoin": "and_(Performance.id == foreign(Program.performance_id), Program.type == 'SP')",
+            "uselist": False,
+            "viewonly": True,
+        }
+    )
+    free_skating: Optional["Program"] = Relationship(
+        sa_relationship_kwargs={
+            "primaryjoin": "and_(Performance.id == foreign(Program.performance_id), Program.type == 'FS')",
+            "uselist": False,
+            "viewonly": True,
+        }
+    )
 
 
 class PerformanceCreate(PerformanceBase):
@@ -323,10 +368,76 @@ class ProgramBase(SQLModel):
 
 
 class Program(ProgramBase, table=True):
+    __table_args__ = (
+        Index("ix_program_performance_id_type", "performance_id", "type"),
+    )
+
     id: int | None = Field(default=None, primary_key=True)
     performance: Optional["Performance"] = Relationship()
 
 
+# =================== SKATER SUMMARY MODELS =====================
+
+
+# Season summary of a skater, aggregated from its performances and programs. The rows of
+# the skaters of a category are recomputed when the category is ingested.
+class SkaterSeasonSummaryBase(SQLModel):
+    skater_id: int = Field(foreign_key="skater.id")
+    season: str
+    competitions: int
+    performances: int
+    podiums: int
+    best_rank: int | None
+    best_score: float | None
+    average_score: float | None
+    sp_best_score: float | None
+    sp_average_score: float | None
+    fs_best_score: float | None
+    fs_average_score: float | None
+
+
+class SkaterSeasonSummary(SkaterSeasonSummaryBase, table=True):
+    __table_args__ = (
+        Index(
+            "ix_skaterseasonsummary_skater_id_season",
+            "skater_id",
+            "season",
+            unique=True,
+        ),
+    )
+
+    id: int | None = Field(default=None, primary_key=True)
+
+
+class SkaterSeasonSummaryRead(SkaterSeasonSummaryBase):
+    pass
+
+
+# =================== CRAWL JOB MODELS =====================
+
+
+class CrawlStatus(str, Enum):
+    DONE = "done"
+    FAILED = "failed"
+
+
+class CrawlJob(SQLModel, table=True):
+    """Crawl state of a unit of work of a competition: the links table of the competition
+    (no category), a category (no segment) or the programs of a segment ("SP" or "FS") of a
+    category. Units without a job are still to be crawled."""
+
+    id: int | None = Field(default=None, primary_key=True)
+    competition_id: int = Field(foreign_key="competition.id", index=True)
+    category: str | None = None
+    segment: str | None = None
+    category_id: int | None = Field(default=None, foreign_key="category.id", index=True)
+    status: CrawlStatus
+    error: str | None = None
+    # Content hash of the pages of a category, by URL, to refresh only the changed pages
+    page_hashes: dict[str, str] | None = Field(default=None, sa_column=Column(JSON))
+    updated_at: datetime
+
+
 # =================== HEALTH MODELS =====================
 
 
@@ -341,8 +452,20 @@ class Health(BaseModel):
     environment: Literal["development", "staging", "production"] | None
 
 
+class PoolStatus(BaseModel):
+    size: int
+    checked_out: int
+    overflow: int
+    checkouts: int
+    mean_wait_ms: float
+    max_wait_ms: float
+    overflows: int
+    timeouts: int
+
+
 class Stats(BaseModel):
     skaters: int | None
     clubs: int | None
     competitions: int | None
     performances: int | None
+    estimated: bool = False
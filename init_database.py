@@ -1,10 +1,27 @@
+import argparse
 import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
 import yaml
 from sqlmodel import Session, select
 
+from backend.cache import invalidate_cache
 from backend.database import engine
 from commons.schemas import Competition
+from backend.crawler.competition_crawler import (
+    get_category_entries,
+    get_links_table,
+    parse_category_genre,
+    prefetch_pages,
+)
 from backend.crud.competition import crawl_competition
+from backend.crud.crawl_job import CrawlJobs, is_competition_crawled
+from backend.crud.identity_map import IdentityMap
+from backend.crud.summary import (
+    defer_summaries,
+    summarize_competition,
+    summarize_deferred,
+)
 from logger import logger_config
 from backend.database import drop_db_and_tables, create_db_and_tables
 
@@ -13,7 +30,27 @@ from commons.schemas import *
 logger = logger_config(__name__)
 
 
-def initialize_competitions(rebuild_all: bool = False):
+def read_competitions() -> list[dict]:
+    """Read the competitions of the season files of the 'competitions' folder, in the order
+    of the seasons and of the files"""
+    competitions = []
+    for season in sorted(os.listdir("competitions")):
+        if season.endswith(".yaml"):
+            with open(f"competitions/{season}", "r") as file:
+                season_data = yaml.safe_load(file)
+                season_name = season_data["season"]
+                circuits = season_data["circuits"]
+                for circuit in circuits:
+                    for competition in circuit["competitions"]:
+                        competition["season"] = season_name
+                        competition["circuit"] = circuit["name"]
+                        competitions.append(competition)
+    return competitions
+
+
+def initialize_competitions(
+    rebuild_all: bool = False, workers: int = 1, refresh: bool = False
+):
     """Initialize the database with the competitions listed in the 'competitions' folder. Each season is a YAML file where
     competitions are listed in the following format:
     ```
@@ -30,43 +67,174 @@ def initialize_competitions(rebuild_all: bool = False):
                 rink_name: "Patinoire Philippe Candeloro"
                 url: "http://isujs.so.free.fr/Resultats/Resultats-2023-2024/TF-PRIDO/index.htm"
     ```
+    Competitions whose crawl did not complete are resumed, and with `refresh` the already
+    crawled competitions are updated from the pages that changed on the website. With more
+    than one worker, the competitions are ingested in parallel by `ingest_competitions`.
     """
 
     if rebuild_all:
         drop_db_and_tables()
         create_db_and_tables()
+    new_competitions = []
+    with Session(engine) as session:
+        for competition in read_competitions():
+            comp_db = session.exec(
+                select(Competition).where(
+                    Competition.name == competition["name"],
+                    Competition.season == competition["season"],
+                )
+            ).first()
+            if comp_db and not refresh and is_competition_crawled(comp_db.id, session):
+                logger.info(
+                    f"Competition {competition['name']} already exists with id {comp_db.id}"
+                )
+                continue
+            if comp_db:
+                logger.info(
+                    f"{'Refreshing' if refresh else 'Resuming'} the crawl of competition {comp_db.name} with id {comp_db.id}"
+                )
+                comp = comp_db
+            else:
+                comp = Competition(**competition)
+                session.add(comp)
+                session.commit()
+                session.refresh(comp)
+            assert comp.id is not None
+            if workers > 1:
+                new_competitions.append(comp.id)
+                continue
+            crawl_competition(comp.id, session, refresh=refresh)
+            logger.info(f"Competition {comp.name} crawled with id {comp.id} ({comp})")
+    if len(new_competitions) > 0:
+        ingest_competitions(new_competitions, workers, refresh)
+
+
+def crawl_links_table(competition: Competition, done: set[str]) -> dict | None:
+    """Crawl the links table of a competition and the pages of its categories not done yet"""
+    links_table = get_links_table(competition, prefetch=False)
+    if links_table is not None:
+        prefetch_pages(cat for cat in links_table.values() if cat["name"] not in done)
+    return links_table
+
+
+def ingest_competition(
+    competition_id: int, links_table: dict | None, refresh: bool = False
+) -> dict[str, set[int]]:
+    """Ingest the categories of a competition in its own session. The summaries of its
+    skaters are not recomputed: other workers may be writing their performances. Returns the
+    skaters to summarize by season."""
+    with Session(engine) as session:
+        deferred = defer_summaries(session)
+        crawl_competition(competition_id, session, links_table, refresh)
+    return deferred
+
+
+def dispose_engine():
+    """Drop the database connections inherited from the parent process"""
+    engine.dispose(close=False)
+
+
+def ingest_competitions(
+    competition_ids: list[int], workers: int, refresh: bool = False
+):
+    """Ingest competitions in parallel, in three steps:
+
+    1. the links tables of the competitions, and the pages of their unfinished categories, are
+       crawled in threads.
+       The HTTP concurrency is capped for the whole process by the crawler's fetcher.
+    2. the clubs and skaters of all the entries are created in a single session, in the order
+       of the competitions, so that shared rows are merged deterministically whatever the
+       number of workers.
+    3. the categories of each competition are ingested by a pool of processes, each with its
+       own session. SQLite only allows one writer, its competitions are ingested one after
+       the other. The summaries of the skaters are then recomputed once, from the committed
+       performances of all the competitions.
+    """
+    with Session(engine) as session:
+        competitions = [session.get(Competition, id) for id in competition_ids]
+        done = [
+            set() if refresh else CrawlJobs(id, session).done_categories()
+            for id in competition_ids
+        ]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        links_tables = list(executor.map(crawl_links_table, competitions, done))
+
+    with Session(engine) as session:
+        identity_map = IdentityMap(session)
+        for links_table, done_categories in zip(links_tables, done):
+            if links_table is None:
+                continue
+            for cat in links_table.values():
+                if cat["name"] in done_categories:
+                    continue
+                df_entry = get_category_entries(
+                    cat["entries_link"], cat.get("pages", {}).get(cat["entries_link"])
+                )
+                if df_entry is not None:
+                    identity_map.resolve_entries(
+                        df_entry, parse_category_genre(cat["name"])
+                    )
+        session.commit()
+    logger.info(
+        f"{len(identity_map.clubs)} clubs and {len(identity_map.skaters)} skaters after merging the entries"
+    )
+
+    deferred = {}  # type: dict[str, set[int]]
+    failed = []
+    if engine.dialect.name == "sqlite":
+        for competition_id, links_table in zip(competition_ids, links_tables):
+            for season, skaters in ingest_competition(
+                competition_id, links_table, refresh
+            ).items():
+                deferred.setdefault(season, set()).update(skaters)
+            logger.info(f"Competition {competition_id} ingested")
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=dispose_engine
+        ) as executor:
+            futures = {
+                executor.submit(
+                    ingest_competition, competition_id, links_table, refresh
+                ): competition_id
+                for competition_id, links_table in zip(competition_ids, links_tables)
+            }
+            for future in as_completed(futures):
+                try:
+                    for season, skaters in future.result().items():
+                        deferred.setdefault(season, set()).update(skaters)
+                    logger.info(f"Competition {futures[future]} ingested")
+                except Exception as e:
+                    logger.error(f"Could not ingest competition {futures[future]}: {e}")
+                    failed.append(futures[future])
+
     with Session(engine) as session:
-        for season in os.listdir("competitions"):
-            if season.endswith(".yaml"):
-                with open(f"competitions/{season}", "r") as file:
-                    season_data = yaml.safe_load(file)
-                    season_name = season_data["season"]
-                    circuits = season_data["circuits"]
-                    for circuit in circuits:
-                        for competition in circuit["competitions"]:
-                            comp_db = session.exec(
-                                select(Competition).where(
-                                    Competition.name == competition["name"],
-                                    Competition.season == season_name,
-                                )
-                            ).first()
-                            if comp_db:
-                                logger.info(
-                                    f"Competition {competition['name']} already exists with id {comp_db.id}"
-                                )
-                            else:
-                                competition["season"] = season_name
-                                competition["circuit"] = circuit["name"]
-                                comp = Competition(**competition)
-                                session.add(comp)
-                                session.commit()
-                                session.refresh(comp)
-                                assert comp.id is not None
-                                crawl_competition(comp.id, session)
-                                logger.info(
-                                    f"Competition {comp.name} created with id {comp.id} ({comp})"
-                                )
+        summarize_deferred(deferred, session)
+        # The skaters touched by a failed worker are unknown: its categories are summarized
+        for competition_id in failed:
+            summarize_competition(competition_id, session)
+        session.commit()
+    invalidate_cache()
 
 
 if __name__ == "__main__":
-    initialize_competitions(rebuild_all=False)
+    parser = argparse.ArgumentParser(
+        description="Initialize the database with the competitions of the 'competitions' folder"
+    )
+    parser.add_argument(
+        "--rebuild", action="store_true", help="drop and create the database"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help=f"number of competitions ingested in parallel (e.g. {os.cpu_count()})",
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="update the crawled competitions from the pages that changed",
+    )
+    args = parser.parse_args()
+    initialize_competitions(
+        rebuild_all=args.rebuild, workers=args.workers, refresh=args.refresh
+    )
@@ -0,0 +1,209 @@
+from contextlib import contextmanager
+from datetime import date
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import Engine, create_engine, event
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel
+
+from api.auth import authent
+from app import create_app
+from backend.cache import invalidate_cache
+from backend.crawler import competition_crawler, fetcher
+from backend.database import get_session
+from commons.schemas import *
+from config import settings
+
+
+class QueryCounter:
+    """Statements executed on an engine while counting"""
+
+    def __init__(self):
+        self.statements: list[str] = []
+
+    def __len__(self) -> int:
+        return len(self.statements)
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+
+@contextmanager
+def count_queries(engine: Engine):
+    counter = QueryCounter()
+    event.listen(engine, "before_cursor_execute", counter)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, "before_cursor_execute", counter)
+
+
+@pytest.fixture
+def assert_max_queries():
+    """Fail if the block runs more than `expected` statements on the engine:
+    ```
+        with assert_max_queries(engine, 3):
+            client.get("/categories")
+    ```
+    """
+
+    @contextmanager
+    def check(engine: Engine, expected: int):
+        with count_queries(engine) as counter:
+            yield counter
+        assert len(counter) <= expected, "\n".join(
+            [f"{len(counter)} queries instead of at most {expected}:"]
+            + counter.statements
+        )
+
+    return check
+
+
+NB_ROWS = 100
+
+
+def program(type: str, performance_id: int) -> Program:
+    return Program(
+        type=type,
+        rank=1,
+        starting_number=1,
+        total_segment_score=20.0,
+        total_element_score=None,
+        total_component_score=None,
+        composition=None,
+        presentation=None,
+        skating_skills=None,
+        performance_id=performance_id,
+    )
+
+
+@pytest.fixture
+def engine():
+    """Database of NB_ROWS rows in each table, with the relationships of the read models"""
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        clubs = [Club(abbrev=f"CLUB{i}") for i in range(NB_ROWS)]
+        competitions = [
+            Competition(
+                name=f"Competition {i}",
+                type="TF",
+                season="2023-2024",
+                start=None,
+                end=None,
+                location=None,
+                rink_name=None,
+                url=None,
+            )
+            for i in range(NB_ROWS)
+        ]
+        session.add_all([*clubs, *competitions])
+        session.flush()
+        skaters = [
+            Skater(
+                first_name=f"First{i}",
+                last_name=f"LAST{i}",
+                genre="Dames",
+                nation="FRA",
+                club_id=club.id,
+            )
+            for i, club in enumerate(clubs)
+        ]
+        categories = [
+            Category(genre="Dames", age="Senior", level="R1", competition_id=c.id)
+            for c in competitions
+        ]
+        session.add_all([*skaters, *categories])
+        session.flush()
+        session.add_all([Panel(referee="REF", category_id=c.id) for c in categories])
+        performances = [
+            Performance(
+                skater_id=skater.id,
+                category_id=category.id,
+                withdrawn=False,
+                disqualified=False,
+                rank=1,
+                score=40.0,
+                total_entries=1,
+            )
+            for skater, category in zip(skaters, categories)
+        ]
+        session.add_all(performances)
+        session.flush()
+        session.add_all([program(t, p.id) for p in performances for t in ["SP", "FS"]])
+        session.commit()
+    return engine
+
+
+@pytest.fixture
+def client(engine):
+    def session():
+        with Session(engine) as session:
+            yield session
+
+    app = create_app(settings)
+    app.dependency_overrides[get_session] = session
+    app.dependency_overrides[authent] = lambda: True
+    invalidate_cache()
+    return TestClient(app)
+
+
+PAGES = Path(__file__).parent.parent / "crawler" / "pages"
+SITE_URL = "http://isujs.so.free.fr/Resultats/Resultats-2023-2024/TF-PRIDO/"
+
+
+@pytest.fixture
+def site(monkeypatch) -> dict[str, bytes]:
+    """Pages served to the crawler instead of the results website, by URL. Starts with the
+    saved sample pages, pages can be changed or removed during a test."""
+    pages = {SITE_URL + page.name: page.read_bytes() for page in PAGES.iterdir()}
+    monkeypatch.setattr(competition_crawler, "fetch", pages.get)
+    monkeypatch.setattr(fetcher, "fetch", pages.get)
+    return pages
+
+
+def create_empty_engine() -> Engine:
+    """Empty database enforcing the foreign keys, as PostgreSQL does"""
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+
+    @event.listens_for(engine, "connect")
+    def enforce_foreign_keys(conn, record):
+        conn.execute("PRAGMA foreign_keys = ON")
+
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+
+@pytest.fixture
+def empty_engine():
+    return create_empty_engine()
+
+
+def create_competition(engine: Engine) -> int:
+    """Competition of the saved sample pages, not crawled"""
+    with Session(engine) as session:
+        competition = Competition(
+            name="TF Prido",
+            type="TF",
+            season="2023-2024",
+            start=date(2023, 12, 2),
+            end=date(2023, 12, 3),
+            location=None,
+            rink_name=None,
+            url=SITE_URL + "index.htm",
+        )
+        session.add(competition)
+        session.commit()
+        assert competition.id is not None
+        return competition.id
+
+
+@pytest.fixture
+def competition_id(empty_engine) -> int:
+    return create_competition(empty_engine)
@@ -0,0 +1,157 @@
+"""The bulk insert of the performances and programs of a crawled category writes the same
+rows as the former ORM path"""
+
+from sqlmodel import Session, col, select
+
+from conftest import SITE_URL, create_competition, create_empty_engine
+from backend.crawler.competition_crawler import (
+    get_category_entries,
+    get_category_panel,
+    get_category_results,
+    get_links_table,
+    get_program_detailed_results,
+    parse_category_age,
+    parse_category_genre,
+    parse_category_level,
+)
+from backend.crud.category import (
+    build_panel,
+    category_links,
+    create_category_from_crawler,
+    performance_values,
+    program_values,
+    read_segments,
+)
+from backend.crud.identity_map import IdentityMap
+from backend.crud.skater import find_skater_ids
+from commons.schemas import *
+
+CATEGORY = "R1 Junior-Senior Dames"
+
+
+def create_category_with_orm(crawled: dict, competition: Competition, db: Session):
+    """Former write path of `create_category_from_crawler`: an ORM object per row, a commit
+    per stage and a SELECT per program to find its performance"""
+    pages = crawled["pages"]
+    segment = read_segments(crawled)
+    category = Category(
+        competition_id=competition.id,
+        genre=parse_category_genre(crawled["name"]),
+        level=parse_category_level(crawled["name"]),
+        age=parse_category_age(crawled["name"]),
+        **category_links(crawled, segment),
+    )
+    for seg, panel in [("SP", "sp_panel"), ("FS", "fs_panel")]:
+        url = segment[seg]["officials"]
+        if url is not None:
+            setattr(category, panel, build_panel(get_category_panel(url, pages[url])))
+    db.add(category)
+    db.commit()
+
+    df_entry = get_category_entries(
+        crawled["entries_link"], pages[crawled["entries_link"]]
+    )
+    skater_ids = IdentityMap(db).resolve_entries(df_entry, category.genre)
+    db.add_all(
+        [
+            Inscription(skater_id=skater_id, category_id=category.id)
+            for skater_id in dict.fromkeys(skater_ids)
+        ]
+    )
+    db.commit()
+
+    df_perfs = get_category_results(category.results_url, pages[category.results_url])
+    nb_valid_entries = len(df_perfs.query("FinalRank not in ['WD', 'DSQ']"))
+    skater_ids = find_skater_ids(list(zip(df_perfs["Name"], df_perfs["Club"])), db)
+    db.add_all(
+        [
+            Performance(
+                **performance_values(perf, skater_id, category.id, nb_valid_entries)
+            )
+            for (_, perf), skater_id in zip(df_perfs.iterrows(), skater_ids)
+        ]
+    )
+    db.commit()
+
+    for seg in ["SP", "FS"]:
+        url = segment[seg]["details"]
+        df_progs = get_program_detailed_results(url, pages[url])
+        skater_ids = find_skater_ids(list(zip(df_progs["Name"], df_progs["Club"])), db)
+        programs = []
+        for (_, prog), skater_id in zip(df_progs.iterrows(), skater_ids):
+            performance = db.exec(
+                select(Performance)
+                .where(Performance.category_id == category.id)
+                .where(Performance.skater_id == skater_id)
+            ).first()
+            assert performance is not None
+            programs.append(Program(**program_values(prog, seg, performance.id)))
+        db.add_all(programs)
+        db.commit()
+
+
+def crawled_category(engine) -> tuple[dict, Competition]:
+    with Session(engine) as session:
+        competition = session.get(Competition, create_competition(engine))
+        assert competition is not None
+        links_table = get_links_table(competition)
+        assert links_table is not None
+        return links_table[CATEGORY], competition
+
+
+def stored_rows(engine) -> dict[str, list]:
+    """Rows of the category, without their ids, the rows linked to skaters by skater name"""
+    with Session(engine) as session:
+        category = session.exec(select(Category)).one()
+        panels = session.exec(select(Panel)).all()
+        inscriptions = session.exec(
+            select(Skater.first_name, Skater.last_name).join(Inscription)
+        ).all()
+        performances = session.exec(
+            select(Skater.first_name, Skater.last_name, Performance).join(Performance)
+        ).all()
+        programs = session.exec(
+            select(Skater.first_name, Skater.last_name, Program)
+            .join(Performance, col(Program.performance_id) == Performance.id)
+            .join(Skater)
+        ).all()
+        return {
+            "category": [category.model_dump(exclude={"id", "competition_id"})],
+            "panels": sorted(
+                str(p.model_dump(exclude={"id", "category_id"})) for p in panels
+            ),
+            "inscriptions": sorted(inscriptions),
+            "performances": sorted(
+                (
+                    first,
+                    last,
+                    str(p.model_dump(exclude={"id", "skater_id", "category_id"})),
+                )
+                for first, last, p in performances
+            ),
+            "programs": sorted(
+                (first, last, str(p.model_dump(exclude={"id", "performance_id"})))
+                for first, last, p in programs
+            ),
+        }
+
+
+def test_bulk_insert_writes_the_same_rows_as_the_orm(site):
+    # The free skating reuses the pages of the short program
+    site[SITE_URL + "SEG002.htm"] = site[SITE_URL + "SEG001.htm"]
+    site[SITE_URL + "SEG002OF.htm"] = site[SITE_URL + "SEG001OF.htm"]
+
+    bulk_engine = create_empty_engine()
+    crawled, competition = crawled_category(bulk_engine)
+    with Session(bulk_engine) as session:
+        create_category_from_crawler(crawled, competition, session)
+
+    orm_engine = create_empty_engine()
+    crawled, competition = crawled_category(orm_engine)
+    with Session(orm_engine) as session:
+        create_category_with_orm(crawled, competition, session)
+
+    rows = stored_rows(bulk_engine)
+    assert len(rows["performances"]) == 4
+    assert len(rows["programs"]) == 8
+    assert rows == stored_rows(orm_engine)
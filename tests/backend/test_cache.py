@@ -0,0 +1,79 @@
+"""Response cache of the read endpoints"""
+
+import time
+
+from sqlmodel import Session
+
+from backend.cache import LRUCache
+from backend.crud import competition
+from backend.crud.competition import crawl_competition
+from commons.schemas import Competition
+
+
+def test_cached_response(client, engine, assert_max_queries):
+    first = client.get("/categories", params={"limit": 10})
+    with assert_max_queries(engine, 0):
+        second = client.get("/categories", params={"limit": 10})
+    assert second.status_code == 200
+    assert second.json() == first.json()
+    assert second.headers["etag"] == first.headers["etag"]
+    assert second.headers["x-next-cursor"] == first.headers["x-next-cursor"]
+    assert first.headers["etag"] != client.get("/categories").headers["etag"]
+
+
+def test_not_modified(client, engine, assert_max_queries):
+    etag = client.get("/competitions/1").headers["etag"]
+    with assert_max_queries(engine, 0):
+        response = client.get("/competitions/1", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+    response = client.get("/competitions/1", headers={"If-None-Match": '"other"'})
+    assert response.status_code == 200
+
+
+def test_invalidated_by_crud(client):
+    params = {"offset": 95}
+    etag = client.get("/clubs", params=params).headers["etag"]
+    assert client.post("/clubs", json={"abbrev": "NEW"}).status_code == 200
+    response = client.get("/clubs", params=params, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()[-1]["abbrev"] == "NEW"
+    assert client.get("/clubs/1").status_code == 200
+    assert client.delete("/clubs/1").status_code == 200
+    assert client.get("/clubs/1").status_code == 404
+
+
+def test_invalidated_by_crawl(client, engine, monkeypatch):
+    client.get("/competitions/1")
+    monkeypatch.setattr(competition, "get_links_table", lambda *args, **kwargs: {})
+    monkeypatch.setattr(competition, "prefetch_pages", lambda categories: None)
+    with Session(engine) as db:
+        crawl_competition(1, db)
+    with Session(engine) as db:
+        competition_to_update = db.get(Competition, 1)
+        competition_to_update.name = "Renamed"
+        db.commit()
+    assert client.get("/competitions/1").json()["name"] == "Renamed"
+
+
+def test_errors_are_not_cached(client, engine, assert_max_queries):
+    assert client.get("/skaters/1000").status_code == 404
+    with assert_max_queries(engine, 1):
+        assert client.get("/skaters/1000").status_code == 404
+
+
+def test_lru_cache(monkeypatch):
+    cache = LRUCache(maxsize=2, ttl=10)
+    for key in "abc":
+        cache.set(key, key, cache.generation())
+    assert cache.get("a") is None
+    assert cache.get("b") == "b"
+    generation = cache.generation()
+    cache.clear()
+    cache.set("d", "d", generation)
+    assert cache.get("d") is None
+    cache.set("d", "d", cache.generation())
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 11)
+    assert cache.get("d") is None
@@ -0,0 +1,52 @@
+"""Concurrent requests do not wait for each other's database calls"""
+
+import asyncio
+import time
+
+import httpx
+from sqlalchemy import create_engine, event
+from sqlmodel import Session, SQLModel
+
+from api.auth import authent
+from app import create_app
+from backend.cache import invalidate_cache
+from backend.database import get_session
+from commons.schemas import *
+from config import settings
+
+LATENCY = 0.1
+NB_REQUESTS = 10
+
+
+def test_database_calls_run_concurrently(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'db.sqlite'}")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(Club(abbrev="TOAC"))
+        session.commit()
+    event.listen(engine, "before_cursor_execute", lambda *args: time.sleep(LATENCY))
+
+    def session():
+        with Session(engine) as session:
+            yield session
+
+    app = create_app(settings)
+    app.dependency_overrides[get_session] = session
+    app.dependency_overrides[authent] = lambda: True
+    invalidate_cache()
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://t"
+        ) as client:
+            return await asyncio.gather(
+                *(client.get("/clubs/1") for _ in range(NB_REQUESTS))
+            )
+
+    start = time.perf_counter()
+    responses = asyncio.run(run())
+    elapsed = time.perf_counter() - start
+    assert all(response.status_code == 200 for response in responses)
+    # One request at a time would take NB_REQUESTS * LATENCY
+    assert elapsed < NB_REQUESTS * LATENCY / 2
@@ -0,0 +1,228 @@
+"""Crawl of the saved sample pages of a competition. The pages of the "Poussin Messieurs"
+category are not saved, it always fails."""
+
+from sqlmodel import Session, func, select
+
+from conftest import SITE_URL, count_queries
+from backend.crud.category import sync_rows
+from backend.crud.competition import crawl_competition
+from backend.crud.crawl_job import CrawlJobs
+from commons.schemas import *
+
+CATEGORY = "R1 Junior-Senior Dames"
+
+
+def crawl(engine, competition_id: int, refresh: bool = False):
+    with Session(engine) as session:
+        crawl_competition(competition_id, session, refresh=refresh)
+
+
+def count(engine, model) -> int:
+    with Session(engine) as session:
+        return session.exec(select(func.count()).select_from(model)).one()
+
+
+def category_job(engine, competition_id: int, category: str = CATEGORY) -> CrawlJob:
+    with Session(engine) as session:
+        job = CrawlJobs(competition_id, session).get(category)
+        assert job is not None
+        return job
+
+
+def test_missing_entries_fail_the_category(site, empty_engine, competition_id):
+    crawl(empty_engine, competition_id)
+
+    job = category_job(empty_engine, competition_id, "Poussin Messieurs")
+    assert job.status == CrawlStatus.FAILED
+    assert job.category_id is None
+    assert "Could not get entries" in (job.error or "")
+    assert category_job(empty_engine, competition_id).status == CrawlStatus.DONE
+    assert count(empty_engine, Category) == 1
+    with Session(empty_engine) as session:
+        assert not CrawlJobs(competition_id, session).done()
+
+
+def test_missing_results_are_crawled_again(site, empty_engine, competition_id):
+    results = site.pop(SITE_URL + "CAT001RS.htm")
+    crawl(empty_engine, competition_id)
+
+    job = category_job(empty_engine, competition_id)
+    assert job.status == CrawlStatus.FAILED
+    assert "Could not get results" in (job.error or "")
+    assert count(empty_engine, Category) == 0
+    assert count(empty_engine, Inscription) == 0
+
+    site[SITE_URL + "CAT001RS.htm"] = results
+    crawl(empty_engine, competition_id)
+
+    assert category_job(empty_engine, competition_id).status == CrawlStatus.DONE
+    assert count(empty_engine, Category) == 1
+    assert count(empty_engine, Performance) == 4
+
+
+def test_refresh_with_unreadable_results_fails_and_recreates(
+    site, empty_engine, competition_id
+):
+    crawl(empty_engine, competition_id)
+    category_id = category_job(empty_engine, competition_id).category_id
+
+    results = site[SITE_URL + "CAT001RS.htm"]
+    site[SITE_URL + "CAT001RS.htm"] = b"<html><body></body></html>"
+    crawl(empty_engine, competition_id, refresh=True)
+
+    job = category_job(empty_engine, competition_id)
+    assert job.status == CrawlStatus.FAILED
+    assert job.category_id == category_id
+    assert "Could not get results" in (job.error or "")
+    assert count(empty_engine, Performance) == 4
+
+    site[SITE_URL + "CAT001RS.htm"] = results
+    crawl(empty_engine, competition_id)
+
+    job = category_job(empty_engine, competition_id)
+    assert job.status == CrawlStatus.DONE
+    assert job.error is None
+    assert count(empty_engine, Category) == 1
+    assert count(empty_engine, Performance) == 4
+    assert count(empty_engine, Inscription) == 4
+
+
+def writes(statements: list[str]) -> list[str]:
+    return [
+        statement
+        for statement in statements
+        if statement.lstrip().split()[0] in ("INSERT", "UPDATE", "DELETE")
+    ]
+
+
+def test_refresh_of_unchanged_pages_writes_nothing(site, empty_engine, competition_id):
+    crawl(empty_engine, competition_id)
+
+    with count_queries(empty_engine) as counter:
+        crawl(empty_engine, competition_id, refresh=True)
+    assert writes(counter.statements) == []
+
+
+def test_refresh_updates_the_changed_results(site, empty_engine, competition_id):
+    crawl(empty_engine, competition_id)
+    with Session(empty_engine) as session:
+        before = session.exec(select(Performance.id).order_by(Performance.id)).all()
+
+    results = SITE_URL + "CAT001RS.htm"
+    site[results] = site[results].replace(b"78.42", b"79.42")
+    with count_queries(empty_engine) as counter:
+        crawl(empty_engine, competition_id, refresh=True)
+
+    # Only the changed performance is updated, in place
+    assert [
+        statement
+        for statement in writes(counter.statements)
+        if "performance" in statement.split()[:3]
+    ] == ["UPDATE performance SET score=? WHERE performance.id = ?"]
+    with Session(empty_engine) as session:
+        assert session.exec(select(Performance.id).order_by(Performance.id)).all() == (
+            before
+        )
+        assert (
+            session.exec(
+                select(Performance.score)
+                .join(Skater)
+                .where(Skater.last_name == "MARTIN")
+            ).one()
+            == 79.42
+        )
+        assert category_job(empty_engine, competition_id).status == CrawlStatus.DONE
+
+
+def test_failed_segment_is_resumed(site, empty_engine, competition_id):
+    details = site.pop(SITE_URL + "SEG001.htm")
+    crawl(empty_engine, competition_id)
+
+    with Session(empty_engine) as session:
+        job = CrawlJobs(competition_id, session).get(CATEGORY, "SP")
+        assert job is not None and job.status == CrawlStatus.FAILED
+    assert count(empty_engine, Program) == 0
+
+    site[SITE_URL + "SEG001.htm"] = details
+    crawl(empty_engine, competition_id)
+
+    with Session(empty_engine) as session:
+        job = CrawlJobs(competition_id, session).get(CATEGORY, "SP")
+        assert job is not None and job.status == CrawlStatus.DONE
+    assert count(empty_engine, Program) == 4
+    assert count(empty_engine, Performance) == 4
+
+
+def test_refresh_of_a_competition_crawled_without_jobs(
+    site, empty_engine, competition_id
+):
+    crawl(empty_engine, competition_id)
+    # Crawled before the crawl jobs existed
+    with Session(empty_engine) as session:
+        for job in session.exec(select(CrawlJob)):
+            session.delete(job)
+        session.commit()
+        category_id = session.exec(select(Category.id)).one()
+
+    results = SITE_URL + "CAT001RS.htm"
+    site[results] = site[results].replace(b"78.42", b"79.42")
+    crawl(empty_engine, competition_id, refresh=True)
+
+    job = category_job(empty_engine, competition_id)
+    assert job.status == CrawlStatus.DONE
+    assert job.category_id == category_id
+    assert count(empty_engine, Category) == 1
+    assert count(empty_engine, Performance) == 4
+    assert count(empty_engine, Inscription) == 4
+    with Session(empty_engine) as session:
+        assert 79.42 in session.exec(select(Performance.score)).all()
+
+
+def test_refresh_deletes_the_removed_categories(site, empty_engine, competition_id):
+    crawl(empty_engine, competition_id)
+    category_id = category_job(empty_engine, competition_id).category_id
+
+    # The category is renamed on the website: the former one is removed
+    index = SITE_URL + "index.htm"
+    site[index] = site[index].replace(CATEGORY.encode(), b"R2 Junior-Senior Dames")
+    crawl(empty_engine, competition_id, refresh=True)
+
+    with Session(empty_engine) as session:
+        jobs = CrawlJobs(competition_id, session)
+        assert jobs.get(CATEGORY) is None
+        assert jobs.get(CATEGORY, "SP") is None
+        assert session.get(Category, category_id) is None
+    assert category_job(
+        empty_engine, competition_id, "R2 Junior-Senior Dames"
+    ).status == (CrawlStatus.DONE)
+    assert count(empty_engine, Category) == 1
+    assert count(empty_engine, Performance) == 4
+    assert count(empty_engine, Program) == 4
+
+
+def test_sync_rows(empty_engine):
+    with Session(empty_engine) as session:
+        clubs = [Club(abbrev=abbrev) for abbrev in ["TOAC", "CGB"]]
+        session.add_all(clubs)
+        session.flush()
+        stored = {club.abbrev: club for club in clubs}
+        ids = sync_rows(
+            Club,
+            stored,
+            {
+                "TOAC": {"abbrev": "TOAC", "name": "Toulouse"},
+                "MPSG": {"abbrev": "MPSG"},
+            },
+            session,
+        )
+        session.commit()
+
+        assert ids["TOAC"] == clubs[0].id
+        assert session.exec(select(Club.abbrev, Club.name).order_by(Club.id)).all() == [
+            ("TOAC", "Toulouse"),
+            ("MPSG", None),
+        ]
+        assert (
+            ids["MPSG"]
+            == session.exec(select(Club.id).where(Club.abbrev == "MPSG")).one()
+        )
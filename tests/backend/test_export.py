@@ -0,0 +1,88 @@
+"""Streaming exports of the performances"""
+
+import csv
+import io
+import json
+
+import pytest
+from sqlmodel import Session
+
+from backend.crud.export import fetch_batches, parquet_chunks
+from backend.queries import query_performances_export
+from conftest import NB_ROWS
+
+
+def test_ndjson(client):
+    response = client.get("/export/performances", params={"season": "2023-2024"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["performance_id"] for row in rows] == list(range(1, NB_ROWS + 1))
+    assert rows[0]["first_name"] == "First0"
+    assert rows[0]["club"] == "CLUB0"
+    assert rows[0]["competition"] == "Competition 0"
+    assert rows[0]["sp_total_segment_score"] == 20.0
+    assert rows[0]["fs_total_segment_score"] == 20.0
+
+
+def test_filters(client):
+    def performance_ids(params: dict) -> list[int]:
+        response = client.get("/export/performances", params=params)
+        return [
+            json.loads(line)["performance_id"] for line in response.text.splitlines()
+        ]
+
+    assert performance_ids({"competition_id": 3}) == [3]
+    assert performance_ids({"club_id": 5}) == [5]
+    assert performance_ids({"competition_id": 3, "club_id": 5}) == []
+    assert performance_ids({"season": "2022-2023"}) == []
+
+
+def test_csv(client):
+    response = client.get("/export/performances", params={"format": "csv"})
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == NB_ROWS
+    assert rows[-1]["last_name"] == f"LAST{NB_ROWS - 1}"
+    assert rows[-1]["sp_rank"] == "1"
+
+
+def test_csv_empty(client):
+    response = client.get(
+        "/export/performances", params={"format": "csv", "club_id": 0}
+    )
+    assert response.text.splitlines()[0].startswith("performance_id,competition_id")
+
+
+def test_parquet(client):
+    pq = pytest.importorskip("pyarrow.parquet")
+    response = client.get("/export/performances", params={"format": "parquet"})
+    assert response.status_code == 200
+    table = pq.read_table(io.BytesIO(response.content))
+    assert table.num_rows == NB_ROWS
+    assert table.column("club").to_pylist()[:2] == ["CLUB0", "CLUB1"]
+    assert table.column("withdrawn").to_pylist()[0] is False
+
+
+def test_parquet_row_groups(engine):
+    pq = pytest.importorskip("pyarrow.parquet")
+    query = query_performances_export()
+    with Session(engine) as db:
+        chunks = list(parquet_chunks(query, fetch_batches(query, db, batch_size=40)))
+    assert len(chunks) == 4  # a chunk per row group, then the footer
+    parquet = pq.ParquetFile(io.BytesIO(b"".join(chunks)))
+    assert parquet.metadata.num_row_groups == 3
+    assert parquet.read().column("performance_id").to_pylist() == list(
+        range(1, NB_ROWS + 1)
+    )
+
+
+def test_batches(engine):
+    with Session(engine) as db:
+        batches = fetch_batches(query_performances_export(), db, batch_size=30)
+        assert [len(batch) for batch in batches] == [30, 30, 30, 10]
+
+
+def test_invalid_format(client):
+    response = client.get("/export/performances", params={"format": "xml"})
+    assert response.status_code == 422
@@ -0,0 +1,42 @@
+"""Cost of the health probes and of the stats"""
+
+import pytest
+
+from backend.crud.health import stats_cache
+from conftest import NB_ROWS, count_queries
+
+
+@pytest.fixture(autouse=True)
+def clear_stats():
+    stats_cache.clear()
+
+
+def test_health_runs_select_1(client, engine):
+    with count_queries(engine) as queries:
+        response = client.get("/health")
+    assert response.json()["db_status"] == "OK"
+    assert queries.statements == ["SELECT 1;"]
+
+
+def test_stats_are_cached(client, engine, assert_max_queries):
+    response = client.get("/health/stats")
+    assert response.json() == {
+        "skaters": NB_ROWS,
+        "clubs": NB_ROWS,
+        "competitions": NB_ROWS,
+        "performances": NB_ROWS,
+        "estimated": False,
+    }
+    assert client.delete("/clubs/1").status_code == 200
+    with assert_max_queries(engine, 0):
+        assert client.get("/health/stats").json()["clubs"] == NB_ROWS
+
+
+def test_exact_stats(client, engine):
+    client.get("/health/stats")
+    assert client.delete("/clubs/1").status_code == 200
+    with count_queries(engine) as queries:
+        response = client.get("/health/stats", params={"exact": True})
+    assert response.json()["clubs"] == NB_ROWS - 1
+    assert len(queries) == 4
+    assert client.get("/health/stats").json()["clubs"] == NB_ROWS - 1
@@ -0,0 +1,124 @@
+"""Resolution of the clubs and skaters of the crawled entries through the identity map, and
+bulk insert of the categories of the saved sample pages"""
+
+from sqlmodel import Session, col, func, select
+
+from conftest import count_queries, create_competition
+from backend.crud.competition import crawl_competition
+from backend.crud.identity_map import IdentityMap
+from commons.schemas import *
+
+SKATERS = {
+    ("Léa", "MARTIN", "FRA", "TOAC"),
+    ("Anne Sophie", "DUPONT", "FRA", "CGB"),
+    ("Chloé", "DE LA FONTAINE", "FRA", "TOAC"),
+    ("Inès", "GARCIA", "ESP", "MPSG"),
+}
+
+
+def counts(engine) -> dict[str, int]:
+    with Session(engine) as session:
+        return {
+            model.__name__: session.exec(select(func.count()).select_from(model)).one()
+            for model in [
+                Club,
+                Skater,
+                Category,
+                Panel,
+                Inscription,
+                Performance,
+                Program,
+            ]
+        }
+
+
+def skaters(engine) -> set[tuple]:
+    with Session(engine) as session:
+        return set(
+            session.exec(
+                select(
+                    Skater.first_name, Skater.last_name, Skater.nation, Club.abbrev
+                ).join(Club)
+            ).all()
+        )
+
+
+def test_crawl_inserts_the_category(site, empty_engine, competition_id):
+    with Session(empty_engine) as session:
+        crawl_competition(competition_id, session)
+
+    # The detailed results of the free skating are not saved
+    assert counts(empty_engine) == {
+        "Club": 3,
+        "Skater": 4,
+        "Category": 1,
+        "Panel": 2,
+        "Inscription": 4,
+        "Performance": 4,
+        "Program": 4,
+    }
+    assert skaters(empty_engine) == SKATERS
+    with Session(empty_engine) as session:
+        results = session.exec(
+            select(Skater.last_name, Performance.rank, Performance.score)
+            .join(Skater)
+            .order_by(Performance.id)
+        ).all()
+        assert results == [
+            ("MARTIN", 1, 78.42),
+            ("DE LA FONTAINE", 2, 70.1),
+            ("DUPONT", 3, 65.03),
+            ("GARCIA", None, None),
+        ]
+        # The programs are linked to the performances of their skaters
+        programs = session.exec(
+            select(Skater.last_name, Program.rank, Program.total_segment_score)
+            .join(Performance, col(Program.performance_id) == Performance.id)
+            .join(Skater)
+            .order_by(Program.id)
+        ).all()
+        assert programs == [
+            ("MARTIN", 1, 40.21),
+            ("DE LA FONTAINE", 2, 37.65),
+            ("DUPONT", 3, 33.9),
+            ("GARCIA", None, None),
+        ]
+
+
+def test_crawl_reuses_the_clubs_and_skaters(site, empty_engine, competition_id):
+    with Session(empty_engine) as session:
+        crawl_competition(competition_id, session)
+        crawl_competition(create_competition(empty_engine), session)
+
+    nb_rows = counts(empty_engine)
+    assert nb_rows["Club"] == 3
+    assert nb_rows["Skater"] == 4
+    assert nb_rows["Category"] == 2
+    assert nb_rows["Performance"] == 8
+    assert skaters(empty_engine) == SKATERS
+
+
+def test_resolve_creates_missing_rows_once(empty_engine):
+    with Session(empty_engine) as session:
+        identity_map = IdentityMap(session)
+        clubs = identity_map.resolve_clubs(["TOAC", "CGB", "TOAC"])
+        assert list(clubs) == ["TOAC", "CGB"]
+        skater = SkaterCreate(
+            first_name="Léa",
+            last_name="MARTIN",
+            genre="Dames",
+            nation="FRA",
+            club_id=clubs["TOAC"],
+        )
+        other_club = skater.model_copy(update={"club_id": clubs["CGB"]})
+        ids = identity_map.resolve_skaters([skater, other_club, skater])
+        assert ids[0] == ids[2]
+        assert ids[0] != ids[1]
+        session.commit()
+
+    with Session(empty_engine) as session:
+        identity_map = IdentityMap(session)
+        with count_queries(empty_engine) as counter:
+            assert identity_map.resolve_clubs(["CGB"]) == {"CGB": clubs["CGB"]}
+            assert identity_map.resolve_skaters([skater, other_club]) == ids[:2]
+        assert len(counter) == 0
@@ -0,0 +1,134 @@
+"""Regression tests of the indexes of the models.
+
+The queries of `backend.queries` are run through SQLite's EXPLAIN QUERY PLAN on an empty
+database created from the models: every table they filter must be searched with an index
+(or its primary key) instead of being scanned.
+"""
+
+import re
+
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from sqlmodel import SQLModel, select
+
+from backend.migrations import run_migrations
+from backend.queries import (
+    query_category_results,
+    query_club_podiums,
+    query_competitions_from_club,
+    query_performances_from_competition,
+    query_skater_history,
+    query_skater_season_bests,
+    query_skaters_from_club,
+)
+from commons.schemas import *
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+
+def query_plan(engine, query) -> list[str]:
+    sql = str(query.compile(engine, compile_kwargs={"literal_binds": True}))
+    with engine.connect() as conn:
+        return [row[3] for row in conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"))]
+
+
+def searched_tables(plan: list[str]) -> dict[str, str]:
+    """Index used to search each table of a query plan ("SCAN" if the table is scanned)"""
+    tables = {}
+    for step in plan:
+        match = re.match(
+            r"(SEARCH|SCAN) (\w+)(?: USING (?:COVERING )?(INDEX \w+|INTEGER PRIMARY KEY))?",
+            step,
+        )
+        if match:
+            tables[match[2]] = match[3] or "SCAN"
+    return tables
+
+
+@pytest.mark.parametrize("id_only", [False, True])
+def test_skaters_from_club(engine, id_only):
+    tables = searched_tables(
+        query_plan(engine, query_skaters_from_club("TOAC", id_only))
+    )
+    assert tables == {
+        "skater": "INDEX ix_skater_club_id",
+        "club": "INDEX ix_club_abbrev",
+    }
+
+
+@pytest.mark.parametrize("id_only", [False, True])
+def test_competitions_from_club(engine, id_only):
+    tables = searched_tables(
+        query_plan(engine, query_competitions_from_club("TOAC", id_only))
+    )
+    assert tables == {
+        "competition": "INTEGER PRIMARY KEY",
+        "category": "INTEGER PRIMARY KEY",
+        "performance": "INDEX ix_performance_skater_id",
+        "skater": "INDEX ix_skater_club_id",
+        "club": "INDEX ix_club_abbrev",
+    }
+
+
+@pytest.mark.parametrize("id_only", [False, True])
+def test_performances_from_competition(engine, id_only):
+    tables = searched_tables(
+        query_plan(engine, query_performances_from_competition(1, id_only))
+    )
+    assert tables == {
+        "performance": "INDEX ix_performance_category_id_skater_id",
+        "category": "INDEX ix_category_competition_id",
+    }
+
+
+def test_skater_history(engine):
+    assert searched_tables(query_plan(engine, query_skater_history(1))) == {
+        "performance": "INDEX ix_performance_skater_id",
+        "category": "INTEGER PRIMARY KEY",
+        "competition": "INTEGER PRIMARY KEY",
+    }
+
+
+def test_category_results(engine):
+    assert searched_tables(query_plan(engine, query_category_results(1))) == {
+        "performance": "INDEX ix_performance_category_id_skater_id",
+        "skater": "INTEGER PRIMARY KEY",
+        "club": "INTEGER PRIMARY KEY",
+        "program_1": "INDEX ix_program_performance_id_type",
+        "program_2": "INDEX ix_program_performance_id_type",
+    }
+
+
+@pytest.mark.parametrize("query", [query_club_podiums, query_skater_season_bests])
+def test_season_aggregates(engine, query):
+    tables = searched_tables(query_plan(engine, query("2023-2024")))
+    assert tables["competition"] == "INDEX ix_competition_season"
+    assert tables["category"] == "INDEX ix_category_competition_id"
+    assert tables["performance"] == "INDEX ix_performance_category_id_skater_id"
+    assert tables["skater"] == "INTEGER PRIMARY KEY"
+
+
+def test_competition_lookup(engine):
+    query = select(Competition).where(
+        Competition.name == "Coupe Gerard Prido", Competition.season == "2023-2024"
+    )
+    assert searched_tables(query_plan(engine, query)) == {
+        "competition": "INDEX ix_competition_name_season"
+    }
+
+
+def test_migration_creates_missing_indexes(engine):
+    with engine.begin() as conn:
+        for table in SQLModel.metadata.sorted_tables:
+            for index in table.indexes:
+                conn.execute(text(f"DROP INDEX {index.name}"))
+    run_migrations(engine)
+    inspector = inspect(engine)
+    for table in SQLModel.metadata.sorted_tables:
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        assert existing == {index.name for index in table.indexes}
@@ -0,0 +1,212 @@
+"""Parallel ingestion of the competitions by init_database"""
+
+from concurrent.futures import Future, as_completed
+from datetime import date
+from typing import Callable
+
+import pytest
+from sqlalchemy import create_engine
+from sqlmodel import Session, SQLModel, col, delete, select
+
+import init_database
+from backend.migrations import fill_skater_summaries
+from commons.schemas import *
+from conftest import SITE_URL, count_queries, create_competition, create_empty_engine
+
+
+class InlineExecutor:
+    """Process pool running the submitted calls in the calling process"""
+
+    as_completed = staticmethod(as_completed)
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def submit(self, fn, *args):
+        future: Future = Future()
+        future.set_result(fn(*args))
+        return future
+
+
+class ReversedExecutor(InlineExecutor):
+    """Process pool running the submitted calls in the reverse order, once waited for"""
+
+    pending = []  # type: list[tuple[Future, Callable, tuple]]
+
+    def submit(self, fn, *args):
+        future: Future = Future()
+        self.pending.append((future, fn, args))
+        return future
+
+    @classmethod
+    def as_completed(cls, futures):
+        while len(cls.pending) > 0:
+            future, fn, args = cls.pending.pop()
+            future.set_result(fn(*args))
+            yield future
+
+
+@pytest.mark.parametrize("refresh", [False, True])
+def test_parallel_ingestion_forwards_refresh(tmp_path, monkeypatch, refresh):
+    engine = create_engine(f"sqlite:///{tmp_path / 'db.sqlite'}")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        competitions = [
+            Competition(
+                name=f"Competition {i}",
+                type="TF",
+                season="2023-2024",
+                start=None,
+                end=None,
+                location=None,
+                rink_name=None,
+                url=None,
+            )
+            for i in range(2)
+        ]
+        session.add_all(competitions)
+        session.commit()
+        ids = [c.id for c in competitions]
+
+    # Ingest as on PostgreSQL, with a pool of workers
+    monkeypatch.setattr(engine.dialect, "name", "postgresql")
+    monkeypatch.setattr(init_database, "engine", engine)
+    monkeypatch.setattr(init_database, "ProcessPoolExecutor", InlineExecutor)
+    monkeypatch.setattr(init_database, "crawl_links_table", lambda c, done: {})
+    calls = []
+    monkeypatch.setattr(
+        init_database,
+        "ingest_competition",
+        lambda *args: calls.append(args) or {},
+    )
+    init_database.ingest_competitions(ids, workers=2, refresh=refresh)
+    assert sorted(calls) == [(id, {}, refresh) for id in ids]
+
+
+def ingest_in_parallel(monkeypatch, engine, competition_ids: list[int]):
+    """Ingest competitions as on PostgreSQL, with a pool of workers"""
+    monkeypatch.setattr(engine.dialect, "name", "postgresql")
+    monkeypatch.setattr(init_database, "engine", engine)
+    monkeypatch.setattr(init_database, "ProcessPoolExecutor", InlineExecutor)
+    init_database.ingest_competitions(competition_ids, workers=2)
+    monkeypatch.setattr(engine.dialect, "name", "sqlite")
+
+
+def summaries(engine) -> list[tuple]:
+    with Session(engine) as session:
+        return [
+            tuple(summary.model_dump(exclude={"id"}).values())
+            for summary in session.exec(
+                select(SkaterSeasonSummary).order_by(col(SkaterSeasonSummary.skater_id))
+            )
+        ]
+
+
+def test_workers_do_not_write_the_summaries(site, empty_engine, monkeypatch):
+    # All the skaters are shared by the two competitions
+    ids = [create_competition(empty_engine) for _ in range(2)]
+    ingest_competition = init_database.ingest_competition
+
+    def ingest_without_summaries(*args):
+        with count_queries(empty_engine) as counter:
+            deferred = ingest_competition(*args)
+        assert not any("skaterseasonsummary" in s for s in counter.statements)
+        return deferred
+
+    monkeypatch.setattr(init_database, "ingest_competition", ingest_without_summaries)
+    ingest_in_parallel(monkeypatch, empty_engine, ids)
+
+    ingested = summaries(empty_engine)
+    assert len(ingested) == 4
+    with Session(empty_engine) as session:
+        assert set(session.exec(select(SkaterSeasonSummary.competitions))) == {2}
+    # Same summaries as computed from scratch
+    with Session(empty_engine) as session:
+        session.exec(delete(SkaterSeasonSummary))
+        session.commit()
+    fill_skater_summaries(empty_engine)
+    assert summaries(empty_engine) == ingested
+
+
+def stored_rows(engine) -> dict[str, list[dict]]:
+    """Rows of the tables filled by the ingestion, by table. The summaries are compared
+    without their ids."""
+    rows = {}
+    with Session(engine) as session:
+        for model in [Club, Skater, Category, Inscription, Performance, Program]:
+            rows[model.__tablename__] = [
+                row.model_dump()
+                for row in session.exec(
+                    select(model).order_by(*model.__table__.primary_key.columns)
+                )
+            ]
+        rows["skaterseasonsummary"] = [
+            summary.model_dump(exclude={"id"})
+            for summary in session.exec(
+                select(SkaterSeasonSummary).order_by(col(SkaterSeasonSummary.skater_id))
+            )
+        ]
+    return rows
+
+
+@pytest.mark.parametrize("executor", [InlineExecutor, ReversedExecutor])
+def test_parallel_ingestion_of_shared_skaters_and_clubs(site, monkeypatch, executor):
+    # The two competitions share all their skaters and clubs, the entries of the second one
+    # are in another order
+    other_url = SITE_URL.replace("TF-PRIDO", "TF-OTHER")
+    for url, page in list(site.items()):
+        site[url.replace(SITE_URL, other_url)] = page
+    entries = site[other_url + "CAT001EN.htm"].split(b"\n")
+    rows = [i for i, line in enumerate(entries) if b'href="CAT001EN.htm"' in line]
+    first, last = rows[0], rows[-1]
+    entries[first], entries[last] = entries[last], entries[first]
+    site[other_url + "CAT001EN.htm"] = b"\n".join(entries)
+    competitions = [
+        {
+            "name": f"TF Prido {i}",
+            "type": "TF",
+            "season": "2023-2024",
+            "start": date(2023, 12, 2),
+            "end": date(2023, 12, 3),
+            "location": None,
+            "rink_name": None,
+            "circuit": "Ligue Occitanie",
+            "url": url + "index.htm",
+        }
+        for i, url in enumerate([SITE_URL, other_url])
+    ]
+    monkeypatch.setattr(init_database, "read_competitions", lambda: competitions)
+    monkeypatch.setattr(init_database, "ProcessPoolExecutor", executor)
+    monkeypatch.setattr(init_database, "as_completed", executor.as_completed)
+
+    ingested = {}
+    for workers in [1, 2]:
+        engine = create_empty_engine()
+        monkeypatch.setattr(init_database, "engine", engine)
+        monkeypatch.setattr(
+            engine.dialect, "name", "postgresql" if workers > 1 else "sqlite"
+        )
+        init_database.initialize_competitions(workers=workers)
+        monkeypatch.setattr(engine.dialect, "name", "sqlite")
+        ingested[workers] = stored_rows(engine)
+
+    # The clubs and skaters are merged before the workers, whatever their order
+    for table in ["club", "skater", "skaterseasonsummary"]:
+        assert ingested[2][table] == ingested[1][table]
+    if executor is InlineExecutor:
+        assert ingested[2] == ingested[1]
+    else:
+        # The categories of the competitions are created in the order of the workers
+        assert {table: len(rows) for table, rows in ingested[2].items()} == {
+            table: len(rows) for table, rows in ingested[1].items()
+        }
+    assert len(ingested[1]["club"]) == 3
+    assert len(ingested[1]["skater"]) == 4
+    assert len(ingested[1]["category"]) == 2
+    assert len(ingested[1]["performance"]) == 8
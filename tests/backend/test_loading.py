@@ -0,0 +1,105 @@
+"""Number of queries of the read endpoints.
+
+The relationships serialized by the read models are loaded with the rows of each page, so
+reading a page of 100 rows runs a constant number of queries instead of one per row.
+"""
+
+import pytest
+from sqlmodel import Session
+
+from conftest import NB_ROWS
+from backend.crud.category import create_category, update_category
+from backend.crud.performance import create_performance, update_performance
+from commons.schemas import *
+
+
+@pytest.mark.parametrize(
+    "path,expected",
+    [
+        ("/categories", 3),
+        ("/performances", 3),
+        ("/skaters", 1),
+        ("/competitions", 1),
+        ("/clubs", 1),
+    ],
+)
+def test_list_queries(client, engine, assert_max_queries, path, expected):
+    with assert_max_queries(engine, expected):
+        response = client.get(path, params={"limit": NB_ROWS})
+    assert response.status_code == 200
+    assert len(response.json()) == NB_ROWS
+
+
+@pytest.mark.parametrize(
+    "path,expected",
+    [("/categories/1", 3), ("/performances/1", 3), ("/skaters/1", 1)],
+)
+def test_item_queries(client, engine, assert_max_queries, path, expected):
+    with assert_max_queries(engine, expected):
+        response = client.get(path)
+    assert response.status_code == 200
+
+
+def test_nested_models(client):
+    category = client.get("/categories/1").json()
+    assert category["competition"]["name"] == "Competition 0"
+    assert category["sp_panel"]["referee"] == "REF"
+    performance = client.get("/performances", params={"limit": 1}).json()[0]
+    assert performance["short_program"]["type"] == "SP"
+    assert performance["free_skating"]["type"] == "FS"
+    skaters = client.get("/skaters", params={"limit": 2}).json()
+    assert [s["club"]["abbrev"] for s in skaters] == ["CLUB0", "CLUB1"]
+
+
+@pytest.mark.parametrize(
+    "write,read_model",
+    [
+        (
+            lambda db: create_category(
+                CategoryCreate(
+                    genre="Dames", age="Senior", level="R1", competition_id=1
+                ),
+                db,
+            ),
+            CategoryRead,
+        ),
+        (
+            lambda db: update_category(
+                1, CategoryUpdate.model_construct(level="R2"), db
+            ),
+            CategoryRead,
+        ),
+        (
+            lambda db: create_performance(
+                PerformanceCreate(
+                    skater_id=1,
+                    category_id=2,
+                    withdrawn=False,
+                    disqualified=False,
+                    rank=2,
+                    score=30.0,
+                    total_entries=2,
+                ),
+                db,
+            ),
+            PerformanceRead,
+        ),
+        (
+            lambda db: update_performance(
+                1, PerformanceUpdate.model_construct(rank=2), db
+            ),
+            PerformanceRead,
+        ),
+    ],
+)
+def test_written_rows_are_loaded(engine, write, read_model):
+    """The rows returned by the write endpoints are serialized outside of the threadpool:
+    they must not lazy load anything"""
+    with Session(engine) as session:
+        row = write(session)
+    # Detached from its session, a lazy load raises
+    read = read_model.model_validate(row)
+    if read_model is CategoryRead and read.id == 1:
+        assert read.sp_panel is not None
+    if read_model is PerformanceRead and read.id == 1:
+        assert read.short_program is not None and read.free_skating is not None
@@ -0,0 +1,62 @@
+"""Offset and keyset pagination of the list endpoints"""
+
+import pytest
+from sqlalchemy import text
+from sqlmodel import select
+
+from api.utils.pagination import NEXT_CURSOR_HEADER, encode_cursor
+from backend.crud.pagination import paginate
+from commons.schemas import *
+from conftest import NB_ROWS
+
+LIST_PATHS = ["/categories", "/performances", "/skaters", "/competitions", "/clubs"]
+
+
+def walk(client, path: str, limit: int) -> tuple[list[int], int]:
+    ids, pages, params = [], 0, {"limit": limit}
+    while True:
+        response = client.get(path, params=params)
+        assert response.status_code == 200
+        ids += [row["id"] for row in response.json()]
+        pages += 1
+        if NEXT_CURSOR_HEADER not in response.headers:
+            return ids, pages
+        params["cursor"] = response.headers[NEXT_CURSOR_HEADER]
+
+
+@pytest.mark.parametrize("path", LIST_PATHS)
+def test_cursor_walks_all_rows(client, path):
+    ids, pages = walk(client, path, 30)
+    assert ids == list(range(1, NB_ROWS + 1))
+    assert pages == 4
+
+
+def test_cursor_on_last_full_page(client):
+    ids, pages = walk(client, "/clubs", 50)
+    assert ids == list(range(1, NB_ROWS + 1))
+    assert pages == 3
+
+
+def test_offset_is_ordered(client):
+    response = client.get("/skaters", params={"offset": 95, "limit": 10})
+    assert [row["id"] for row in response.json()] == list(range(96, NB_ROWS + 1))
+    assert NEXT_CURSOR_HEADER not in response.headers
+    response = client.get("/skaters", params={"offset": 10, "limit": 10})
+    assert [row["id"] for row in response.json()] == list(range(11, 21))
+    cursor = response.headers[NEXT_CURSOR_HEADER]
+    response = client.get("/skaters", params={"cursor": cursor, "limit": 10})
+    assert [row["id"] for row in response.json()] == list(range(21, 31))
+
+
+@pytest.mark.parametrize("cursor", ["not a cursor", "e30=", encode_cursor("1")])
+def test_invalid_cursor(client, cursor):
+    response = client.get("/performances", params={"cursor": cursor})
+    assert response.status_code == 400
+
+
+def test_cursor_searches_primary_key(engine):
+    query = paginate(select(Performance), Performance.id, limit=10, after=1000)
+    sql = str(query.compile(engine, compile_kwargs={"literal_binds": True}))
+    with engine.connect() as conn:
+        plan = [row[3] for row in conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"))]
+    assert plan == ["SEARCH performance USING INTEGER PRIMARY KEY (rowid>?)"]
@@ -0,0 +1,57 @@
+"""Pool settings of the engine and pool metrics"""
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, exc, text
+from sqlalchemy.pool import StaticPool
+
+from backend.crud.health import get_pool_status
+from backend.database import engine_options
+from backend.pool import MonitoredQueuePool
+from config import Settings
+
+
+def test_engine_options():
+    settings = Settings(
+        DATABASE_URI="postgresql+psycopg2://u:p@db/skating",
+        DATABASE_POOL_SIZE=20,
+        DATABASE_STATEMENT_TIMEOUT=5000,
+    )
+    options = engine_options(settings)
+    assert options["poolclass"] is MonitoredQueuePool
+    assert options["pool_size"] == 20
+    assert options["pool_pre_ping"] is True
+    assert options["connect_args"] == {"options": "-c statement_timeout=5000"}
+    options = engine_options(Settings(DATABASE_URI="sqlite://"))
+    assert options == {"pool_pre_ping": True}
+
+
+def test_pool_metrics(tmp_path):
+    settings = Settings(
+        DATABASE_URI=f"sqlite:///{tmp_path / 'db.sqlite'}",
+        DATABASE_POOL_SIZE=1,
+        DATABASE_MAX_OVERFLOW=1,
+        DATABASE_POOL_TIMEOUT=0.1,
+    )
+    engine = create_engine(settings.DATABASE_URI, **engine_options(settings))
+    first, second = engine.connect(), engine.connect()
+    first.execute(text("SELECT 1"))
+    with pytest.raises(exc.TimeoutError):
+        engine.connect()
+    pool_status = get_pool_status(engine)
+    assert pool_status.size == 1
+    assert pool_status.checked_out == 2
+    assert pool_status.overflow == 1
+    assert pool_status.checkouts == 2
+    assert pool_status.overflows == 1
+    assert pool_status.timeouts == 1
+    assert pool_status.max_wait_ms < 100
+    first.close(), second.close()
+    assert get_pool_status(engine).checked_out == 0
+
+
+def test_pool_without_metrics():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    with pytest.raises(HTTPException) as error:
+        get_pool_status(engine)
+    assert error.value.status_code == 501
@@ -0,0 +1,142 @@
+"""Tests of the statements of `backend.queries` on a small database"""
+
+import pytest
+from sqlalchemy import create_engine
+from sqlmodel import Session, SQLModel
+
+from backend.queries import *
+from commons.schemas import *
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        toac, mpsg = Club(abbrev="TOAC"), Club(abbrev="MPSG")
+        competitions = [
+            Competition(
+                name=f"Competition {i}",
+                type="TF",
+                season=season,
+                start=None,
+                end=None,
+                location=None,
+                rink_name=None,
+                url=None,
+            )
+            for i, season in enumerate(["2022-2023", "2023-2024", "2023-2024"])
+        ]
+        session.add_all([toac, mpsg, *competitions])
+        session.commit()
+        skaters = [
+            Skater(
+                first_name="Léa",
+                last_name="MARTIN",
+                genre="Dames",
+                nation="FRA",
+                club_id=toac.id,
+            ),
+            Skater(
+                first_name="Inès",
+                last_name="GARCIA",
+                genre="Dames",
+                nation="ESP",
+                club_id=mpsg.id,
+            ),
+        ]
+        categories = [
+            Category(genre="Dames", age="Senior", level="R1", competition_id=c.id)
+            for c in competitions
+        ]
+        session.add_all([*skaters, *categories])
+        session.commit()
+        for rank, (skater, category) in enumerate(
+            [
+                (skaters[0], categories[0]),
+                (skaters[0], categories[1]),
+                (skaters[1], categories[1]),
+                (skaters[1], categories[2]),
+            ]
+        ):
+            performance = Performance(
+                skater_id=skater.id,
+                category_id=category.id,
+                withdrawn=False,
+                disqualified=False,
+                rank=rank % 2 + 1,
+                score=50.0 + rank,
+                total_entries=2,
+            )
+            session.add(performance)
+            session.commit()
+            session.add(
+                Program(
+                    type="SP",
+                    rank=1,
+                    starting_number=1,
+                    total_segment_score=20.0,
+                    total_element_score=None,
+                    total_component_score=None,
+                    total_deductions=None,
+                    composition=None,
+                    presentation=None,
+                    skating_skills=None,
+                    bonifications=None,
+                    performance_id=performance.id,
+                )
+            )
+        session.commit()
+        yield session
+
+
+def test_skaters_from_club(db):
+    assert [s.last_name for s in db.exec(query_skaters_from_club("TOAC"))] == ["MARTIN"]
+    assert db.exec(query_skaters_from_club("MPSG", id_only=True)).all() == [2]
+
+
+def test_competitions_from_club(db):
+    competitions = db.exec(query_competitions_from_club("TOAC")).all()
+    assert sorted(c.id for c in competitions) == [1, 2]
+    ids = db.exec(query_competitions_from_club("MPSG", id_only=True)).all()
+    assert sorted(ids) == [2, 3]
+
+
+def test_performances_from_competition(db):
+    assert sorted(db.exec(query_performances_from_competition(2, id_only=True))) == [
+        2,
+        3,
+    ]
+
+
+def test_skater_history(db):
+    history = db.exec(query_skater_history(1)).all()
+    assert [(p.id, c.id, comp.id) for p, c, comp in history] == [(1, 1, 1), (2, 2, 2)]
+
+
+def test_category_results(db):
+    results = db.exec(query_category_results(2)).all()
+    assert [(p.rank, s.last_name, club.abbrev) for p, s, club, _, _ in results] == [
+        (1, "GARCIA", "MPSG"),
+        (2, "MARTIN", "TOAC"),
+    ]
+    assert all(sp.type == "SP" and fs is None for _, _, _, sp, fs in results)
+
+
+def test_season_aggregates(db):
+    assert db.exec(query_club_podiums("2023-2024")).all() == [
+        (2, "MPSG", 2),
+        (1, "TOAC", 1),
+    ]
+    bests = db.exec(query_skater_season_bests("2023-2024")).all()
+    assert [(b.id, b.best_score, b.performances) for b in bests] == [
+        (2, 53.0, 2),
+        (1, 51.0, 1),
+    ]
+
+
+def test_statements_are_cached(db):
+    """Two calls share the same statement, only their bound values differ"""
+    first, second = query_skaters_from_club("TOAC"), query_skaters_from_club("MPSG")
+    assert first._generate_cache_key() == second._generate_cache_key()
+    assert db.exec(first).all() != db.exec(second).all()
@@ -0,0 +1,97 @@
+"""Matching of the skater names of the results website on the normalized full name key"""
+
+import pytest
+from sqlalchemy import text
+from sqlmodel import Session, select
+
+from backend.crud.skater import find_skater_ids
+from backend.migrations import add_skater_full_name_key
+from commons.schemas import *
+
+
+@pytest.mark.parametrize(
+    "name,key",
+    [
+        ("Léa MARTIN", "lea martin"),
+        ("LÉA martin", "lea martin"),
+        ("  Léa   MARTIN ", "lea martin"),
+        ("Anne\tSophie  DUPONT", "anne sophie dupont"),
+        ("Chloé DE LA FONTAINE", "chloe de la fontaine"),
+        ("Inès GARCÍA", "ines garcia"),
+    ],
+)
+def test_normalize_full_name(name, key):
+    assert normalize_full_name(name) == key
+
+
+def add_skater(session: Session, first_name: str, last_name: str, club: Club) -> int:
+    skater = Skater(
+        first_name=first_name,
+        last_name=last_name,
+        genre="Dames",
+        nation="FRA",
+        club_id=club.id,
+    )
+    session.add(skater)
+    session.flush()
+    assert skater.id is not None
+    return skater.id
+
+
+def test_find_skater_ids(empty_engine):
+    with Session(empty_engine) as session:
+        toac, cgb = Club(abbrev="TOAC"), Club(abbrev="CGB")
+        session.add_all([toac, cgb])
+        session.flush()
+        lea = add_skater(session, "Léa", "MARTIN", toac)
+        lea_cgb = add_skater(session, "Léa", "MARTIN", cgb)
+        chloe = add_skater(session, "Chloé", "DE LA FONTAINE", toac)
+
+        assert find_skater_ids(
+            [
+                ("LEA  Martin", "TOAC"),
+                ("Léa MARTIN", "CGB"),
+                ("Chloe de la Fontaine", "TOAC"),
+                ("Chloé DE LA FONTAINE", "CGB"),
+                ("Inès GARCIA", "TOAC"),
+            ],
+            session,
+        ) == [lea, lea_cgb, chloe, None, None]
+
+
+def test_full_name_key_follows_the_name(empty_engine):
+    with Session(empty_engine) as session:
+        club = Club(abbrev="TOAC")
+        session.add(club)
+        session.flush()
+        skater = session.get(Skater, add_skater(session, "Léa", "MARTIN", club))
+        assert skater is not None
+        assert skater.full_name_key == "lea martin"
+
+        skater.last_name = "MARTÍN-DUPONT"
+        session.add(skater)
+        session.commit()
+        session.refresh(skater)
+        assert skater.full_name_key == "lea martin-dupont"
+
+
+def test_add_skater_full_name_key(empty_engine):
+    # Database created before the key existed
+    with empty_engine.begin() as conn:
+        conn.execute(text("DROP INDEX ix_skater_full_name_key_club_id"))
+        conn.execute(text("ALTER TABLE skater DROP COLUMN full_name_key"))
+        conn.execute(
+            text(
+                "INSERT INTO skater (first_name, last_name, genre, nation) VALUES "
+                + "('Léa', 'MARTIN', 'Dames', 'FRA'), ('Inès', 'GARCIA', 'Dames', 'ESP')"
+            )
+        )
+
+    add_skater_full_name_key(empty_engine)
+    # Already migrated
+    add_skater_full_name_key(empty_engine)
+
+    with Session(empty_engine) as session:
+        assert session.exec(
+            select(Skater.last_name, Skater.full_name_key).order_by(Skater.id)
+        ).all() == [("MARTIN", "lea martin"), ("GARCIA", "ines garcia")]
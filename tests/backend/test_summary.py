@@ -0,0 +1,80 @@
+"""Season summaries of the skaters"""
+
+from sqlalchemy import text
+from sqlmodel import Session, select
+
+from backend.crud.summary import summarize_category
+from backend.migrations import fill_skater_summaries
+from commons.schemas import *
+
+
+def summaries(engine) -> list[SkaterSeasonSummary]:
+    with Session(engine) as db:
+        return list(db.exec(select(SkaterSeasonSummary)).all())
+
+
+def test_fill_and_read_summary(client, engine, assert_max_queries):
+    fill_skater_summaries(engine)
+    assert len(summaries(engine)) == 100
+    with assert_max_queries(engine, 1):
+        response = client.get("/skaters/3/summary")
+    assert response.json() == [
+        {
+            "skater_id": 3,
+            "season": "2023-2024",
+            "competitions": 1,
+            "performances": 1,
+            "podiums": 1,
+            "best_rank": 1,
+            "best_score": 40.0,
+            "average_score": 40.0,
+            "sp_best_score": 20.0,
+            "sp_average_score": 20.0,
+            "fs_best_score": 20.0,
+            "fs_average_score": 20.0,
+        }
+    ]
+
+
+def test_summary_of_missing_skater(client):
+    assert client.get("/skaters/1000/summary").status_code == 404
+
+
+def test_summary_lookup_uses_index(engine):
+    with engine.connect() as conn:
+        plan = conn.execute(
+            text(
+                "EXPLAIN QUERY PLAN SELECT * FROM skaterseasonsummary "
+                "WHERE skater_id = 3 ORDER BY season"
+            )
+        ).all()
+    assert [row[3] for row in plan] == [
+        "SEARCH skaterseasonsummary USING INDEX ix_skaterseasonsummary_skater_id_season (skater_id=?)"
+    ]
+
+
+def test_summarize_category(engine):
+    with Session(engine) as db:
+        # Skater 1 moves from category 1 to category 2, which has skater 2
+        db.get(Performance, 1).category_id = 2
+        db.flush()
+        summarize_category(1, db, skater_ids=[1])
+        summarize_category(2, db)
+        db.commit()
+    rows = {row.skater_id: row for row in summaries(engine)}
+    assert set(rows) == {1, 2}
+    assert rows[1].competitions == 1
+    assert rows[1].best_score == 40.0
+
+
+def test_performance_crud_updates_summary(client, engine):
+    fill_skater_summaries(engine)
+    with engine.connect() as conn:
+        conn.exec_driver_sql("PRAGMA foreign_keys = ON")
+    assert client.delete("/performances/4").status_code == 200
+    rows = {row.skater_id: row for row in summaries(engine)}
+    assert 4 not in rows
+    assert len(rows) == 99
+    with Session(engine) as db:
+        assert db.exec(select(Program).where(Program.performance_id == 4)).all() == []
+    assert client.get("/skaters/4/summary").json() == []
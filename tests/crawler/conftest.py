@@ -0,0 +1,27 @@
+import sys
+from pathlib import Path
+
+# The PDF parsers import each other as the top-level `parsers` package, as when they are run
+# from backend/crawler
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "backend" / "crawler"))
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, content: bytes = b"", headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+        self.ok = status_code < 400
+
+
+class FakeSession:
+    """HTTP session answering every GET with `respond(url, headers)`, and recording the
+    requests"""
+
+    def __init__(self, respond):
+        self.respond = respond
+        self.requests: list[tuple[str, dict]] = []
+
+    def get(self, url: str, headers=None, timeout=None) -> FakeResponse:
+        self.requests.append((url, dict(headers or {})))
+        return self.respond(url, headers or {})
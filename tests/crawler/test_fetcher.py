@@ -0,0 +1,58 @@
+"""Concurrent fetch of the pages of the results websites through the shared session"""
+
+import threading
+import time
+
+import pytest
+
+from conftest import FakeResponse, FakeSession
+from backend.crawler import fetcher
+from config import settings
+
+
+@pytest.fixture
+def session(monkeypatch):
+    """Session keeping each request open for a while, recording the number of requests in
+    flight for each host"""
+    lock = threading.Lock()
+    in_flight: dict[str, int] = {}
+    max_in_flight: dict[str, int] = {}
+
+    def respond(url, headers):
+        host = url.split("/")[2]
+        with lock:
+            in_flight[host] = in_flight.get(host, 0) + 1
+            max_in_flight[host] = max(max_in_flight.get(host, 0), in_flight[host])
+        time.sleep(0.05)
+        with lock:
+            in_flight[host] -= 1
+        return FakeResponse(200, url.encode())
+
+    session = FakeSession(respond)
+    session.max_in_flight = max_in_flight
+    monkeypatch.setattr(settings, "CRAWLER_CACHE_DIR", None)
+    monkeypatch.setattr(settings, "CRAWLER_MAX_PER_HOST", 2)
+    monkeypatch.setattr(fetcher, "_session", session)
+    monkeypatch.setattr(fetcher, "_host_slots", {})
+    return session
+
+
+def test_fetch_all_limits_the_requests_per_host(session):
+    urls = [
+        f"http://{host}/Resultats-2099-2100/CAT{i:03d}EN.htm"
+        for host in ["results.example.org", "other.example.org"]
+        for i in range(6)
+    ]
+    pages = fetcher.fetch_all([*urls, urls[0], None])
+
+    assert pages == {url: url.encode() for url in urls}
+    # Each page is requested once
+    assert sorted(url for url, _ in session.requests) == sorted(urls)
+    assert session.max_in_flight == {"results.example.org": 2, "other.example.org": 2}
+
+
+def test_fetch_errors(session, monkeypatch):
+    monkeypatch.setattr(
+        session, "respond", lambda url, headers: FakeResponse(404, b"Not found")
+    )
+    assert fetcher.fetch("http://results.example.org/missing.htm") is None
@@ -0,0 +1,157 @@
+"""Parity tests of the HTML parsing backends against saved sample pages of the results website.
+
+Every getter must return the same output with each available parser as with Python's
+html.parser, and `find_table` must select the same table as the former search on the full text
+of every table.
+"""
+
+from pathlib import Path
+
+import pandas as pd  # type: ignore
+import pytest
+from bs4 import BeautifulSoup, FeatureNotFound  # type: ignore
+
+from backend.crawler import competition_crawler as crawler
+from commons.schemas import Competition
+
+PAGES = Path(__file__).parent / "pages"
+BASE_URL = "http://isujs.so.free.fr/Resultats/Resultats-2023-2024/TF-PRIDO/"
+
+HEADERS = {
+    "index.htm": "\n\nCategory",
+    "CAT001EN.htm": "\n\nNo.",
+    "CAT001RS.htm": "\n\nFPl.",
+    "SEG001OF.htm": "\n\nFunction",
+    "SEG001.htm": "\n\n \xa0 Pl.",
+}
+
+
+def available_parsers() -> list[str]:
+    parsers = []
+    for parser in ["html.parser", "lxml", "html5lib"]:
+        try:
+            BeautifulSoup("", parser)
+            parsers.append(parser)
+        except FeatureNotFound:
+            pass
+    return parsers
+
+
+def read_page(name: str) -> bytes:
+    return (PAGES / name).read_bytes()
+
+
+@pytest.fixture(params=available_parsers())
+def parser(request, monkeypatch):
+    monkeypatch.setattr(crawler, "get_html_parser", lambda: request.param)
+    return request.param
+
+
+def reference(getter, page: str, monkeypatch):
+    """Output of a getter with Python's html.parser"""
+    with monkeypatch.context() as m:
+        m.setattr(crawler, "get_html_parser", lambda: "html.parser")
+        return getter(BASE_URL + page, read_page(page))
+
+
+@pytest.mark.parametrize("page,header", HEADERS.items())
+def test_find_table_matches_full_text_search(page, header):
+    soup = BeautifulSoup(read_page(page), "html.parser")
+    expected = [t for t in soup.find_all("table") if t.text.startswith(header)][0]
+    assert crawler.find_table(soup, header) is expected
+
+
+@pytest.mark.parametrize("page,header", HEADERS.items())
+def test_find_table_with_parser(parser, page, header):
+    soup = crawler.get_soup(BASE_URL + page, read_page(page))
+    table = crawler.find_table(soup, header)
+    assert table is not None
+    assert table.find(["th", "td"]).get_text().strip() == header.strip()
+
+
+def test_find_table_missing(parser):
+    soup = crawler.get_soup(BASE_URL, read_page("SEG001OF.htm"))
+    assert crawler.find_table(soup, "\n\nNo.") is None
+
+
+def test_entries(parser, monkeypatch):
+    df = crawler.get_category_entries(BASE_URL, read_page("CAT001EN.htm"))
+    assert list(df.columns) == [
+        "Surname",
+        "First Name",
+        "Full name",
+        "Club",
+        "Nationality",
+    ]
+    assert df["Surname"].tolist() == ["MARTIN", "DUPONT", "DE LA FONTAINE", "GARCIA"]
+    assert df["First Name"].tolist() == ["Léa", "Anne Sophie", "Chloé", "Inès"]
+    pd.testing.assert_frame_equal(
+        df, reference(crawler.get_category_entries, "CAT001EN.htm", monkeypatch)
+    )
+
+
+def test_panel(parser, monkeypatch):
+    panel = crawler.get_category_panel(BASE_URL, read_page("SEG001OF.htm"))
+    assert panel["Referee"] == {"name": "Marie ROUX", "nationality": "FRA"}
+    assert panel["Judge No.2"] == {"name": "Carlos RUIZ", "nationality": "ESP"}
+    assert panel == reference(crawler.get_category_panel, "SEG001OF.htm", monkeypatch)
+
+
+def test_results(parser, monkeypatch):
+    df = crawler.get_category_results(BASE_URL, read_page("CAT001RS.htm"))
+    assert list(df.columns) == ["FinalRank", "Name", "Club", "Nation", "Score"]
+    assert df["FinalRank"].tolist() == ["1", "2", "3", "WD"]
+    assert df["Score"].tolist() == [78.42, 70.10, 65.03, 0.0]
+    pd.testing.assert_frame_equal(
+        df, reference(crawler.get_category_results, "CAT001RS.htm", monkeypatch)
+    )
+
+
+def test_detailed_results(parser, monkeypatch):
+    df = crawler.get_program_detailed_results(BASE_URL, read_page("SEG001.htm"))
+    assert list(df.columns) == [
+        "Rank",
+        "Name",
+        "Club",
+        "Nation",
+        "TSS",
+        "TES",
+        "PCS",
+        "CO",
+        "PR",
+        "SK",
+        "Ded.",
+        "StN.",
+    ]
+    assert df.loc[0, "Name"] == "Léa MARTIN"
+    assert df["TSS"].tolist() == [40.21, 37.65, 33.90, 0.0]
+    assert df["Ded."].tolist() == [0.0, -1.0, 0.0, 0.0]
+    assert df["StN."].tolist() == [3, 1, 4, 2]
+    pd.testing.assert_frame_equal(
+        df,
+        reference(crawler.get_program_detailed_results, "SEG001.htm", monkeypatch),
+    )
+
+
+def test_links_table(parser, monkeypatch):
+    monkeypatch.setattr(crawler, "fetch", lambda url: read_page("index.htm"))
+    competition = Competition(
+        name="Coupe Gérard Prido",
+        season="2023-2024",
+        type="TF",
+        start=None,
+        end=None,
+        location=None,
+        rink_name=None,
+        url=BASE_URL + "index.htm",
+    )
+    links = crawler.get_links_table(competition, prefetch=False)
+    assert list(links.keys()) == ["R1 Junior-Senior Dames", "Poussin Messieurs"]
+    dames = links["R1 Junior-Senior Dames"]
+    assert dames["entries_link"] == BASE_URL + "CAT001EN.htm"
+    assert [s["name"] for s in dames["segments"]] == ["Short Program", "Free Skating"]
+    assert dames["segments"][0]["scores_link"].endswith("_SP_Scores.pdf")
+    assert "scores_link" not in links["Poussin Messieurs"]["segments"][0]
+
+    monkeypatch.setattr(crawler, "get_html_parser", lambda: "html.parser")
+    assert links == crawler.get_links_table(competition, prefetch=False)
@@ -0,0 +1,96 @@
+"""On-disk HTTP cache of the crawler: pages of closed seasons are served without any network
+call, the others are revalidated with conditional GETs"""
+
+from datetime import date
+
+import pytest
+
+from conftest import FakeResponse, FakeSession
+from backend.crawler import fetcher, http_cache
+from config import settings
+
+CLOSED = "http://results.example.org/Resultats-2022-2023/TF-PRIDO/CAT001RS.htm"
+CURRENT = "http://results.example.org/Resultats-2099-2100/TF-PRIDO/CAT001RS.htm"
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "CRAWLER_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "CRAWLER_OFFLINE", False)
+    return tmp_path
+
+
+@pytest.fixture
+def site(monkeypatch) -> FakeSession:
+    """Session serving `site.pages`, the body and ETag of the pages of the website by URL.
+    Conditional GETs of an unchanged page get a 304."""
+    pages: dict[str, tuple[bytes, str]] = {}
+
+    def respond(url, headers):
+        if url not in pages:
+            return FakeResponse(404)
+        body, etag = pages[url]
+        if headers.get("If-None-Match") == etag:
+            return FakeResponse(304)
+        return FakeResponse(200, body, {"ETag": etag})
+
+    session = FakeSession(respond)
+    session.pages = pages  # type: ignore
+    monkeypatch.setattr(fetcher, "_session", session)
+    return session
+
+
+def test_is_frozen():
+    assert http_cache.is_frozen(CLOSED, today=date(2023, 7, 1))
+    assert not http_cache.is_frozen(CLOSED, today=date(2023, 6, 30))
+    assert not http_cache.is_frozen(CURRENT)
+    assert not http_cache.is_frozen("http://results.example.org/index.htm")
+
+
+def test_closed_seasons_are_served_from_the_cache(cache_dir, site):
+    site.pages[CLOSED] = (b"results", '"v1"')
+    assert fetcher.fetch(CLOSED) == b"results"
+    assert len(site.requests) == 1
+
+    site.pages[CLOSED] = (b"new results", '"v2"')
+    assert fetcher.fetch(CLOSED) == b"results"
+    assert len(site.requests) == 1
+
+
+def test_current_season_is_revalidated(cache_dir, site):
+    site.pages[CURRENT] = (b"results", '"v1"')
+    assert fetcher.fetch(CURRENT) == b"results"
+    assert site.requests[-1] == (CURRENT, {})
+
+    # Not modified: the cached body is returned
+    assert fetcher.fetch(CURRENT) == b"results"
+    assert site.requests[-1] == (CURRENT, {"If-None-Match": '"v1"'})
+
+    site.pages[CURRENT] = (b"new results", '"v2"')
+    assert fetcher.fetch(CURRENT) == b"new results"
+    cached = http_cache.load(CURRENT)
+    assert cached is not None
+    assert (cached.body, cached.etag) == (b"new results", '"v2"')
+    assert len(site.requests) == 3
+
+
+def test_offline_mode_only_uses_the_cache(cache_dir, site, monkeypatch):
+    site.pages[CURRENT] = (b"results", '"v1"')
+    fetcher.fetch(CURRENT)
+
+    monkeypatch.setattr(settings, "CRAWLER_OFFLINE", True)
+    assert fetcher.fetch(CURRENT) == b"results"
+    assert fetcher.fetch(CURRENT.replace("CAT001RS", "CAT002RS")) is None
+    assert len(site.requests) == 1
+
+
+def test_identical_bodies_are_stored_once(cache_dir):
+    http_cache.store(CURRENT, b"results", {})
+    http_cache.store(CLOSED, b"results", {"Last-Modified": "Sat, 02 Dec 2023"})
+
+    assert len(list((cache_dir / "bodies").iterdir())) == 1
+    cached = http_cache.load(CLOSED)
+    assert cached is not None
+    assert http_cache.conditional_headers(cached) == {
+        "If-Modified-Since": "Sat, 02 Dec 2023"
+    }
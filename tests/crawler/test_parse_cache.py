@@ -0,0 +1,85 @@
+"""Cache of the parsed pages of the judges score PDFs: pages are parsed again only when the
+version of a stage they went through changes."""
+
+import pytest
+
+from parsers import parse_pdfs  # type: ignore
+from parsers.cache import ParseCache  # type: ignore
+from parsers.common import EmptyResultsException  # type: ignore
+
+PERFORMANCE = {"metadata": {"name": "Skater"}}
+
+
+class FakePage:
+    """Page rejected by the pre-filter, without performances, or with one performance"""
+
+    def __init__(self, page_number: int, kind: str):
+        self.page_number = page_number
+        self.kind = kind
+
+    def extract_text(self) -> str:
+        return parse_pdfs.SCORE_SHEET_TITLE
+
+
+PAGES = [FakePage(0, "cover"), FakePage(1, "empty"), FakePage(2, "score sheet")]
+
+
+def parse_page(page):
+    if page.kind == "empty":
+        raise EmptyResultsException()
+    return [PERFORMANCE]
+
+
+@pytest.fixture
+def read(monkeypatch):
+    """Pages read from the PDF by `read_pdf_cached`"""
+    read = []
+
+    def read_pdf(path, workers, stats, pages):
+        read.extend(pages)
+        for i in pages:
+            yield i, parse_pdfs.read_page(PAGES[i], stats)
+
+    monkeypatch.setattr(parse_pdfs, "read_pdf", read_pdf)
+    monkeypatch.setattr(parse_pdfs, "count_pages", lambda path: len(PAGES))
+    monkeypatch.setattr(
+        parse_pdfs, "is_score_sheet_candidate", lambda page: page.kind != "cover"
+    )
+    monkeypatch.setattr(parse_pdfs, "parse_standard", parse_page)
+    return read
+
+
+def read_cached(tmp_path, prefilter: int, parser: int) -> list:
+    pdf = tmp_path / "protocol.pdf"
+    pdf.write_bytes(b"%PDF")
+    cache = ParseCache(
+        tmp_path / "cache", pdf, {"prefilter": prefilter, "parser": parser}
+    )
+    return list(parse_pdfs.read_pdf_cached(pdf, cache))
+
+
+def test_pages_are_loaded_from_the_cache(tmp_path, read):
+    first = read_cached(tmp_path, prefilter=1, parser=1)
+    assert read == [0, 1, 2]
+    assert first == [
+        (0, None),
+        (1, {"text": parse_pdfs.SCORE_SHEET_TITLE, "parsed": []}),
+        (2, {"text": parse_pdfs.SCORE_SHEET_TITLE, "parsed": [PERFORMANCE]}),
+    ]
+
+    read.clear()
+    assert read_cached(tmp_path, prefilter=1, parser=1) == first
+    assert read == []
+
+
+def test_parser_version_invalidates_the_pages_it_saw(tmp_path, read):
+    read_cached(tmp_path, prefilter=1, parser=1)
+    read.clear()
+
+    read_cached(tmp_path, prefilter=1, parser=2)
+    # The page without performances went through the parser, the cover page didn't
+    assert read == [1, 2]
+
+    read.clear()
+    read_cached(tmp_path, prefilter=2, parser=2)
+    assert read == [0, 1, 2]
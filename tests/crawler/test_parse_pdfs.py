@@ -0,0 +1,206 @@
+"""Reading of the judges score PDFs, on small PDFs generated by the tests"""
+
+import copy
+import time
+from datetime import date
+from pathlib import Path
+
+import pandas as pd  # type: ignore
+import pytest
+
+from parsers import parse_pdfs  # type: ignore
+
+
+def write_pdf(path: Path, pages: list[list[str]]):
+    """Minimal PDF with a line of Helvetica text per string, from the top of each page"""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids = []
+    for lines in pages:
+        text = " ".join(
+            f"1 0 0 1 50 {800 - 20 * i} Tm ({line}) Tj" for i, line in enumerate(lines)
+        )
+        stream = f"BT /F1 12 Tf {text} ET".encode()
+        objects.append(
+            b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream)
+        )
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            + b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>"
+            % len(objects)
+        )
+        kids.append(b"%d 0 R" % len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(kids),
+        len(kids),
+    )
+    content = b"%PDF-1.4\n"
+    offsets = []
+    for i, obj in enumerate(objects, 1):
+        offsets.append(len(content))
+        content += b"%d 0 obj\n%s\nendobj\n" % (i, obj)
+    xref = len(content)
+    content += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    content += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    content += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1,
+        xref,
+    )
+    path.write_bytes(content)
+
+
+@pytest.fixture
+def protocol(tmp_path) -> Path:
+    """Protocol of 3 programs: a cover page, then the score sheet pages of each program and
+    a summary page. The score sheets have no tables, the parser finds no performance on
+    them."""
+    pages = [["Coupe Gerard Prido", "Protocol"]]
+    for program in [
+        "R1 Dames Short Program",
+        "R1 Dames Free Skating",
+        "Poussin Messieurs",
+    ]:
+        pages += [
+            [parse_pdfs.SCORE_SHEET_TITLE, program, f"Page {i}"] for i in range(4)
+        ]
+        pages.append(["Summary", program])
+    path = tmp_path / "protocol.pdf"
+    write_pdf(path, pages)
+    return path
+
+
+class UnreadablePage:
+    page_number = 1
+
+    def extract_text(self):
+        time.sleep(0.01)
+        raise ValueError("Unreadable page")
+
+
+def slow_failure(page):
+    time.sleep(0.01)
+    raise ValueError("Unreadable page")
+
+
+@pytest.mark.parametrize(
+    "prefilter,stage",
+    [(slow_failure, "prefilter"), (lambda page: True, "text")],
+)
+def test_read_page_counts_unreadable_pages(monkeypatch, prefilter, stage):
+    monkeypatch.setattr(parse_pdfs, "is_score_sheet_candidate", prefilter)
+    stats = parse_pdfs.ParseStats()
+
+    assert parse_pdfs.read_page(UnreadablePage(), stats) is None
+    assert (stats.pages, stats.skipped) == (1, 1)
+    assert stats.timings[stage] >= 0.01
+
+
+@pytest.mark.parametrize("workers", [2, 3])
+def test_read_pdf_in_parallel(protocol, workers):
+    serial_stats = parse_pdfs.ParseStats()
+    serial = list(parse_pdfs.read_pdf(protocol, 1, serial_stats))
+    assert len(serial) == 16
+    assert [i for i, raw in serial if raw is None] == [0, 5, 10, 15]
+
+    stats = parse_pdfs.ParseStats()
+    assert list(parse_pdfs.read_pdf(protocol, workers, stats)) == serial
+    assert (stats.pages, stats.skipped) == (serial_stats.pages, serial_stats.skipped)
+
+    pages = [3, 4, 5, 11]
+    assert list(parse_pdfs.read_pdf(protocol, workers, pages=pages)) == [
+        (i, raw) for i, raw in serial if i in pages
+    ]
+
+
+CONTEXT = {
+    "competition": "Coupe Gerard Prido",
+    "city": "Colomiers",
+    "type": "TF",
+    "start": date(2023, 12, 2),
+    "end": date(2023, 12, 3),
+    "entries": pd.DataFrame(
+        {
+            "Category": ["R1 Dames", "Poussin Messieurs"],
+            "Full name": ["Skater 0", "Skater 1"],
+            "Club": ["TOAC", "CGB"],
+        }
+    ),
+}
+
+
+def raw_page(program: str, nb_performances: int) -> dict:
+    return {
+        "text": f"{parse_pdfs.SCORE_SHEET_TITLE}\n{program}",
+        "parsed": [
+            {"metadata": {"name": f"Skater {i}"}} for i in range(nb_performances)
+        ],
+    }
+
+
+# Programs split across pages, with pages skipped before the parser and a page the parser
+# finds no performance on
+RAW_PAGES = [
+    None,
+    raw_page("R1 Dames Short Program", 2),
+    raw_page("R1 Dames Short Program", 3),
+    raw_page("R1 Dames Short Program", 1),
+    None,
+    raw_page("R1 Dames Free Skating", 1),
+    raw_page("Poussin Messieurs Free Skating", 2),
+    raw_page("Poussin Messieurs Free Skating", 0),
+    raw_page("Poussin Messieurs Free Skating", 2),
+    None,
+]
+
+
+def old_fix_nb_entries(performances):
+    """`fix_nb_entries` before the streaming API"""
+    for performance in performances:
+        nb_entries = len(
+            list(
+                filter(
+                    lambda x: x["metadata"]["program"]
+                    == performance["metadata"]["program"],
+                    performances,
+                )
+            )
+        )
+        if nb_entries != performance["metadata"]["nb_entries"]:
+            performance["metadata"]["nb_entries"] = nb_entries
+
+
+def raw_pages():
+    return enumerate(copy.deepcopy(RAW_PAGES))
+
+
+def test_iter_raw_pages_counts_entries_across_pages(monkeypatch):
+    with monkeypatch.context() as m:
+        m.setattr(parse_pdfs, "fix_nb_entries", old_fix_nb_entries)
+        expected = parse_pdfs.parse_raw_pages(raw_pages(), CONTEXT)
+    assert parse_pdfs.parse_raw_pages(raw_pages(), CONTEXT) == expected
+
+    performances = list(parse_pdfs.iter_raw_pages(raw_pages(), CONTEXT))
+    assert performances == expected
+    assert [
+        (p["metadata"]["program"], p["metadata"]["nb_entries"]) for p in performances
+    ] == [("R1 Dames Short Program", 6)] * 6 + [("R1 Dames Free Skating", 1)] + [
+        ("Poussin Messieurs Free Skating", 4)
+    ] * 4
+
+
+def test_iter_raw_pages_yields_each_program_when_the_next_one_starts():
+    yielded = []
+
+    def pages():
+        for i, raw in raw_pages():
+            yielded.append(i)
+            yield i, raw
+
+    performances = parse_pdfs.iter_raw_pages(pages(), CONTEXT)
+    first = next(performances)
+    assert first["metadata"]["program"] == "R1 Dames Short Program"
+    # The short program ends with the page of the free skating
+    assert yielded == [0, 1, 2, 3, 4, 5]